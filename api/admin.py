@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     ContactMessage, ContactMessageFile, Journal, News, EditorialBoardMember, RecentIssueLink,
-    Issue, Author, Keyword, Article, ArticleTranslation
+    Issue, Author, Keyword, Article, ArticleTranslation, UploadSession, Job
 )
 
 @admin.register(ContactMessage)
@@ -10,6 +10,15 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_filter = ('is_read','created_at')
     search_fields = ('name','email','subject','message')
     list_editable = ('is_read',)
+    actions = ['mark_read', 'mark_unread']
+
+    @admin.action(description="Tanlanganlarni o'qilgan deb belgilash")
+    def mark_read(self, request, queryset):
+        queryset.update(is_read=True)
+
+    @admin.action(description="Tanlanganlarni o'qilmagan deb belgilash")
+    def mark_unread(self, request, queryset):
+        queryset.update(is_read=False)
 
 @admin.register(ContactMessageFile)
 class ContactMessageFileAdmin(admin.ModelAdmin):
@@ -60,4 +69,15 @@ class ArticleAdmin(admin.ModelAdmin):
     list_display = ('__str__','issue','doi')
     list_filter = ('issue__journal','issue')
     search_fields = ('translations__title','doi')
-    filter_horizontal = ('authors','keywords')
\ No newline at end of file
+    filter_horizontal = ('authors','keywords')
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename','target','object_id','received','size','status','created_at')
+    list_filter = ('target','status')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name','status','attempts','run_after','locked_by','updated_at')
+    list_filter = ('status','name')
+    readonly_fields = ('last_error',)
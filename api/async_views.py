@@ -0,0 +1,127 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .cache import aget_or_build
+from . import versioning
+
+DETAIL_ACTIONS = {
+    'get': 'retrieve', 'head': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+}
+
+
+class _Fallback(Exception):
+    """The request needs the sync viewset: another renderer (browsable API) was negotiated"""
+
+
+def _viewset_instance(viewset, request, kwargs):
+    """The viewset as DRF's as_view() and dispatch() would set it up, before initial()"""
+    view = viewset(action_map=DETAIL_ACTIONS, args=(), kwargs=kwargs)
+    for method, action in DETAIL_ACTIONS.items():
+        setattr(view, method, getattr(view, action))
+    view.request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    view.format_kwarg = view.get_format_suffix(**kwargs)
+    return view
+
+
+def _initial(view, kwargs):
+    """Run view.initial(), None when the request may proceed, else the finished response it raised.
+
+    That is authentication, permissions, throttles, versioning, content
+    negotiation and the conditional GET check (304), as in the sync viewset.
+    """
+    try:
+        view.initial(view.request, **kwargs)
+    except Exception as exc:
+        return _error_response(view, exc, kwargs)
+    return None
+
+
+def _error_response(view, exc, kwargs):
+    response = view.finalize_response(view.request, view.handle_exception(exc), **kwargs)
+    return response.render() if hasattr(response, 'render') else response
+
+
+async def _retrieve(viewset, request, kwargs):
+    view = _viewset_instance(viewset, request, kwargs)
+    drf_request = view.request
+    # Negotiation has no side effects, so a fallback decided here hasn't counted a throttle hit yet;
+    # the browsable API renders forms that query the database
+    renderer, _ = view.perform_content_negotiation(drf_request, force=True)
+    if not isinstance(renderer, JSONRenderer):
+        raise _Fallback
+
+    response = await sync_to_async(_initial)(view, kwargs)
+    if response is not None:
+        return response
+    media_type = drf_request.accepted_media_type
+    try:
+        pk = view.payload_pk() if getattr(view, 'payload_model', None) else kwargs['pk']
+    except Http404 as exc:
+        return await sync_to_async(_error_response)(view, exc, kwargs)
+
+    async def build():
+        try:
+            instance = await view.filter_queryset(view.get_queryset()).aget(pk=pk)
+        except ObjectDoesNotExist:
+            raise Http404
+        # Serializer fields may still touch the database (image variants), so it runs off the event loop
+        return await sync_to_async(lambda: view.get_serializer(instance).data)()
+
+    try:
+        if getattr(view, 'payload_model', None):
+            built = False
+
+            async def cached_build():
+                nonlocal built
+                built = True
+                return await build()
+
+            data = await aget_or_build(view.payload_model, pk, view.payload_variant(), cached_build)
+            if not built:
+                queryset = view.filter_queryset(view.get_queryset()).filter(pk=pk)
+                data = await sync_to_async(view.current_payload)(data, queryset)
+                if data is None:
+                    raise Http404
+        else:
+            data = await build()
+    except Http404 as exc:
+        return await sync_to_async(_error_response)(view, exc, kwargs)
+    if hasattr(view, 'record_view'):
+        await sync_to_async(view.record_view)(drf_request, data['id'])
+
+    content = renderer.render(data, media_type, view.get_renderer_context())
+    response = HttpResponse(content, content_type=media_type)
+    for name, value in view.headers.items():
+        response[name] = value
+    response_validators = getattr(view, '_validators', None)
+    if response_validators:
+        versioning.add_validators(response, response_validators)
+    return response
+
+
+def async_read_view(viewset, basename):
+    """Detail view answering GET/HEAD of the viewset's retrieve natively async.
+
+    Under ASGI a sync view holds a thread for the whole request, middleware
+    included; here initial() (permissions, throttles, the ETag check) and
+    serializing a cache miss borrow a thread, while the payload cache and the
+    object lookup are awaited. Lists stay on the sync viewset: paginating and
+    serializing them is the whole request, async would only add a hop.
+    Other methods and non-JSON requests are handled by the viewset itself.
+    """
+    sync_view = sync_to_async(viewset.as_view(DETAIL_ACTIONS, basename=basename, detail=True))
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            try:
+                return await _retrieve(viewset, request, kwargs)
+            except _Fallback:
+                pass
+        return await sync_view(request, *args, **kwargs)
+
+    # CSRF is enforced by DRF's SessionAuthentication on the unsafe methods
+    view.csrf_exempt = True
+    return view
@@ -0,0 +1,319 @@
+import asyncio
+import datetime
+import gc
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.utils import timezone
+
+from .instrumentation import QueryTimer
+from .models import (
+    Journal, EditorialBoardMember, Issue, Author, Keyword, Article, ArticleTranslation, first_page
+)
+from .search import get_backend
+from . import versioning
+
+_SYLLABLES = ('qi', 'sh', 'loq', 'xo', 'ja', 'lik', 'pax', 'ta', 'suv', 'ye', 'ri', 'don', 'ho', 'sil', 'ma',
+              'ka', 'niz', 'tup', 'roq', 'bug', 'doy', 'meva', 'sab', 'zav', 'chor', 'va', 'tex', 'no', 'lo', 'gi')
+
+
+def _word(rng):
+    return ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def _text(rng, words):
+    return ' '.join(_word(rng) for _ in range(words)).capitalize()
+
+
+def seed(journals=2, years=10, issues_per_year=6, articles_per_issue=40, authors=None, keywords=500,
+         board_members=15, random_seed=0, batch_size=500):
+    """Fill the database with a reproducible catalogue, written with bulk INSERTs.
+
+    bulk_create sends no signals, so the search index and content versions
+    are rebuilt once at the end instead of per row.
+    """
+    rng = random.Random(random_seed)
+    total_articles = journals * years * issues_per_year * articles_per_issue
+    authors = authors or max(total_articles * 3 // 5, 10)
+
+    with transaction.atomic():
+        journal_objects = Journal.objects.bulk_create([
+            Journal(name=f'{_text(rng, 3)} jurnali', short_name=code)
+            for code in ['QX', 'AI'][:journals] + [f'J{n}' for n in range(3, journals + 1)]
+        ])
+        EditorialBoardMember.objects.bulk_create([
+            EditorialBoardMember(journal=journal, full_name=_text(rng, 3), position_description=_text(rng, 12),
+                                 role=rng.choice(EditorialBoardMember.ROLE_CHOICES)[0], order=n)
+            for journal in journal_objects for n in range(board_members)
+        ], batch_size=batch_size)
+        author_ids = [a.pk for a in Author.objects.bulk_create([
+            Author(last_name=_word(rng).capitalize(), first_name=_word(rng).capitalize(),
+                   patronymic=_word(rng).capitalize(), organization=_text(rng, 2),
+                   orcid_id=f'0000-000{n % 10}-{n % 10000:04d}-{rng.randint(1000, 9999)}' if n % 3 else '')
+            for n in range(authors)
+        ], batch_size=batch_size)]
+        keyword_ids = [k.pk for k in Keyword.objects.bulk_create(
+            [Keyword(name=f'{_word(rng)}{n}') for n in range(keywords)], batch_size=batch_size)]
+
+        start_year = timezone.now().year - years + 1
+        journal_types = [code for code, _ in Issue.JOURNAL_TYPE_CHOICES]
+        # Only one current issue per journal type is allowed: extra journals get none
+        issues = Issue.objects.bulk_create([
+            Issue(journal=journal, journal_type=journal_types[index % len(journal_types)],
+                  title=f'{n + 1}-son, {start_year + year}', cover_image='covers/cover.png',
+                  pdf_file='issues/issue.pdf',
+                  published_date=datetime.date(start_year + year, 1, 1) + datetime.timedelta(days=60 * n),
+                  is_current=(index < len(journal_types) and year == years - 1 and n == issues_per_year - 1))
+            for index, journal in enumerate(journal_objects) for year in range(years) for n in range(issues_per_year)
+        ], batch_size=batch_size)
+
+        page_ranges = [f'{n * 10 + 1}-{n * 10 + 9}' for n in range(articles_per_issue)]
+        for issue in issues:
+            articles = Article.objects.bulk_create([
+                # bulk_create skips Article.save(), which derives start_page
+                Article(issue=issue, pages=pages, start_page=first_page(pages), doi=f'10.5555/{issue.pk}.{n}',
+                        references='\n'.join(_text(rng, 10) for _ in range(rng.randint(5, 15))))
+                for n, pages in enumerate(page_ranges)
+            ])
+            ArticleTranslation.objects.bulk_create([
+                ArticleTranslation(article=article, language=language, title=_text(rng, 8), abstract=_text(rng, 120))
+                for article in articles for language in ('uz', 'ru', 'en')
+            ], batch_size=batch_size)
+            Article.authors.through.objects.bulk_create([
+                Article.authors.through(article=article, author_id=pk)
+                for article in articles for pk in rng.sample(author_ids, rng.randint(1, min(4, len(author_ids))))
+            ], batch_size=batch_size)
+            Article.keywords.through.objects.bulk_create([
+                Article.keywords.through(article=article, keyword_id=pk)
+                for article in articles for pk in rng.sample(keyword_ids, rng.randint(3, min(6, len(keyword_ids))))
+            ], batch_size=batch_size)
+
+        for name in ('journal', 'editorialboardmember', 'author', 'keyword', 'issue', 'article',
+                     'articletranslation'):
+            versioning.bump(name)
+    get_backend().rebuild()
+    return {
+        'journals': len(journal_objects), 'issues': len(issues), 'articles': total_articles, 'authors': authors,
+        'keywords': keywords,
+    }
+
+
+def endpoints():
+    """(name, path) of the measured endpoints, with ids picked from the seeded data"""
+    issue = Issue.objects.filter(is_current=True).values_list('pk', flat=True).first() or Issue.objects.values_list(
+        'pk', flat=True).first()
+    article = Article.objects.filter(issue_id=issue).values_list('pk', flat=True).first()
+    journal = Journal.objects.values_list('short_name', flat=True).first()
+    return [
+        ('issues', '/api/issues/'),
+        ('issues/current-issues', '/api/issues/current-issues/'),
+        ('articles?issue=', f'/api/articles/?issue={issue}'),
+        ('articles/{id}', f'/api/articles/{article}/'),
+        ('board-members?journal=', f'/api/board-members/?journal={journal}'),
+        ('home', f'/api/home/?journal={journal}'),
+    ]
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = (len(values) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (index - lower)
+
+
+def measure(path, iterations=50, warmup=5, cold=False, host='localhost'):
+    """Latency percentiles (ms), queries per request and peak traced memory (KiB) of one endpoint.
+
+    Memory is traced in a separate pass: tracemalloc slows every allocation
+    down and would distort the timings.
+    """
+    client = Client(HTTP_HOST=host)
+    timer = QueryTimer()
+    for _ in range(warmup):
+        client.get(path)
+
+    durations, queries = [], []
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        before = timer.count
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            response = client.get(path)
+            durations.append((time.perf_counter() - start) * 1000)
+        queries.append(timer.count - before)
+
+    gc.collect()
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'iterations': iterations,
+        'p50_ms': round(_percentile(durations, 50), 3),
+        'p90_ms': round(_percentile(durations, 90), 3),
+        'p99_ms': round(_percentile(durations, 99), 3),
+        'mean_ms': round(statistics.fmean(durations), 3),
+        'min_ms': round(min(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'queries': round(statistics.fmean(queries), 2),
+        'peak_kib': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+async def _http_get(reader, writer, host, path):
+    """One GET over a keep-alive HTTP/1.1 connection, returns (status, whether the server keeps it open)"""
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    keep_alive = headers.get('connection', '').lower() != 'close'
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+        return status, keep_alive
+    while True:
+        chunk = int((await reader.readline()).split(b';')[0], 16)
+        await reader.readexactly(chunk + 2)
+        if not chunk:
+            return status, keep_alive
+
+
+async def _load_worker(base_url, paths, offset, deadline, durations, errors):
+    url = urlsplit(base_url)
+    host = url.netloc
+    connection = None
+    # Clients start on different paths so every endpoint is under load at once
+    index = offset
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(url.hostname, url.port or 80)
+            status, keep_alive = await _http_get(*connection, host, path)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            errors.append('connection')
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            continue
+        if status >= 400:
+            errors.append(status)
+        durations.append((time.perf_counter() - start) * 1000)
+        if not keep_alive:
+            # Sync WSGI workers answer one request per connection
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(base_url, paths, concurrency=50, duration=10.0):
+    """Requests per second and latency percentiles (ms) of `concurrency` clients hammering a running server.
+
+    Each client reuses its connection while the server allows it and cycles
+    through `paths`. Only the standard library is needed, so the same run can
+    be pointed at a WSGI and an ASGI server of the same build.
+    """
+    durations, errors = [], []
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[_load_worker(base_url, paths, n, deadline, durations, errors) for n in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(durations),
+        'errors': len(errors),
+        'rps': round(len(durations) / elapsed, 1),
+        'p50_ms': round(_percentile(durations, 50), 2) if durations else None,
+        'p90_ms': round(_percentile(durations, 90), 2) if durations else None,
+        'p99_ms': round(_percentile(durations, 99), 2) if durations else None,
+        'max_ms': round(max(durations), 2) if durations else None,
+    }
+
+
+def process_memory(pids):
+    """{pid: (current, peak) resident memory in KiB} of server processes, read from /proc (Linux)"""
+    memory = {}
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status', encoding='ascii') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        memory[pid] = (int(fields['VmRSS'].split()[0]), int(fields['VmHWM'].split()[0]))
+    return memory
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(iterations=50, warmup=5, cold=False, only=None):
+    """Measure every endpoint, the result is JSON serializable"""
+    results = {}
+    for name, path in endpoints():
+        if only and name not in only:
+            continue
+        results[name] = measure(path, iterations, warmup, cold)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'cold_cache': cold,
+            'dataset': {
+                'journals': Journal.objects.count(),
+                'issues': Issue.objects.count(),
+                'articles': Article.objects.count(),
+                'authors': Author.objects.count(),
+            },
+        },
+        'endpoints': results,
+    }
+
+
+def compare(base, current, metrics=('p50_ms', 'p90_ms', 'queries', 'peak_kib')):
+    """Rows of (endpoint, metric, base, current, change %) for endpoints present in both results"""
+    rows = []
+    for name, values in current['endpoints'].items():
+        previous = base['endpoints'].get(name)
+        if previous is None:
+            continue
+        for metric in metrics:
+            old, new = previous[metric], values[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((name, metric, old, new, round(change, 1)))
+    return rows
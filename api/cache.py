@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from .db import primary
+from .fieldsets import rendered_fields, requested_fieldset
+from .models import Article
+from .transactions import collect_on_commit
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _lock_timeout():
+    return getattr(settings, 'API_RESPONSE_CACHE_LOCK_TIMEOUT', 10)
+
+
+def _version_key(model_name, pk):
+    return f'payload:version:{model_name}:{pk}'
+
+
+def _object_version(cache, model_name, pk):
+    """Random token of the object's current version, replaced on every invalidation"""
+    key = _version_key(model_name, pk)
+    token = cache.get(key)
+    if token is None:
+        token = uuid.uuid4().hex
+        # Outlives the payloads keyed by it, and still expires for objects nobody asks for anymore
+        if not cache.add(key, token, timeout=_timeout()):
+            token = cache.get(key, token)
+    return token
+
+
+def payload_key(cache, model_name, pk, variant):
+    return f'payload:{model_name}:{pk}:{_object_version(cache, model_name, pk)}:{variant}'
+
+
+def _build(cache, model_name, pk, build):
+    try:
+        with primary():
+            return build()
+    except Exception:
+        # Typically a 404: don't leave a version token behind for an object that doesn't exist
+        cache.delete(_version_key(model_name, pk))
+        raise
+
+
+def get_or_build(model_name, pk, variant, build):
+    """Serialized payload of one object, built with `build()` on a miss.
+
+    Only one worker rebuilds a cold key: the others wait for it up to
+    API_RESPONSE_CACHE_LOCK_TIMEOUT seconds before building it themselves.
+    Builds read from the primary, a replica that hasn't caught up with the
+    invalidating write would otherwise be cached for the whole timeout.
+    """
+    cache = get_cache()
+    key = payload_key(cache, model_name, pk, variant)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=_lock_timeout()):
+        try:
+            data = _build(cache, model_name, pk, build)
+            cache.set(key, data, timeout=_timeout())
+        finally:
+            cache.delete(lock_key)
+        return data
+
+    deadline = time.monotonic() + _lock_timeout()
+    delay = 0.01
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if cache.get(lock_key) is None:
+            break
+        delay = min(delay * 2, 0.2)
+    return _build(cache, model_name, pk, build)
+
+
+async def _aobject_version(cache, model_name, pk):
+    key = _version_key(model_name, pk)
+    token = await cache.aget(key)
+    if token is None:
+        token = uuid.uuid4().hex
+        if not await cache.aadd(key, token, timeout=_timeout()):
+            token = await cache.aget(key, token)
+    return token
+
+
+async def _abuild(cache, model_name, pk, build):
+    try:
+        with primary():
+            return await build()
+    except Exception:
+        await cache.adelete(_version_key(model_name, pk))
+        raise
+
+
+async def aget_or_build(model_name, pk, variant, build):
+    """get_or_build() for async views: `build` is a coroutine function and waiting doesn't block the event loop"""
+    cache = get_cache()
+    key = f'payload:{model_name}:{pk}:{await _aobject_version(cache, model_name, pk)}:{variant}'
+    data = await cache.aget(key)
+    if data is not None:
+        return data
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, timeout=_lock_timeout()):
+        try:
+            data = await _abuild(cache, model_name, pk, build)
+            await cache.aset(key, data, timeout=_timeout())
+        finally:
+            await cache.adelete(lock_key)
+        return data
+
+    deadline = time.monotonic() + _lock_timeout()
+    delay = 0.01
+    while time.monotonic() < deadline:
+        await asyncio.sleep(delay)
+        data = await cache.aget(key)
+        if data is not None:
+            return data
+        if await cache.aget(lock_key) is None:
+            break
+        delay = min(delay * 2, 0.2)
+    return await _abuild(cache, model_name, pk, build)
+
+
+def invalidate(model_name, pks):
+    """Drop every cached variant of the given objects"""
+    if pks:
+        get_cache().delete_many([_version_key(model_name, pk) for pk in pks])
+
+
+def invalidate_articles(article_ids, issue_ids=()):
+    """Drop cached articles and the issues embedding them"""
+    article_ids = set(article_ids)
+    issue_ids = set(issue_ids) | set(
+        Article.objects.filter(pk__in=article_ids).values_list('issue_id', flat=True))
+    invalidate('article', article_ids)
+    invalidate('issue', issue_ids)
+
+
+def _invalidate_items(items):
+    articles = {pk for model_name, pk in items if model_name == 'article'}
+    issues = {pk for model_name, pk in items if model_name == 'issue'}
+    invalidate_articles(articles, issues)
+
+
+def schedule_invalidation(articles=(), issues=()):
+    """Invalidate once the current transaction commits, so readers can't re-cache old rows"""
+    items = {('article', pk) for pk in articles} | {('issue', pk) for pk in issues if pk is not None}
+    collect_on_commit(_invalidate_items, items)
+
+
+class CachedRetrieveMixin:
+    """Serves `retrieve` from the payload cache, `payload_model` names the cached model"""
+    payload_model = None
+
+    def payload_variant(self):
+        # File fields are rendered as absolute URLs, so the host is part of the variant
+        variant = f'{self.get_serializer_class().__name__}|{self.request.scheme}://{self.request.get_host()}'
+        if requested_fieldset(self.request) is not None:
+            # Keyed by the fields actually rendered: unknown, repeated or reordered names share one entry
+            variant += '|' + hashlib.md5(rendered_fields(self.get_serializer()).encode()).hexdigest()
+        return variant
+
+    def payload_pk(self):
+        """Primary key from the URL as stored, Http404 for anything else, before it goes into a cache key"""
+        value = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(value)
+        except ValidationError:
+            raise Http404
+        if not isinstance(pk, int) or not 0 < pk < 2 ** 63:
+            raise Http404
+        return pk
+
+    def current_payload(self, data, queryset):
+        """Cached `data` with the parts too volatile to cache (view counters) brought up to date.
+
+        `queryset` is the one the object would be looked up in, None when the
+        object isn't in it (filtered out or deleted).
+        """
+        return data if queryset.exists() else None
+
+    def cached_payload(self, pk, get_instance, queryset):
+        built = False
+
+        def build():
+            nonlocal built
+            built = True
+            return self.get_serializer(get_instance()).data
+
+        data = get_or_build(self.payload_model, pk, self.payload_variant(), build)
+        if not built:
+            data = self.current_payload(data, queryset.filter(pk=pk))
+            if data is None:
+                raise Http404
+        return data
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.payload_pk()
+        return Response(self.cached_payload(pk, self.get_object, self.filter_queryset(self.get_queryset())))
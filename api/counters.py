@@ -0,0 +1,173 @@
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(request):
+    """Address of the client; X-Forwarded-For is only believed when it was set by a trusted proxy"""
+    ip = request.META.get('REMOTE_ADDR', '')
+    trusted = getattr(settings, 'API_TRUSTED_PROXIES', ())
+    if ip in trusted:
+        # Proxies append the address they received the request from, the client can forge the rest
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        for hop in reversed(hops):
+            ip = hop
+            if hop not in trusted:
+                break
+    return ip
+
+
+def client_key(request):
+    """Stable identifier of the client used for the deduplication window"""
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    ip = client_ip(request)
+    agent = request.META.get('HTTP_USER_AGENT', '')
+    return hashlib.sha1(f'{ip}|{agent}'.encode()).hexdigest()
+
+
+class BatchedCounter:
+    """Buffers increments of an integer column in memory and writes them in batches.
+
+    Hits are only added to a dict on the request path. A daemon thread flushes
+    the buffer every `flush_interval` seconds, or sooner once `flush_threshold`
+    hits are pending, with one `UPDATE ... SET field = field + n` per distinct n.
+    The same client is counted at most once per `dedup_window` seconds.
+    """
+
+    def __init__(self, model, field, flush_interval=None, flush_threshold=None, dedup_window=None, on_flush=None):
+        self.model_label = model
+        self.field = field
+        # Called with the flushed primary keys
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval or getattr(settings, 'API_COUNTER_FLUSH_INTERVAL', 10)
+        self.flush_threshold = flush_threshold or getattr(settings, 'API_COUNTER_FLUSH_THRESHOLD', 100)
+        self.dedup_window = dedup_window if dedup_window is not None else getattr(
+            settings, 'API_COUNTER_DEDUP_WINDOW', 30 * 60)
+        self._buffer = Counter()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def hit(self, pk, client=None):
+        """Count one hit for object `pk`, ignoring repeats from `client` inside the window"""
+        if client and self.dedup_window:
+            key = f'counter:{self.model_label}:{self.field}:{pk}:{client}'
+            if not cache.add(key, 1, timeout=self.dedup_window):
+                return
+        with self._lock:
+            self._buffer[pk] += 1
+            pending = sum(self._buffer.values())
+        self._ensure_flusher()
+        if pending >= self.flush_threshold:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._buffer)
+
+    def flush(self):
+        """Write the buffered hits to the database, returns the number of hits written"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, Counter()
+        if not buffer:
+            return 0
+        model = apps.get_model(self.model_label)
+        by_increment = {}
+        for pk, count in buffer.items():
+            by_increment.setdefault(count, []).append(pk)
+        try:
+            for count, pks in by_increment.items():
+                model.objects.filter(pk__in=pks).update(**{self.field: F(self.field) + count})
+        except Exception:
+            # Put the hits back so they are retried on the next flush
+            with self._lock:
+                self._buffer.update(buffer)
+            logger.exception('Could not flush %s.%s counters', self.model_label, self.field)
+            return 0
+        if self.on_flush is not None:
+            try:
+                self.on_flush(list(buffer))
+            except Exception:
+                # The hits are written, retrying them would count them twice
+                logger.exception('on_flush of %s.%s counters failed', self.model_label, self.field)
+        return sum(buffer.values())
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f'{self.field}-counter-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            # The flusher thread owns its own connection, don't keep it open between batches
+            connections.close_all()
+
+
+def _counters_changed(name):
+    # Counters are part of the ETag'd responses but written with update(), which sends no signal
+    return lambda pks: versioning.bump(name)
+
+
+article_views = BatchedCounter('api.Article', 'views', on_flush=_counters_changed('article_counters'))
+article_downloads = BatchedCounter('api.Article', 'downloads', on_flush=_counters_changed('article_counters'))
+issue_downloads = BatchedCounter('api.Issue', 'downloads', on_flush=_counters_changed('issue_counters'))
+
+COUNTERS = (article_views, article_downloads, issue_downloads)
+
+
+@atexit.register
+def _flush_on_exit():
+    for counter in COUNTERS:
+        counter.flush()
+
+
+# Counter columns shown in the payloads. Cached payloads keep the values they were built with,
+# the current ones are put on top when serving, so a flush never evicts a payload.
+ARTICLE_COUNTERS = ('views', 'downloads')
+ISSUE_COUNTERS = ('downloads',)
+
+
+def _merge(data, values):
+    return {**data, **{name: value for name, value in values.items() if name in data}}
+
+
+def article_counts(data, queryset):
+    """Serialized article with its current counters, None when `queryset` doesn't hold it; one query"""
+    shown = [name for name in ARTICLE_COUNTERS if name in data]
+    values = queryset.order_by().values('pk', *shown).first()
+    return _merge(data, values) if values else None
+
+
+def issue_counts(data, queryset):
+    """Serialized issue, and the articles it embeds, with their current counters; one query"""
+    articles = data.get('articles')
+    nested = bool(articles) and any(name in articles[0] for name in ARTICLE_COUNTERS)
+    columns = ['pk', *ISSUE_COUNTERS, *(f'articles__{name}' for name in ('pk', *ARTICLE_COUNTERS) if nested)]
+    rows = list(queryset.order_by().values(*columns))
+    if not rows:
+        return None
+    data = _merge(data, {name: rows[0][name] for name in ISSUE_COUNTERS})
+    if nested:
+        counts = {row['articles__pk']: {name: row[f'articles__{name}'] for name in ARTICLE_COUNTERS} for row in rows}
+        data['articles'] = [_merge(article, counts.get(article['id'], {})) for article in articles]
+    return data
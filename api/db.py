@@ -0,0 +1,101 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Set by ReplicaRoutingMiddleware for the duration of a read-only request
+_read_only_request = ContextVar('read_only_request', default=False)
+# Set by primary() around reads whose result outlives the request or must see the latest writes
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+@contextmanager
+def primary():
+    """Route the reads made inside the block to 'default'.
+
+    For payloads that get cached (a lagging replica would store old rows
+    under the new version) and for read-after-write within one request.
+    The flag lives in a ContextVar, so it also reaches sync_to_async threads.
+    """
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+class ReplicaRouter:
+    """Sends the reads of GET/HEAD requests to a random replica, everything else to the primary.
+
+    Writes, reads made outside a request (workers, management commands) and
+    reads inside a transaction on the primary and reads inside primary() all
+    stay on 'default', so a request never reads its own writes from a lagging
+    replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if (not replicas or not _read_only_request.get() or _pinned_to_primary.get()
+                or connections['default'].in_atomic_block):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """Marks safe-method requests as read-only for ReplicaRouter, removed at startup without replicas"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_only_request.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only_request.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so the flag reaches the threads running the queries
+        token = _read_only_request.set(request.method in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_only_request.reset(token)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: WAL lets readers work while a writer holds the lock"""
+    if connection.vendor != 'sqlite' or not getattr(settings, 'API_SQLITE_WAL', True):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        # Safe with WAL, only the last transactions may be lost on power failure, never corrupted
+        cursor.execute('PRAGMA synchronous=NORMAL')
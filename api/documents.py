@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Article, ArticleFullText
+from .tasks import enqueue, task
+from .uploads import READ_BLOCK, TARGETS
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+except ImportError:  # Text extraction is optional, sizes and hashes are still recorded
+    PdfReader = None
+    PdfReadError = Exception
+
+logger = logging.getLogger(__name__)
+
+_SOFT_HYPHEN_RE = re.compile(r'\u00ad\s*')
+_HYPHEN_BREAK_RE = re.compile(r'(\w)-\s*\n\s*(\w)')
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\ufffd]')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Uzbek Latin writes o' and g' with any of these, keep one form so searches match
+_APOSTROPHES = str.maketrans({'\u2018': "'", '\u2019': "'", '\u02bb': "'", '\u02bc': "'", '`': "'"})
+
+
+def _max_chars():
+    return getattr(settings, 'API_FULLTEXT_MAX_CHARS', 1_000_000)
+
+
+def normalize_text(text):
+    """NFC text on one line: hyphenated line breaks joined, apostrophes unified, control characters dropped"""
+    text = unicodedata.normalize('NFC', text).translate(_APOSTROPHES)
+    text = _SOFT_HYPHEN_RE.sub('', text)
+    text = _HYPHEN_BREAK_RE.sub(r'\1\2', text)
+    text = _CONTROL_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def file_digest(field_file):
+    """(sha256 hex digest, size in bytes) of a stored file, read one block at a time"""
+    digest = hashlib.sha256()
+    size = 0
+    with field_file.open('rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def extract_text(field_file):
+    """(page count, normalized text) of a PDF; only one page's text is held at a time"""
+    if PdfReader is None:
+        return None, ''
+    max_chars = _max_chars()
+    parts = []
+    length = 0
+    with field_file.open('rb') as f:
+        try:
+            reader = PdfReader(f)
+            page_count = len(reader.pages)
+            for page in reader.pages:
+                if length >= max_chars:
+                    break
+                text = normalize_text(page.extract_text() or '')
+                if text:
+                    parts.append(text)
+                    length += len(text) + 1
+        except PdfReadError:
+            logger.warning('Could not read the PDF %s', field_file.name, exc_info=True)
+            return None, ''
+    return page_count, ' '.join(parts)[:max_chars]
+
+
+@task()
+def extract_file_text(target, pk, force=False):
+    """Record page count, size and text of an Issue/Article PDF, skipped while the content hash is unchanged"""
+    from .cache import schedule_invalidation
+    from .search import schedule_reindex
+    from .versioning import bump
+
+    model, field_name = TARGETS[target]
+    instance = model.objects.filter(pk=pk).only('pk', field_name, 'file_sha256').first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    if field_file:
+        try:
+            digest, size = file_digest(field_file)
+        except FileNotFoundError:
+            logger.warning('%s #%s: file %s not found, text not extracted', target, pk, field_file.name)
+            return
+        if digest == instance.file_sha256 and not force:
+            return
+        page_count, text = extract_text(field_file)
+    else:
+        digest, size, page_count, text = '', None, None, ''
+
+    with transaction.atomic():
+        # A queryset update: saving the instance would queue this job again
+        model.objects.filter(pk=pk).update(page_count=page_count, file_size=size, file_sha256=digest)
+        if model is Article:
+            if text:
+                ArticleFullText.objects.update_or_create(article_id=pk, defaults={'text': text})
+            else:
+                ArticleFullText.objects.filter(article_id=pk).delete()
+            schedule_reindex([pk])
+            schedule_invalidation(articles=[pk])
+        else:
+            schedule_invalidation(issues=[pk])
+        bump(model._meta.model_name)
+
+
+def schedule_extraction(target, pk, force=False):
+    enqueue(extract_file_text, target=target, pk=pk, force=force)
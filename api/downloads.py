@@ -0,0 +1,156 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.encoding import escape_uri_path
+from django.utils.http import parse_http_date_safe
+from rest_framework.renderers import BaseRenderer
+
+from .renderers import FastJSONRenderer
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileDownloadRenderer(BaseRenderer):
+    """Accepts any Accept header for file downloads, error payloads are still rendered as JSON"""
+    media_type = '*/*'
+    format = None
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Files are returned as plain responses, only error payloads get here: label them as JSON, not */*
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = FastJSONRenderer.media_type
+        return FastJSONRenderer().render(data, FastJSONRenderer.media_type, renderer_context)
+
+
+class RangeReader:
+    """Read-only view of `length` bytes of a file starting at `start`"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) of a single `bytes=` range, None to serve the whole file, ValueError if unsatisfiable"""
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        # Absent, malformed or multi-range headers get the full file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def if_range_matches(value, etag=None, last_modified=None):
+    """Whether an If-Range validator (an ETag or an HTTP date) still identifies the served file"""
+    value = value.strip()
+    if value.startswith(('"', 'W/')):
+        # Only strong ETags may be used with If-Range
+        return etag is not None and value == etag
+    timestamp = parse_http_date_safe(value)
+    return timestamp is not None and timestamp == last_modified
+
+
+def _content_disposition(filename, attachment):
+    kind = 'attachment' if attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{kind}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=utf-8''{escape_uri_path(filename)}"
+
+
+def serve_file(request, field_file, attachment=False, etag=None, last_modified=None, on_download=None):
+    """Stream a FileField with HTTP Range support, or hand it to the web server.
+
+    API_FILE_OFFLOAD selects the mode: None streams from Python,
+    'x-accel-redirect' (nginx) and 'x-sendfile' (Apache/lighttpd) only send a
+    header and let the server push the bytes. `on_download` is called once per
+    download: for the full file or for the range that starts at byte 0,
+    never for HEAD.
+    `etag` and `last_modified` (a timestamp) are the validators If-Range is
+    checked against.
+    """
+    if request.method == 'HEAD':
+        # Link checkers and download managers probing the size don't download anything
+        on_download = None
+    if not field_file:
+        raise Http404('Fayl biriktirilmagan')
+    filename = os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    range_header = request.META.get('HTTP_RANGE', '')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and not if_range_matches(if_range, etag, last_modified):
+        # The client's partial copy is outdated, send the whole file again
+        range_header = ''
+
+    offload = getattr(settings, 'API_FILE_OFFLOAD', None)
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            location = getattr(settings, 'API_FILE_OFFLOAD_LOCATION', '/protected-media/')
+            response['X-Accel-Redirect'] = escape_uri_path(location + field_file.name)
+        elif offload == 'x-sendfile':
+            response['X-Sendfile'] = field_file.path
+        else:
+            raise ValueError(f'Unknown API_FILE_OFFLOAD mode: {offload}')
+        response['Content-Disposition'] = _content_disposition(filename, attachment)
+        # The web server handles Range itself, count the requests that start at the beginning
+        if on_download and (not range_header or range_header.strip().startswith('bytes=0-')):
+            on_download()
+        return response
+
+    try:
+        size = field_file.size
+    except FileNotFoundError:
+        raise Http404('Fayl topilmadi')
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = field_file.open('rb')
+    if byte_range is None:
+        response = FileResponse(RangeReader(file, 0, size), content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeReader(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = _content_disposition(filename, attachment)
+    if on_download and (byte_range is None or byte_range[0] == 0):
+        on_download()
+    return response
@@ -0,0 +1,170 @@
+import json
+import re
+import uuid
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Issue
+
+CROSSREF_SCHEMA = '5.3.1'
+# Preferred language of the single title Crossref accepts
+TITLE_LANGUAGES = ('en', 'uz', 'ru')
+
+_PAGES_RE = re.compile(r'^\s*(\w+)\s*[-–]\s*(\w+)\s*$')
+
+
+def _chunk_size():
+    return getattr(settings, 'API_EXPORT_CHUNK_SIZE', 20)
+
+
+def catalogue(chunk_size=None):
+    """Every issue with its articles, fetched in chunks: the prefetches run once per chunk of issues"""
+    return Issue.objects.select_related('journal').prefetch_related(
+        'articles__authors', 'articles__keywords', 'articles__translations',
+    ).order_by('pk').iterator(chunk_size=chunk_size or _chunk_size())
+
+
+def _file_url(field_file, base_url):
+    if not field_file:
+        return None
+    return urljoin(base_url, field_file.url) if base_url else field_file.url
+
+
+def article_url(article, base_url=''):
+    """Public landing page of an article, API_ARTICLE_URL is a template like https://site/articles/{id}"""
+    template = getattr(settings, 'API_ARTICLE_URL', '')
+    if template:
+        return template.format(id=article.pk)
+    return urljoin(base_url, f'/api/articles/{article.pk}/')
+
+
+def issue_record(issue, base_url=''):
+    return {
+        'type': 'issue',
+        'id': issue.pk,
+        'journal': issue.journal.short_name,
+        'journal_name': issue.journal.name,
+        'journal_type': issue.journal_type,
+        'title': issue.title,
+        'published_date': issue.published_date,
+        'is_current': issue.is_current,
+        'cover_image': _file_url(issue.cover_image, base_url),
+        'pdf_file': _file_url(issue.pdf_file, base_url),
+        'page_count': issue.page_count,
+        'file_size': issue.file_size,
+    }
+
+
+def article_record(article, base_url=''):
+    return {
+        'type': 'article',
+        'id': article.pk,
+        'issue': article.issue_id,
+        'doi': article.doi,
+        'pages': article.pages,
+        'url': article_url(article, base_url),
+        'article_file': _file_url(article.article_file, base_url),
+        'page_count': article.page_count,
+        'file_size': article.file_size,
+        'authors': [
+            {'last_name': a.last_name, 'first_name': a.first_name, 'patronymic': a.patronymic,
+             'orcid_id': a.orcid_id, 'organization': a.organization}
+            for a in article.authors.all()
+        ],
+        'keywords': [k.name for k in article.keywords.all()],
+        'translations': {t.language: {'title': t.title, 'abstract': t.abstract} for t in article.translations.all()},
+        'references': article.references,
+    }
+
+
+def ndjson(issues, base_url=''):
+    """One JSON line per issue, each followed by the lines of its articles"""
+    for issue in issues:
+        yield json.dumps(issue_record(issue, base_url), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        for article in issue.articles.all():
+            yield json.dumps(article_record(article, base_url), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _date(value):
+    return (f'<publication_date media_type="online"><month>{value.month:02d}</month><day>{value.day:02d}</day>'
+            f'<year>{value.year}</year></publication_date>')
+
+
+def _crossref_article(article, issue, base_url):
+    translations = {t.language: t for t in article.translations.all()}
+    language = next((code for code in TITLE_LANGUAGES if code in translations), None)
+    parts = [f'<journal_article publication_type="full_text"{f" language={quoteattr(language)}" if language else ""}>']
+    if language:
+        parts.append(f'<titles><title>{escape(translations[language].title)}</title></titles>')
+
+    authors = list(article.authors.all())
+    if authors:
+        parts.append('<contributors>')
+        for index, author in enumerate(authors):
+            sequence = 'first' if index == 0 else 'additional'
+            parts.append(f'<person_name sequence="{sequence}" contributor_role="author">')
+            given_name = ' '.join(filter(None, [author.first_name, author.patronymic]))
+            if given_name:
+                parts.append(f'<given_name>{escape(given_name)}</given_name>')
+            parts.append(f'<surname>{escape(author.last_name)}</surname>')
+            if author.orcid_id:
+                parts.append(f'<ORCID>https://orcid.org/{escape(author.orcid_id)}</ORCID>')
+            parts.append('</person_name>')
+        parts.append('</contributors>')
+
+    for code, translation in translations.items():
+        if translation.abstract:
+            parts.append(f'<jats:abstract xml:lang={quoteattr(code)}><jats:p>{escape(translation.abstract)}'
+                         f'</jats:p></jats:abstract>')
+    parts.append(_date(issue.published_date))
+    pages = _PAGES_RE.match(article.pages or '')
+    if pages:
+        parts.append(f'<pages><first_page>{escape(pages[1])}</first_page>'
+                     f'<last_page>{escape(pages[2])}</last_page></pages>')
+    parts.append(f'<doi_data><doi>{escape(article.doi.strip())}</doi>'
+                 f'<resource>{escape(article_url(article, base_url))}</resource></doi_data>')
+    parts.append('</journal_article>\n')
+    return ''.join(parts)
+
+
+def crossref_xml(issues, base_url=''):
+    """Crossref deposit (schema 5.3.1, JATS abstracts) of every article that has a DOI, written issue by issue"""
+    depositor = escape(getattr(settings, 'API_CROSSREF_DEPOSITOR_NAME', ''))
+    email = escape(getattr(settings, 'API_CROSSREF_DEPOSITOR_EMAIL', ''))
+    registrant = escape(getattr(settings, 'API_CROSSREF_REGISTRANT', ''))
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<doi_batch version="{CROSSREF_SCHEMA}" xmlns="http://www.crossref.org/schema/{CROSSREF_SCHEMA}"'
+        ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:jats="http://www.ncbi.nlm.nih.gov/JATS1"'
+        f' xsi:schemaLocation="http://www.crossref.org/schema/{CROSSREF_SCHEMA}'
+        f' https://www.crossref.org/schemas/crossref{CROSSREF_SCHEMA}.xsd">\n'
+        f'<head><doi_batch_id>{uuid.uuid4().hex}</doi_batch_id>'
+        f'<timestamp>{timezone.now():%Y%m%d%H%M%S}</timestamp>'
+        f'<depositor><depositor_name>{depositor}</depositor_name><email_address>{email}</email_address></depositor>'
+        f'<registrant>{registrant}</registrant></head>\n<body>\n'
+    )
+    for issue in issues:
+        # Crossref only takes articles that have a DOI
+        articles = [article for article in issue.articles.all() if article.doi.strip()]
+        if not articles:
+            continue
+        yield (
+            f'<journal><journal_metadata><full_title>{escape(issue.journal.name)}</full_title>'
+            f'<abbrev_title>{escape(issue.journal.short_name)}</abbrev_title></journal_metadata>'
+            f'<journal_issue>{_date(issue.published_date)}<issue>{escape(issue.title)}</issue></journal_issue>\n'
+        )
+        for article in articles:
+            yield _crossref_article(article, issue, base_url)
+        yield '</journal>\n'
+    yield '</body>\n</doi_batch>\n'
+
+
+# name -> (writer, content type, file extension)
+FORMATS = {
+    'ndjson': (ndjson, 'application/x-ndjson', 'ndjson'),
+    'crossref': (crossref_xml, 'application/xml', 'xml'),
+}
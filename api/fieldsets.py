@@ -0,0 +1,208 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def parse_fieldset(value):
+    """'id,authors.last_name' -> {'id': {}, 'authors': {'last_name': {}}}"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def requested_fieldset(request):
+    """(fields, omit) trees of a GET request, None when it asks for the full representation"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    include = parse_fieldset(params.get('fields')) or None
+    exclude = parse_fieldset(params.get('omit')) or None
+    if include is None and exclude is None:
+        return None
+    return include, exclude
+
+
+def _serializer_of(field):
+    target = field.child if isinstance(field, serializers.ListSerializer) else field
+    return target if isinstance(target, serializers.BaseSerializer) else None
+
+
+def rendered_fields(serializer):
+    """Canonical 'authors(id,last_name),id,title' of the fields `serializer` renders"""
+    names = []
+    for name, field in sorted(serializer.fields.items()):
+        if field.write_only:
+            continue
+        nested = _serializer_of(field)
+        names.append(f'{name}({rendered_fields(nested)})' if nested is not None else name)
+    return ','.join(names)
+
+
+class SparseFieldsMixin:
+    """Sparse fieldsets for GET: ?fields=id,title keeps only those fields, ?omit=references drops them.
+
+    Dotted names (authors.last_name) reach nested serializers, `id` is
+    always kept. Writes are never pruned, so they validate every field.
+    A `sparse_fields: False` context entry turns the query parameters off.
+    `sparse_aliases` maps output names to the fields producing them and
+    `sparse_sources` the fields that are not plain model attributes
+    (method fields, annotations) to the model fields they read.
+    """
+    sparse_aliases = {}
+    sparse_sources = {}
+
+    def _sparse_spec(self):
+        if hasattr(self, '_sparse'):
+            return self._sparse
+        if not self.context.get('sparse_fields', True):
+            return None
+        parent = self.parent
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            return requested_fieldset(self.context.get('request'))
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self._sparse_spec()
+        if spec is None:
+            return fields
+        include, exclude = spec
+        output_names = {field_name: output for output, field_name in self.sparse_aliases.items()}
+        for name, field in list(fields.items()):
+            if field.write_only or name == 'id':
+                continue
+            output = output_names.get(name, name)
+            if (include is not None and output not in include) or (exclude is not None and exclude.get(output) == {}):
+                del fields[name]
+                continue
+            nested = _serializer_of(field)
+            nested_include = include.get(output) if include else None
+            nested_exclude = exclude.get(output) if exclude else None
+            if isinstance(nested, SparseFieldsMixin) and (nested_include or nested_exclude):
+                nested._sparse = (nested_include or None, nested_exclude or None)
+        return fields
+
+    def sparse_attributes(self):
+        """Model attributes read by the kept fields, None when some field can't tell"""
+        model = self.Meta.model
+        attributes = set()
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in self.sparse_sources:
+                attributes.update(source.split('__')[0] for source in self.sparse_sources[name])
+                continue
+            if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                return None
+            try:
+                model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            attributes.add(field.source_attrs[0])
+        return attributes
+
+
+def _needs_lookup(serializer, parts):
+    """Whether a kept field of `serializer` renders the relation path `parts` of a prefetch lookup"""
+    sources = getattr(serializer, 'sparse_sources', {})
+    for name, field in serializer.fields.items():
+        if name in sources and any(source.split('__')[0] == parts[0] for source in sources[name]):
+            return True
+        if field.write_only or field.source == '*' or field.source_attrs[:1] != parts[:1]:
+            continue
+        nested = _serializer_of(field)
+        if len(parts) == 1 or nested is None or _needs_lookup(nested, parts[1:]):
+            return True
+    return False
+
+
+def _rendering_serializer(serializer, name):
+    """Nested serializer rendering relation `name` of the model of `serializer`, if any"""
+    for field in serializer.fields.values():
+        if not field.write_only and field.source != '*' and field.source_attrs[:1] == [name]:
+            nested = _serializer_of(field)
+            if nested is not None:
+                return nested
+    return None
+
+
+def _columns(model, attributes, keep=()):
+    columns = {model._meta.pk.name, *keep}
+    for name in attributes:
+        field = model._meta.get_field(name)
+        if field.concrete and not field.many_to_many:
+            columns.add(name)
+    return columns
+
+
+def _pruned_prefetches(serializer, lookups):
+    """`lookups` where every level rendered by a pruned nested serializer only loads the columns it reads"""
+    prefetches, seen = [], set()
+    for lookup in lookups:
+        if not isinstance(lookup, str):
+            prefetches.append(lookup)
+            continue
+        current, model = serializer, serializer.Meta.model
+        parts = lookup.split('__')
+        for depth, part in enumerate(parts, 1):
+            relation = model._meta.get_field(part)
+            model = relation.related_model
+            current = _rendering_serializer(current, part) if current is not None else None
+            path = '__'.join(parts[:depth])
+            if path in seen:
+                continue
+            seen.add(path)
+            attributes = current.sparse_attributes() if isinstance(current, SparseFieldsMixin) else None
+            if attributes is not None and current._sparse_spec() is not None:
+                # Reverse foreign keys are matched to their parent through the foreign key column
+                keep = [relation.field.name] if relation.one_to_many else []
+                prefetches.append(Prefetch(path, queryset=model._default_manager.only(
+                    *_columns(model, attributes, keep))))
+            elif depth == len(parts):
+                prefetches.append(path)
+    return prefetches
+
+
+def prune_queryset(queryset, serializer, keep=()):
+    """Drop the prefetches, joins and columns the pruned `serializer` doesn't render.
+
+    `keep` lists columns needed besides the serializer's, such as the
+    pagination ordering.
+    """
+    if not isinstance(serializer, SparseFieldsMixin) or serializer._sparse_spec() is None:
+        return queryset
+
+    lookups = queryset._prefetch_related_lookups
+    wanted = [lookup for lookup in lookups
+              if _needs_lookup(serializer, getattr(lookup, 'prefetch_through', lookup).split('__'))]
+    queryset = queryset.prefetch_related(None).prefetch_related(*_pruned_prefetches(serializer, wanted))
+
+    attributes = serializer.sparse_attributes()
+    if attributes is None:
+        return queryset
+    if isinstance(queryset.query.select_related, dict):
+        joins = [name for name in queryset.query.select_related if name in attributes]
+        queryset = queryset.select_related(None)
+        if joins:
+            # select_related() without names would follow every relation
+            queryset = queryset.select_related(*joins)
+    return queryset.only(*_columns(queryset.model, attributes, keep))
+
+
+class SparseQuerysetMixin:
+    """Prunes list/retrieve querysets to the fields asked for with ?fields= / ?omit="""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        ordering = getattr(self.pagination_class, 'ordering', ()) if self.action == 'list' else ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return prune_queryset(queryset, self.get_serializer(), keep=[name.lstrip('-') for name in ordering])
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import EditorialBoardMember, Issue, News, RecentIssueLink
+from .serializers import (
+    EditorialBoardMemberSerializer, IssueSummarySerializer, NewsSerializer, RecentIssueLinkSerializer
+)
+
+# ContentVersion names the homepage is built from, its ETag changes with any of them.
+# The download counters are left out: they would rebuild the page on every download.
+CONDITIONAL_MODELS = ('issue', 'journal', 'article', 'news', 'editorialboardmember', 'recentissuelink')
+
+
+def news_count():
+    return getattr(settings, 'API_HOME_NEWS_COUNT', 5)
+
+
+def build(request, journal_code=None):
+    """Every homepage section, with one query per table.
+
+    Current issues, the issues the recent-issue links point to and the
+    latest issue are fetched together as summaries; the links embed theirs.
+    """
+    # The request only provides absolute URLs: the sections keep their shape whatever ?fields= says
+    context = {'request': request, 'sparse_fields': False}
+    links = list(RecentIssueLink.objects.order_by('order', 'id'))
+    latest = Issue.objects.order_by('-published_date', '-id').values('pk')[:1]
+    issues = {
+        issue.pk: issue for issue in Issue.objects.select_related('journal').annotate(
+            articles_count=Count('articles')
+        ).filter(
+            Q(is_current=True) | Q(pk__in=[link.link_to_issue_id for link in links if link.link_to_issue_id])
+            | Q(pk__in=latest)
+        ).order_by('-published_date', '-id')
+    }
+    summaries = dict(zip(issues, IssueSummarySerializer(issues.values(), many=True, context=context).data))
+
+    news = News.objects.order_by('-created_at', '-id')[:news_count()]
+    board = EditorialBoardMember.objects.select_related('journal').order_by('order', 'id')
+    if journal_code:
+        board = board.filter(journal__short_name=journal_code)
+
+    # The issues are ordered newest first, so the latest one is the first of them
+    latest_issue = next(iter(issues.values()), None)
+    return {
+        'current_issues': [summaries[pk] for pk, issue in issues.items() if issue.is_current],
+        'recent_issues': [
+            {**data, 'issue': summaries.get(link.link_to_issue_id)}
+            for link, data in zip(links, RecentIssueLinkSerializer(links, many=True, context=context).data)
+        ],
+        'latest_year': {
+            'year': latest_issue.published_date.year,
+            'title': latest_issue.title,
+            'journal_type': latest_issue.journal_type,
+        } if latest_issue else None,
+        'news': NewsSerializer(news, many=True, context=context).data,
+        'board_members': EditorialBoardMemberSerializer(board, many=True, context=context).data,
+    }
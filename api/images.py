@@ -0,0 +1,139 @@
+import os
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from .tasks import enqueue, task
+
+# Variant name -> longest side in pixels. Images are never upscaled.
+VARIANTS = {
+    'thumb': 300,
+    'medium': 800,
+    'large': 1600,
+}
+
+# Pillow format used to re-encode the "original" rendition
+_ORIGINAL_FORMATS = {
+    '.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.gif': 'GIF', '.webp': 'WEBP',
+}
+
+
+def variant_name(name, variant, ext):
+    """covers/x.png -> variants/covers/x.png_thumb.webp, x.jpg next to it keeps its own renditions"""
+    directory, filename = posixpath.split(name)
+    return posixpath.join('variants', directory, f'{filename}_{variant}.{ext}')
+
+
+def variant_formats(name):
+    """(extension, Pillow format) pairs produced for an image: WebP plus the original format"""
+    ext = os.path.splitext(name)[1].lower()
+    formats = [('webp', 'WEBP')]
+    original = _ORIGINAL_FORMATS.get(ext, 'JPEG')
+    if original != 'WEBP':
+        formats.append((ext.lstrip('.') if ext in _ORIGINAL_FORMATS else 'jpg', original))
+    return formats
+
+
+def last_rendition(name):
+    """Rendition written last, so its presence means the whole set exists"""
+    last_variant = list(VARIANTS)[-1]
+    ext = variant_formats(name)[-1][0]
+    return variant_name(name, last_variant, ext)
+
+
+def marker_field(field_name):
+    """Model column holding the name of the image the stored renditions belong to"""
+    return f'{field_name}_variants_of'
+
+
+def has_variants(field_file):
+    """Whether the renditions of this very file exist, read from the model, no storage round trip"""
+    return bool(field_file) and getattr(field_file.instance, marker_field(field_file.field.name), '') == field_file.name
+
+
+def variant_urls(field_file):
+    """{variant: {ext: url}} for an image whose renditions exist, None otherwise"""
+    if not field_file or not has_variants(field_file):
+        return None
+    storage = field_file.storage
+    return {
+        variant: {ext: storage.url(variant_name(field_file.name, variant, ext))
+                  for ext, _ in variant_formats(field_file.name)}
+        for variant in VARIANTS
+    }
+
+
+def _encode(image, pil_format):
+    buffer = BytesIO()
+    if pil_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    elif pil_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    elif pil_format == 'PNG':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, pil_format)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """Write every resized and re-encoded rendition of an uploaded image"""
+    from PIL import Image, ImageOps
+
+    storage = field_file.storage
+    with field_file.open('rb') as f:
+        source = Image.open(f)
+        source.load()
+    # Respect camera orientation, then drop the EXIF block from the renditions
+    source = ImageOps.exif_transpose(source)
+    if source.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+    for variant, size in VARIANTS.items():
+        image = source.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        for ext, pil_format in variant_formats(field_file.name):
+            name = variant_name(field_file.name, variant, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(_encode(image, pil_format)))
+
+
+def delete_variants(storage, name):
+    for variant in VARIANTS:
+        for ext, _ in variant_formats(name):
+            # Storages ignore missing files, no need to check first
+            storage.delete(variant_name(name, variant, ext))
+
+
+@task()
+def generate_image_variants(model_label, pk, field_name):
+    from .cache import invalidate
+    from .versioning import bump
+
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    field_file = getattr(instance, field_name, None) if instance else None
+    if field_file and not has_variants(field_file):
+        generate_variants(field_file)
+        # Only if the image wasn't replaced meanwhile; update() as a save would queue the job again
+        model.objects.filter(pk=pk, **{field_name: field_file.name}).update(
+            **{marker_field(field_name): field_file.name})
+        # The payloads now carry the variant URLs: new ETag, drop the cached serialization
+        bump(model._meta.model_name)
+        invalidate(model._meta.model_name, [pk])
+
+
+def schedule_variants(instance, field_name):
+    """Queue the renditions of an image as a background job"""
+    field_file = getattr(instance, field_name)
+    if not field_file or not field_file.storage.exists(field_file.name):
+        # Nothing to resize, a job would only fail its attempts
+        return
+    key = f'image-variants-queued:{instance._meta.label}:{instance.pk}:{field_name}:{field_file.name}'
+    # Repeated saves of the record (admin edits) queue the same image once, a replaced one again
+    if cache.add(key, 1, timeout=10 * 60):
+        enqueue(generate_image_variants, model_label=instance._meta.label, pk=instance.pk, field_name=field_name)
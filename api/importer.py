@@ -0,0 +1,139 @@
+import csv
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from .documents import schedule_extraction
+from .models import Issue, Author, Keyword, Article, ArticleTranslation, first_page
+from .signals import articles_touched
+from . import versioning
+
+LANGUAGES = [code for code, _ in ArticleTranslation.LANGUAGE_CHOICES]
+
+
+@dataclass
+class ImportResult:
+    issue: Issue
+    articles: int
+    authors_created: int
+    keywords_created: int
+
+
+def _author_key(data):
+    # ORCID identifies a person; without it the full name is the best we have
+    if data['orcid_id'].strip():
+        return 'orcid', data['orcid_id'].strip().upper()
+    return 'name', data['last_name'].strip(), data['first_name'].strip(), data['patronymic'].strip()
+
+
+def resolve_authors(author_data):
+    """{author key: Author} for every author of the manifest, creating the missing ones with one INSERT"""
+    wanted = {}
+    for data in author_data:
+        wanted.setdefault(_author_key(data), data)
+    orcids = [key[1] for key in wanted if key[0] == 'orcid']
+    last_names = [key[1] for key in wanted if key[0] == 'name']
+
+    found = {}
+    for author in Author.objects.filter(orcid_id__in=orcids):
+        found[('orcid', author.orcid_id.upper())] = author
+    for author in Author.objects.filter(orcid_id='', last_name__in=last_names):
+        found.setdefault(('name', author.last_name, author.first_name, author.patronymic), author)
+
+    missing = {key: data for key, data in wanted.items() if key not in found}
+    created = Author.objects.bulk_create([
+        Author(**{field: value.strip() for field, value in data.items()}) for data in missing.values()
+    ])
+    found.update(zip(missing, created))
+    return found, len(created)
+
+
+def resolve_keywords(names):
+    """{name: Keyword}, creating the missing ones with one INSERT"""
+    names = {name.strip() for name in names if name.strip()}
+    found = Keyword.objects.in_bulk(names, field_name='name')
+    missing = [Keyword(name=name) for name in names if name not in found]
+    if missing:
+        # A concurrent import may have added the same keyword meanwhile
+        Keyword.objects.bulk_create(missing, ignore_conflicts=True)
+        found = Keyword.objects.in_bulk(names, field_name='name')
+    return found, len(missing)
+
+
+def import_issue(data):
+    """Create an issue and all its articles from a validated IssueImportSerializer manifest.
+
+    Everything is written in one transaction with a fixed number of bulk
+    INSERTs, however many articles the issue has.
+    """
+    articles_data = data['articles']
+    with transaction.atomic():
+        issue = Issue(
+            journal=data['journal'], journal_type=data.get('journal_type') or data['journal'].short_name,
+            title=data['title'], published_date=data['published_date'], is_current=data['is_current'],
+            cover_image=data['cover_image'], pdf_file=data['pdf_file'],
+        )
+        issue.save()
+
+        authors, authors_created = resolve_authors(a for article in articles_data for a in article['authors'])
+        keywords, keywords_created = resolve_keywords(k for article in articles_data for k in article['keywords'])
+
+        articles = Article.objects.bulk_create([
+            Article(issue=issue, pages=a['pages'], start_page=first_page(a['pages']), doi=a['doi'],
+                    references=a['references'], article_file=a['article_file'] or None)
+            for a in articles_data
+        ])
+        translations, article_authors, article_keywords = [], [], []
+        for article, article_data in zip(articles, articles_data):
+            translations += [ArticleTranslation(article=article, **t) for t in article_data['translations']]
+            author_ids = dict.fromkeys(authors[_author_key(a)].pk for a in article_data['authors'])
+            article_authors += [Article.authors.through(article=article, author_id=pk) for pk in author_ids]
+            keyword_ids = dict.fromkeys(keywords[k.strip()].pk for k in article_data['keywords'] if k.strip())
+            article_keywords += [Article.keywords.through(article=article, keyword_id=pk) for pk in keyword_ids]
+        ArticleTranslation.objects.bulk_create(translations)
+        Article.authors.through.objects.bulk_create(article_authors)
+        Article.keywords.through.objects.bulk_create(article_keywords)
+
+        # bulk_create sends no signals: do their work once for the whole issue
+        for name in ('article', 'articletranslation', 'author', 'keyword'):
+            versioning.bump(name)
+        articles_touched([article.pk for article in articles], [issue.pk])
+        for article in articles:
+            if article.article_file:
+                schedule_extraction('article', article.pk)
+
+    return ImportResult(issue, len(articles), authors_created, keywords_created)
+
+
+def _split(value, separator):
+    return [part.strip() for part in (value or '').split(separator) if part.strip()]
+
+
+def read_csv(file):
+    """Article dicts of the manifest from a CSV file with one article per row.
+
+    Columns: pages, doi, references, article_file, keywords (separated by ";"),
+    authors (separated by ";", each "Familiya|Ism|Otasining ismi|ORCID|Tashkilot")
+    and title_<lang>/abstract_<lang> for uz, ru and en.
+    """
+    articles = []
+    for row in csv.DictReader(file):
+        authors = []
+        for author in _split(row.get('authors'), ';'):
+            parts = [part.strip() for part in author.split('|')] + [''] * 5
+            authors.append({'last_name': parts[0], 'first_name': parts[1], 'patronymic': parts[2],
+                            'orcid_id': parts[3], 'organization': parts[4]})
+        articles.append({
+            'pages': row.get('pages', ''),
+            'doi': row.get('doi', ''),
+            'references': row.get('references', ''),
+            'article_file': row.get('article_file', ''),
+            'keywords': _split(row.get('keywords'), ';'),
+            'authors': authors,
+            'translations': [
+                {'language': language, 'title': row[f'title_{language}'],
+                 'abstract': row.get(f'abstract_{language}', '')}
+                for language in LANGUAGES if row.get(f'title_{language}')
+            ],
+        })
+    return articles
@@ -0,0 +1,80 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import ContactMessage, ContactMessageFile
+from .tasks import delete_stored_files, enqueue
+
+SEARCH_FIELDS = ('name', 'email', 'subject', 'message')
+
+TRUE_VALUES = ('true', '1', 'yes', 'ha')
+FALSE_VALUES = ('false', '0', 'no', "yo'q")
+
+
+def _bound(param, value):
+    """(aware datetime, whether `value` was a bare date) of an ISO date or datetime query parameter"""
+    try:
+        day = parse_date(value)
+        moment = datetime.datetime.combine(day, datetime.time()) if day else parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: ["Sana YYYY-MM-DD yoki ISO 8601 formatida bo'lishi kerak"]})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, day is not None
+
+
+def filter_messages(queryset, params):
+    """Inbox filters: ?is_read=, ?created_after= / ?created_before= (dates or datetimes) and ?q= search"""
+    is_read = params.get('is_read')
+    if is_read is not None:
+        value = is_read.strip().lower()
+        if value not in TRUE_VALUES + FALSE_VALUES:
+            choices = ', '.join(TRUE_VALUES + FALSE_VALUES)
+            raise ValidationError({'is_read': [f"Qiymat quyidagilardan biri bo'lishi kerak: {choices}"]})
+        queryset = queryset.filter(is_read=value in TRUE_VALUES)
+
+    created_after = params.get('created_after')
+    if created_after:
+        queryset = queryset.filter(created_at__gte=_bound('created_after', created_after)[0])
+    created_before = params.get('created_before')
+    if created_before:
+        moment, whole_day = _bound('created_before', created_before)
+        if whole_day:
+            # A bare date includes that day: up to the next midnight, still a plain range on the index
+            queryset = queryset.filter(created_at__lt=moment + datetime.timedelta(days=1))
+        else:
+            queryset = queryset.filter(created_at__lte=moment)
+
+    query = params.get('q', '').strip()
+    if query:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def mark_read(ids, is_read=True):
+    """Set is_read on the given messages with one UPDATE, returns how many changed"""
+    return ContactMessage.objects.filter(pk__in=ids).exclude(is_read=is_read).update(is_read=is_read)
+
+
+def delete_messages(ids):
+    """Delete the messages and their attachment rows, one DELETE per table.
+
+    The stored files are removed afterwards by a background job queued in the
+    same transaction, so a rollback keeps them.
+    """
+    with transaction.atomic():
+        names = [name for name in ContactMessageFile.objects.filter(message_id__in=ids).values_list(
+            'file', flat=True) if name]
+        deleted = ContactMessage.objects.filter(pk__in=ids).delete()[1].get(ContactMessage._meta.label, 0)
+        if names:
+            enqueue(delete_stored_files, names=names)
+    return deleted
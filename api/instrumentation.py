@@ -0,0 +1,102 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('api.timing')
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestTimingMiddleware:
+    """Per-request timing of API views, enabled with API_REQUEST_TIMING = True.
+
+    Records query count, DB time, view time (handler and serialization, DB
+    time excluded), render time and response size for every DRF view action.
+    The numbers go to the `api.timing` logger and to a `Server-Timing` header.
+    When disabled the middleware removes itself from the chain at startup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request._timing = {'start': time.perf_counter(), 'action': None}
+        with ExitStack() as stack:
+            # Replicas included, see api/db.py
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        timing = request._timing
+        if timing['action'] is None:
+            return response
+
+        end = time.perf_counter()
+        view_end = timing.get('view_end', end)
+        render_end = timing.get('render_end', end)
+        view_start = timing.get('view_start', timing['start'])
+        db_ms = timer.duration * 1000
+        view_ms = max((view_end - view_start) * 1000 - db_ms, 0.0)
+        render_ms = (render_end - view_end) * 1000
+        total_ms = (end - timing['start']) * 1000
+        size = len(response.content) if not response.streaming else None
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.2f};desc="{timer.count} queries"',
+            f'view;dur={view_ms:.2f}',
+            f'render;dur={render_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ])
+        logger.info(
+            '%s %s action=%s status=%s queries=%d db_ms=%.2f view_ms=%.2f render_ms=%.2f total_ms=%.2f bytes=%s',
+            request.method, request.path, timing['action'], response.status_code, timer.count, db_ms, view_ms,
+            render_ms, total_ms, size,
+            extra={
+                'action': timing['action'], 'queries': timer.count, 'db_ms': db_ms, 'view_ms': view_ms,
+                'render_ms': render_ms, 'total_ms': total_ms, 'response_bytes': size,
+            },
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        cls = getattr(view_func, 'cls', None)
+        if cls is None:
+            return None
+        # ViewSets expose {http method: action name}, plain APIViews only the class
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        request._timing['action'] = f'{cls.__name__}.{action}'
+        request._timing['view_start'] = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook, which splits view time from render time
+        request._timing['view_end'] = time.perf_counter()
+        response.add_post_render_callback(self._rendered(request))
+        return response
+
+    @staticmethod
+    def _rendered(request):
+        def callback(response):
+            request._timing['render_end'] = time.perf_counter()
+        return callback
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+from api.models import Issue
+
+
+class Command(BaseCommand):
+    help = ("Asosiy endpointlarning tezligini o'lchaydi: kechikish persentillari, so'rovlar soni, xotira. "
+            "--seed bo'sh bazani sinov ma'lumotlari bilan to'ldiradi")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Avval bazani sinov ma'lumotlari bilan to'ldirish")
+        parser.add_argument('--journals', type=int, default=2)
+        parser.add_argument('--years', type=int, default=10)
+        parser.add_argument('--issues-per-year', type=int, default=6)
+        parser.add_argument('--articles-per-issue', type=int, default=40)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--cold', action='store_true', help="Har so'rovdan oldin keshni tozalash")
+        parser.add_argument('--endpoint', action='append', help="Faqat shu endpoint(lar)ni o'lchash")
+        parser.add_argument('--output', help="Natijani JSON faylga yozish")
+        parser.add_argument('--compare', help="Avvalgi natija (JSON) bilan solishtirish")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            if Issue.objects.exists():
+                raise CommandError("Baza bo'sh emas: sinov ma'lumotlari faqat bo'sh bazaga yoziladi "
+                                   "(masalan, DB_NAME=/tmp/bench.sqlite3 bilan)")
+            counts = benchmark.seed(journals=options['journals'], years=options['years'],
+                                    issues_per_year=options['issues_per_year'],
+                                    articles_per_issue=options['articles_per_issue'])
+            self.stdout.write(self.style.SUCCESS(
+                ', '.join(f'{value} {name}' for name, value in counts.items())))
+
+        result = benchmark.run(iterations=options['iterations'], warmup=options['warmup'], cold=options['cold'],
+                               only=options['endpoint'])
+        self.stdout.write(f"{'endpoint':<26}{'p50':>9}{'p90':>9}{'p99':>9}{'queries':>9}{'peak KiB':>10}")
+        for name, values in result['endpoints'].items():
+            self.stdout.write(f"{name:<26}{values['p50_ms']:>9.2f}{values['p90_ms']:>9.2f}{values['p99_ms']:>9.2f}"
+                              f"{values['queries']:>9}{values['peak_kib']:>10}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                base = json.load(f)
+            self.stdout.write(f"\n{base['meta'].get('commit')} -> {result['meta'].get('commit')}")
+            for name, metric, old, new, change in benchmark.compare(base, result):
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(f'{name:<26}{metric:<10}{old:>10}{new:>10}{change:>+8.1f}%'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.images import generate_image_variants, has_variants, marker_field, schedule_variants
+from api.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Rasm nusxalari (thumb/medium/large) hali yaratilmagan muqova va yangilik rasmlarini navbatga qo'yadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true',
+                            help="Navbatga qo'ymasdan shu jarayonda bajarish")
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field_name in IMAGE_FIELDS.items():
+            for instance in model.objects.exclude(**{field_name: ''}).only('pk', field_name, marker_field(field_name)).iterator():
+                field_file = getattr(instance, field_name)
+                if has_variants(field_file):
+                    continue
+                if options['now']:
+                    generate_image_variants(model._meta.label, instance.pk, field_name)
+                else:
+                    schedule_variants(instance, field_name)
+                total += 1
+        action = 'yaratildi' if options['now'] else "navbatga qo'yildi"
+        self.stdout.write(self.style.SUCCESS(f'{total} ta rasm {action}'))
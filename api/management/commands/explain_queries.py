@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.models import Article, ContactMessage, EditorialBoardMember, Issue, News
+
+
+def access_paths(journal='QX'):
+    """(label, queryset) for the filters and orderings the list endpoints run"""
+    issue = Issue.objects.values_list('pk', flat=True).first() or 1
+    return [
+        ('issues', Issue.objects.order_by('-published_date', '-id')[:20]),
+        ('issues?journal=', Issue.objects.filter(journal_type=journal).order_by('-published_date', '-id')[:20]),
+        ('issues?journal=&current=', Issue.objects.filter(journal_type=journal, is_current=False).order_by(
+            '-published_date', '-id')[:20]),
+        ('issues/current-by-type', Issue.objects.filter(journal_type=journal, is_current=True).values('pk')[:1]),
+        ('articles', Article.objects.order_by('start_page', 'id')[:20]),
+        ('articles?issue=', Article.objects.filter(issue_id=issue).order_by('start_page', 'id')[:20]),
+        ('articles?journal=', Article.objects.filter(issue__journal__short_name=journal).order_by('start_page', 'id')[:20]),
+        ('board-members?journal=', EditorialBoardMember.objects.filter(journal__short_name=journal).order_by(
+            'order', 'id')[:20]),
+        ('news', News.objects.order_by('-created_at', '-id')[:20]),
+        ('contact', ContactMessage.objects.order_by('-created_at', '-id')[:20]),
+        ('contact?is_read=false', ContactMessage.objects.filter(is_read=False).order_by('-created_at', '-id')[:20]),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Ro'yxat endpointlari so'rovlarining bajarilish rejasini (EXPLAIN) chiqaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal', default='QX', help="Filtrlarda ishlatiladigan jurnal turi")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{connection.vendor}\n')
+        for label, queryset in access_paths(options['journal'].upper()):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.export import FORMATS, catalogue
+
+
+class Command(BaseCommand):
+    help = "Barcha nashr va maqolalarni NDJSON yoki Crossref XML ko'rinishida oqim bilan eksport qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson', dest='export_format')
+        parser.add_argument('--output', help="Natija fayli (ko'rsatilmasa stdout)")
+        parser.add_argument('--base-url', default='', help="Fayl havolalari uchun sayt manzili, masalan https://jurnal.uz")
+        parser.add_argument('--chunk-size', type=int, help="Bir so'rovda olinadigan nashrlar soni")
+
+    def handle(self, *args, **options):
+        writer = FORMATS[options['export_format']][0]
+        parts = writer(catalogue(options['chunk_size']), options['base_url'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(parts)
+        else:
+            for part in parts:
+                self.stdout.write(part, ending='')
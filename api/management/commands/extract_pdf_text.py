@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.documents import extract_file_text, schedule_extraction
+from api.uploads import TARGETS
+
+
+class Command(BaseCommand):
+    help = "Nashr va maqola PDF fayllaridan sahifalar soni, hajm va matnni ajratib oladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Fayl o'zgarmagan bo'lsa ham qayta ishlash (masalan, pypdf o'rnatilgandan keyin)")
+        parser.add_argument('--now', action='store_true',
+                            help="Navbatga qo'ymasdan shu jarayonda bajarish")
+
+    def handle(self, *args, **options):
+        total = 0
+        for target, (model, field_name) in TARGETS.items():
+            pks = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).values_list(
+                'pk', flat=True)
+            for pk in pks.iterator():
+                if options['now']:
+                    extract_file_text(target, pk, force=options['force'])
+                else:
+                    schedule_extraction(target, pk, force=options['force'])
+                total += 1
+        action = 'qayta ishlandi' if options['now'] else "navbatga qo'yildi"
+        self.stdout.write(self.style.SUCCESS(f'{total} ta fayl {action}'))
@@ -0,0 +1,56 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.importer import import_issue, read_csv
+from api.serializers import IssueImportSerializer
+
+
+class Command(BaseCommand):
+    help = "Butun nashrni (maqolalar, mualliflar, kalit so'zlar, tarjimalar) JSON yoki CSV fayldan import qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON manifest yoki CSV fayl (har bir qator - bitta maqola)")
+        parser.add_argument('--journal', help="Jurnal qisqa nomi (QX yoki AI)")
+        parser.add_argument('--title', help="Nashr sarlavhasi")
+        parser.add_argument('--published-date', help="Chop etilgan sana, YYYY-MM-DD")
+        parser.add_argument('--cover-image', help="Mediadagi muqova rasmi, masalan covers/7-son.jpg")
+        parser.add_argument('--pdf-file', help="Mediadagi to'liq nashr PDF fayli, masalan issues/7-son.pdf")
+        parser.add_argument('--current', action='store_true', help="Joriy nashr qilib belgilash")
+        parser.add_argument('--dry-run', action='store_true', help="Tekshirish va hech narsani saqlamaslik")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                if os.path.splitext(path)[1].lower() == '.csv':
+                    manifest = {'articles': read_csv(f)}
+                else:
+                    manifest = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Faylni o'qib bo'lmadi: {exc}")
+
+        # Command line options complete or override the manifest's issue fields
+        for option, field in (('journal', 'journal'), ('title', 'title'), ('published_date', 'published_date'),
+                              ('cover_image', 'cover_image'), ('pdf_file', 'pdf_file')):
+            if options[option]:
+                manifest[field] = options[option]
+        if options['current']:
+            manifest['is_current'] = True
+
+        serializer = IssueImportSerializer(data=manifest)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False, indent=2))
+
+        with transaction.atomic():
+            result = import_issue(serializer.validated_data)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        status = "tekshirildi (saqlanmadi)" if options['dry_run'] else 'import qilindi'
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.issue.title}: {result.articles} ta maqola {status}, "
+            f"{result.authors_created} ta yangi muallif, {result.keywords_created} ta yangi kalit so'z"
+        ))
@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+
+
+class Command(BaseCommand):
+    help = ("Ishlab turgan serverga bir vaqtda ko'p so'rov yuboradi: soniyadagi so'rovlar va kechikish "
+            "persentillari. WSGI va ASGI serverlarini bir xil sharoitda solishtirish uchun")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server manzili")
+        parser.add_argument('--concurrency', type=int, default=50, help="Bir vaqtdagi mijozlar soni")
+        parser.add_argument('--duration', type=float, default=10.0, help="Sinov davomiyligi, soniya")
+        parser.add_argument('--endpoint', action='append', help="Faqat shu endpoint(lar) (benchmark_api nomlari)")
+        parser.add_argument('--path', action='append', help="Endpoint o'rniga aniq yo'l, masalan /api/news/")
+        parser.add_argument('--pid', type=int, action='append', default=[],
+                            help="Xotirasi o'lchanadigan server jarayoni (worker) PID'i")
+        parser.add_argument('--output', help="Natijani JSON faylga yozish")
+
+    def handle(self, *args, **options):
+        paths = options['path'] or [
+            path for name, path in benchmark.endpoints()
+            if not options['endpoint'] or name in options['endpoint']
+        ]
+        if not paths:
+            raise CommandError("O'lchanadigan endpoint topilmadi")
+
+        result = asyncio.run(benchmark.load(options['url'], paths, options['concurrency'], options['duration']))
+        result.update(url=options['url'], paths=paths, concurrency=options['concurrency'])
+        memory = benchmark.process_memory(options['pid'])
+        if memory:
+            result['rss_kib'] = sum(current for current, _ in memory.values())
+            result['peak_rss_kib'] = sum(peak for _, peak in memory.values())
+
+        self.stdout.write(f"{result['requests']} so'rov, {result['errors']} xato, {result['rps']} so'rov/s")
+        self.stdout.write(f"p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, p99 {result['p99_ms']} ms, "
+                          f"max {result['max_ms']} ms")
+        if memory:
+            self.stdout.write(f"RSS {result['rss_kib']} KiB (eng ko'p {result['peak_rss_kib']} KiB)")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
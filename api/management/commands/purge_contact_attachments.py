@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.tasks import enqueue, purge_contact_attachments
+
+
+class Command(BaseCommand):
+    help = "Eski bog'lanish xabarlari ilovalarini diskdan va bazadan partiyalab o'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Shuncha kundan eski fayllar (standart: API_CONTACT_ATTACHMENT_RETENTION_DAYS)")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Bir partiyadagi fayllar soni (standart: API_CONTACT_PURGE_BATCH_SIZE)")
+        parser.add_argument('--now', action='store_true',
+                            help="Navbatga qo'ymasdan shu jarayonda bajarish")
+
+    def handle(self, *args, **options):
+        if options['now']:
+            total = purge_contact_attachments(days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"{total} ta fayl o'chirildi"))
+        else:
+            enqueue(purge_contact_attachments, days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS("O'chirish navbatga qo'yildi"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Article
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Maqolalar qidiruv indeksini to'liq qayta quradi"
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{Article.objects.count()} ta maqola indekslandi'))
@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import tasks
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi fon vazifalarini (api.Job) bajaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true',
+                            help="Navbat bo'shagach to'xtash (cron yoki testlar uchun)")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Navbat bo'sh bo'lganda kutish vaqti, soniya")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        worker = tasks.worker_id()
+        self.stdout.write(f'Worker {worker} ishga tushdi')
+
+        while not self.stopping:
+            close_old_connections()
+            requeued = tasks.requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"{requeued} ta osilib qolgan vazifa navbatga qaytarildi"))
+            # One job per loop, so a stop signal is honoured between jobs
+            job = tasks.claim_next(worker)
+            if job is not None:
+                tasks.run_job(job)
+                self.stdout.write(f'{job.name} #{job.pk}: {job.status}')
+                continue
+            if options['burst']:
+                break
+            time.sleep(options['sleep'])
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS api_article_search USING fts5(
+    article_id UNINDEXED,
+    language UNINDEXED,
+    title,
+    abstract,
+    keywords,
+    authors,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# rowid = article_id * 4 + language slot, see api/search.py
+POPULATE = """
+INSERT INTO api_article_search (rowid, article_id, language, title, abstract, keywords, authors)
+SELECT
+    t.article_id * 4 + CASE t.language WHEN 'uz' THEN 1 WHEN 'ru' THEN 2 WHEN 'en' THEN 3 ELSE 0 END,
+    t.article_id,
+    t.language,
+    t.title,
+    t.abstract,
+    (SELECT group_concat(k.name, ' ') FROM api_article_keywords ak
+        JOIN api_keyword k ON k.id = ak.keyword_id WHERE ak.article_id = t.article_id),
+    (SELECT group_concat(a.last_name || ' ' || a.first_name || ' ' || a.patronymic || ' ' || a.orcid_id, ' ')
+        FROM api_article_authors aa JOIN api_author a ON a.id = aa.author_id WHERE aa.article_id = t.article_id)
+FROM api_articletranslation t
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Only the SQLite backend keeps its own index table, PostgreSQL searches the tables directly
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE)
+    schema_editor.execute(POPULATE)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS api_article_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_article_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Model nomi')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versiya')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name="O'zgartirilgan sana")),
+            ],
+            options={
+                'verbose_name': 'Kontent versiyasi',
+                'verbose_name_plural': 'Kontent versiyalari',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='downloads',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni'),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='downloads',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuklab olishlar soni'),
+        ),
+    ]
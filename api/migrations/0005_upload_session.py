@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0004_download_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('issue', 'Nashr PDF fayli'), ('article', 'Maqola fayli')], max_length=10, verbose_name='Maqsad')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Obyekt ID')),
+                ('filename', models.CharField(max_length=255, verbose_name='Fayl nomi')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Fayl hajmi (bayt)')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Qabul qilingan (bayt)')),
+                ('status', models.CharField(choices=[('active', 'Yuklanmoqda'), ('completed', 'Yakunlangan')], default='active', max_length=10, verbose_name='Holati')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Boshlangan sana')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name="Oxirgi bo'lak")),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Yuklovchi')),
+            ],
+            options={
+                'verbose_name': 'Yuklash sessiyasi',
+                'verbose_name_plural': 'Yuklash sessiyalari',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
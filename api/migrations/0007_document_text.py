@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleFullText',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='full_text', serialize=False, to='api.article')),
+                ('text', models.TextField(blank=True, verbose_name='Matn')),
+                ('extracted_at', models.DateTimeField(auto_now=True, verbose_name='Ajratib olingan sana')),
+            ],
+            options={
+                'verbose_name': 'Maqola matni',
+                'verbose_name_plural': 'Maqola matnlari',
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='file_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Fayl SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Fayl hajmi (bayt)'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Sahifalar soni'),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='file_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Fayl SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Fayl hajmi (bayt)'),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Sahifalar soni'),
+        ),
+    ]
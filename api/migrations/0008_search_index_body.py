@@ -0,0 +1,49 @@
+from django.db import migrations
+
+COLUMNS = 'article_id, language, title, abstract, keywords, authors'
+
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE api_article_search_new USING fts5(
+    article_id UNINDEXED,
+    language UNINDEXED,
+    title,
+    abstract,
+    keywords,
+    authors,
+    {body}
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def _recreate(schema_editor, with_body):
+    # FTS5 tables can't be altered: copy the rows into a table with the new columns and swap
+    schema_editor.execute(CREATE_TABLE.format(body='body,' if with_body else ''))
+    schema_editor.execute(
+        f'INSERT INTO api_article_search_new (rowid, {COLUMNS}) SELECT rowid, {COLUMNS} FROM api_article_search'
+    )
+    schema_editor.execute('DROP TABLE api_article_search')
+    schema_editor.execute('ALTER TABLE api_article_search_new RENAME TO api_article_search')
+
+
+def add_body_column(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    _recreate(schema_editor, with_body=True)
+
+
+def remove_body_column(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    _recreate(schema_editor, with_body=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_document_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_body_column, remove_body_column),
+    ]
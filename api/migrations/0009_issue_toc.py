@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_search_index_body'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueTOC',
+            fields=[
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='toc', serialize=False, to='api.issue')),
+                ('entries', models.JSONField(default=dict, verbose_name='Mundarija')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+            ],
+            options={
+                'verbose_name': 'Nashr mundarijasi',
+                'verbose_name_plural': 'Nashr mundarijalari',
+            },
+        ),
+    ]
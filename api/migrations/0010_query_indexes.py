@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:21
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+def uppercase_journal_codes(apps, schema_editor):
+    # Views now filter with exact matches on upper-case values, see journal_code() in api/views.py
+    Journal = apps.get_model('api', 'Journal')
+    duplicates = Journal.objects.annotate(code=Upper('short_name')).values('code').annotate(
+        count=Count('id')).filter(count__gt=1).values_list('code', flat=True)
+    if duplicates:
+        # Which journal keeps the issues and board members is an editorial decision, not a migration's
+        raise RuntimeError(
+            "Faqat harf kattaligi bilan farq qiluvchi jurnal qisqa nomlari bor, migratsiyadan oldin "
+            f"ularni birlashtiring yoki qayta nomlang: {', '.join(sorted(duplicates))}")
+    Journal.objects.update(short_name=Upper('short_name'))
+    apps.get_model('api', 'Issue').objects.update(journal_type=Upper('journal_type'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_issue_toc'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_journal_codes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['pages', 'id'], name='api_article_pages_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['issue', 'pages', 'id'], name='api_article_issue_pages_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at', '-id'], name='api_contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='editorialboardmember',
+            index=models.Index(fields=['journal', 'order', 'id'], name='api_board_journal_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='editorialboardmember',
+            index=models.Index(fields=['order', 'id'], name='api_board_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-published_date', '-id'], name='api_issue_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['journal_type', '-published_date', '-id'], name='api_issue_type_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-created_at', '-id'], name='api_news_created_idx'),
+        ),
+    ]
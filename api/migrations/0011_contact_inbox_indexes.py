@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_read', '-created_at', '-id'], name='api_contact_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessagefile',
+            index=models.Index(fields=['uploaded_at', 'id'], name='api_contact_file_uploaded_idx'),
+        ),
+    ]
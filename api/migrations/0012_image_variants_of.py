@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:56
+
+import os
+import posixpath
+
+from django.db import migrations, models
+
+
+def last_rendition(name):
+    # Frozen copy of api.images.last_rendition as of this migration: the 'large' rendition,
+    # re-encoded in the source format (JPEG for unknown ones)
+    directory, filename = posixpath.split(name)
+    stem, ext = os.path.splitext(filename)
+    ext = ext.lower().lstrip('.')
+    if ext not in ('jpg', 'jpeg', 'png', 'gif', 'webp'):
+        ext = 'jpg'
+    return posixpath.join('variants', directory, f'{stem}_large.{ext}')
+
+
+def record_existing_variants(apps, schema_editor):
+    # One storage lookup per image now, instead of one per serialized row from here on
+    for model_name, field_name in (('Issue', 'cover_image'), ('News', 'image')):
+        model = apps.get_model('api', model_name)
+        storage = model._meta.get_field(field_name).storage
+        for pk, name in model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).values_list(
+                'pk', field_name).iterator():
+            if storage.exists(last_rendition(name)):
+                model.objects.filter(pk=pk).update(**{f'{field_name}_variants_of': name})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_contact_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='cover_image_variants_of',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_variants_of',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(record_existing_variants, migrations.RunPython.noop),
+    ]
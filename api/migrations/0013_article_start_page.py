@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:04
+
+import re
+
+from django.db import migrations, models
+
+
+def first_page(pages):
+    # Frozen copy of api.models.first_page as of this migration
+    match = re.search(r'\d+', pages or '')
+    return min(int(match.group()), 2 ** 31 - 1) if match else 0
+
+
+def fill_start_page(apps, schema_editor):
+    Article = apps.get_model('api', 'Article')
+    batch = []
+    for article in Article.objects.only('pk', 'pages').iterator():
+        article.start_page = first_page(article.pages)
+        if article.start_page:
+            batch.append(article)
+        if len(batch) >= 1000:
+            Article.objects.bulk_update(batch, ['start_page'])
+            batch = []
+    Article.objects.bulk_update(batch, ['start_page'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_image_variants_of'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='article',
+            options={'ordering': ['start_page', 'id'], 'verbose_name': 'Maqola', 'verbose_name_plural': 'Maqolalar'},
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='api_article_pages_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='api_article_issue_pages_idx',
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='start_page',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Boshlang'ich sahifa"),
+        ),
+        migrations.RunPython(fill_start_page, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['start_page', 'id'], name='api_article_start_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['issue', 'start_page', 'id'], name='api_article_issue_start_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:30
+
+import os
+import posixpath
+
+from django.db import migrations
+
+# Frozen copies of api.images.VARIANTS and variant_formats() as of this migration
+VARIANTS = ('thumb', 'medium', 'large')
+ORIGINAL_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif', 'webp')
+
+
+def rendition_extensions(name):
+    ext = os.path.splitext(name)[1].lower().lstrip('.')
+    if ext == 'webp':
+        return ['webp']
+    return ['webp', ext if ext in ORIGINAL_EXTENSIONS else 'jpg']
+
+
+def stem_name(name, variant, ext):
+    # Before: covers/x.png -> variants/covers/x_thumb.webp, shared with covers/x.jpg
+    directory, filename = posixpath.split(name)
+    return posixpath.join('variants', directory, f'{os.path.splitext(filename)[0]}_{variant}.{ext}')
+
+
+def filename_name(name, variant, ext):
+    # After: covers/x.png -> variants/covers/x.png_thumb.webp
+    directory, filename = posixpath.split(name)
+    return posixpath.join('variants', directory, f'{filename}_{variant}.{ext}')
+
+
+def move_renditions(old_name, new_name):
+    def move(apps, schema_editor):
+        for model_name, field_name in (('Issue', 'cover_image'), ('News', 'image')):
+            model = apps.get_model('api', model_name)
+            storage = model._meta.get_field(field_name).storage
+            marker = f'{field_name}_variants_of'
+            # Only images whose renditions were recorded, the others are generated under the new names
+            for pk, name in model.objects.exclude(**{marker: ''}).values_list('pk', marker).iterator():
+                for variant in VARIANTS:
+                    for ext in rendition_extensions(name):
+                        source, target = old_name(name, variant, ext), new_name(name, variant, ext)
+                        if not storage.exists(source):
+                            continue
+                        if storage.exists(target):
+                            storage.delete(target)
+                        with storage.open(source, 'rb') as f:
+                            storage.save(target, f)
+                        storage.delete(source)
+    return move
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_article_start_page'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_renditions(stem_name, filename_name), move_renditions(filename_name, stem_name)),
+    ]
@@ -1,4 +1,9 @@
+import re
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 
@@ -16,6 +21,15 @@ def validate_file_size(value):
         raise ValidationError(f'Fayl hajmi {limit / (1024 * 1024):.0f} MB dan oshmasligi kerak. Sizning faylingiz {value.size / (1024 * 1024):.2f} MB.')
 
 
+_FIRST_NUMBER_RE = re.compile(r'\d+')
+
+
+def first_page(pages):
+    """Number the page range starts with ('9-15' -> 9), 0 when there is none"""
+    match = _FIRST_NUMBER_RE.search(pages or '')
+    return min(int(match.group()), 2 ** 31 - 1) if match else 0
+
+
 class ContactMessage(models.Model):
     name = models.CharField(max_length=255, verbose_name="Ismi")
     email = models.EmailField(verbose_name="Email")
@@ -31,6 +45,10 @@ class ContactMessage(models.Model):
         ordering = ['-created_at']
         verbose_name = "Bog'lanish xabari"
         verbose_name_plural = "Bog'lanish xabarlari"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='api_contact_created_idx'),
+            models.Index(fields=['is_read', '-created_at', '-id'], name='api_contact_unread_idx'),
+        ]
 
 
 class ContactMessageFile(models.Model):
@@ -41,6 +59,12 @@ class ContactMessageFile(models.Model):
     def __str__(self):
         return self.file.name
 
+    class Meta:
+        indexes = [
+            # The retention job walks the attachments oldest first
+            models.Index(fields=['uploaded_at', 'id'], name='api_contact_file_uploaded_idx'),
+        ]
+
 
 class Journal(models.Model):
     name = models.CharField(max_length=255, verbose_name="Jurnal nomi")
@@ -49,6 +73,11 @@ class Journal(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Stored upper-case so lookups are exact matches on the unique index
+        self.short_name = self.short_name.strip().upper()
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Jurnal"
         verbose_name_plural = "Jurnallar"
@@ -58,6 +87,8 @@ class News(models.Model):
     title = models.CharField(max_length=255, verbose_name="Sarlavha")
     content = models.TextField(verbose_name="Matn")
     image = models.ImageField(upload_to='news/', blank=True, null=True, verbose_name="Rasm", validators=[validate_image_size])
+    # Name of the image the stored renditions were made from, see api/images.py
+    image_variants_of = models.CharField(max_length=100, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
 
     def __str__(self):
@@ -67,6 +98,9 @@ class News(models.Model):
         ordering = ['-created_at']
         verbose_name = "Yangilik"
         verbose_name_plural = "Yangiliklar"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='api_news_created_idx'),
+        ]
 
 
 class EditorialBoardMember(models.Model):
@@ -88,6 +122,10 @@ class EditorialBoardMember(models.Model):
         ordering = ['order']
         verbose_name = "Tahririyat a'zosi"
         verbose_name_plural = "Tahririyat a'zolari"
+        indexes = [
+            models.Index(fields=['journal', 'order', 'id'], name='api_board_journal_order_idx'),
+            models.Index(fields=['order', 'id'], name='api_board_order_idx'),
+        ]
 
 
 class RecentIssueLink(models.Model):
@@ -120,9 +158,15 @@ class Issue(models.Model):
     )
     title = models.CharField(max_length=255, verbose_name="Nashr sarlavhasi (masalan, 7-son, 2025)")
     cover_image = models.ImageField(upload_to='covers/', verbose_name="Muqova rasmi", validators=[validate_image_size])
+    cover_image_variants_of = models.CharField(max_length=100, blank=True, editable=False)
     pdf_file = models.FileField(upload_to='issues/', verbose_name="To'liq nashr (PDF)", validators=[validate_file_size])
     published_date = models.DateField(verbose_name="Chop etilgan sana")
     is_current = models.BooleanField(default=False, verbose_name="Joriy nashrmi?")
+    downloads = models.PositiveIntegerField(default=0, verbose_name="Yuklab olishlar soni")
+    # Filled by the text extraction job from the PDF, see api/documents.py
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Sahifalar soni")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False, verbose_name="Fayl hajmi (bayt)")
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Fayl SHA-256")
 
     def __str__(self):
         current_status = " (Joriy)" if self.is_current else ""
@@ -132,17 +176,26 @@ class Issue(models.Model):
         # Auto-set journal_type based on journal if not explicitly set
         if not self.journal_type and self.journal:
             self.journal_type = self.journal.short_name
+        self.journal_type = self.journal_type.upper()
 
         # Ensure only one issue per journal type can be current
         if self.is_current:
-            Issue.objects.filter(journal_type=self.journal_type, is_current=True).exclude(pk=self.pk).update(
-                is_current=False)
+            # update() sends no signals: post_save of this issue invalidates the demoted ones too
+            self._demoted_ids = list(Issue.objects.filter(
+                journal_type=self.journal_type, is_current=True).exclude(pk=self.pk).values_list('pk', flat=True))
+            if self._demoted_ids:
+                Issue.objects.filter(pk__in=self._demoted_ids).update(is_current=False)
         super().save(*args, **kwargs)
 
     class Meta:
         ordering = ['-published_date']
         verbose_name = "Nashr (son)"
         verbose_name_plural = "Nashrlar (sonlar)"
+        indexes = [
+            # IssueCursorPagination order, alone and within one journal type
+            models.Index(fields=['-published_date', '-id'], name='api_issue_published_idx'),
+            models.Index(fields=['journal_type', '-published_date', '-id'], name='api_issue_type_published_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['journal_type', 'is_current'],
@@ -188,20 +241,39 @@ class Article(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='articles', verbose_name="Nashr")
     doi = models.CharField(max_length=100, blank=True, verbose_name="DOI")
     pages = models.CharField(max_length=50, verbose_name="Sahifalar")
+    # Derived from `pages` in save(), so lists sort '9-15' before '10-20'
+    start_page = models.PositiveIntegerField(default=0, editable=False, verbose_name="Boshlang'ich sahifa")
     authors = models.ManyToManyField(Author, related_name='articles', verbose_name="Mualliflar")
     keywords = models.ManyToManyField(Keyword, blank=True, verbose_name="Kalit so'zlar")
     references = models.TextField(blank=True, verbose_name="Foydalanilgan adabiyotlar")
     article_file = models.FileField(upload_to='articles/', blank=True, null=True, verbose_name="Maqola fayli (PDF)", validators=[validate_file_size])
     views = models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar soni")
+    downloads = models.PositiveIntegerField(default=0, verbose_name="Yuklab olishlar soni")
+    # Filled by the text extraction job from the PDF, see api/documents.py
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Sahifalar soni")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False, verbose_name="Fayl hajmi (bayt)")
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Fayl SHA-256")
 
     def __str__(self):
         first_translation = self.translations.first()
         return first_translation.title if first_translation else f"Maqola ID: {self.id}"
 
+    def save(self, *args, **kwargs):
+        self.start_page = first_page(self.pages)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'pages' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'start_page'}
+        super().save(*args, **kwargs)
+
     class Meta:
-        ordering = ['pages']
+        ordering = ['start_page', 'id']
         verbose_name = "Maqola"
         verbose_name_plural = "Maqolalar"
+        indexes = [
+            # ArticleCursorPagination order, alone and within one issue
+            models.Index(fields=['start_page', 'id'], name='api_article_start_page_idx'),
+            models.Index(fields=['issue', 'start_page', 'id'], name='api_article_issue_start_idx'),
+        ]
 
 
 class ArticleTranslation(models.Model):
@@ -221,4 +293,113 @@ class ArticleTranslation(models.Model):
         verbose_name_plural = "Maqola tarjimalari"
 
     def __str__(self):
-        return f"{self.article} ({self.get_language_display()})"
\ No newline at end of file
+        return f"{self.article} ({self.get_language_display()})"
+
+
+class ArticleFullText(models.Model):
+    """Normalized text of Article.article_file, kept apart so article queries don't load it"""
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='full_text')
+    text = models.TextField(blank=True, verbose_name="Matn")
+    extracted_at = models.DateTimeField(auto_now=True, verbose_name="Ajratib olingan sana")
+
+    def __str__(self):
+        return str(self.article_id)
+
+    class Meta:
+        verbose_name = "Maqola matni"
+        verbose_name_plural = "Maqola matnlari"
+
+
+class IssueTOC(models.Model):
+    """Precomputed table of contents of an issue, rebuilt by api/toc.py when its articles change"""
+    issue = models.OneToOneField(Issue, on_delete=models.CASCADE, primary_key=True, related_name='toc')
+    # {language: [{id, title, title_language, authors, pages, doi}, ...]} in page order
+    entries = models.JSONField(default=dict, verbose_name="Mundarija")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
+
+    def __str__(self):
+        return str(self.issue_id)
+
+    class Meta:
+        verbose_name = "Nashr mundarijasi"
+        verbose_name_plural = "Nashr mundarijalari"
+
+
+class ContentVersion(models.Model):
+    """Per-model change counter bumped by signals, the source of the API's ETag/Last-Modified"""
+    name = models.CharField(max_length=50, unique=True, verbose_name="Model nomi")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versiya")
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name="O'zgartirilgan sana")
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    class Meta:
+        verbose_name = "Kontent versiyasi"
+        verbose_name_plural = "Kontent versiyalari"
+
+
+class UploadSession(models.Model):
+    """Chunked, resumable upload of a large file into Issue.pdf_file or Article.article_file"""
+    TARGET_CHOICES = (
+        ('issue', "Nashr PDF fayli"),
+        ('article', "Maqola fayli"),
+    )
+    STATUS_CHOICES = (
+        ('active', "Yuklanmoqda"),
+        ('completed', "Yakunlangan"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES, verbose_name="Maqsad")
+    object_id = models.PositiveBigIntegerField(verbose_name="Obyekt ID")
+    filename = models.CharField(max_length=255, verbose_name="Fayl nomi")
+    size = models.PositiveBigIntegerField(verbose_name="Fayl hajmi (bayt)")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Qabul qilingan (bayt)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active', verbose_name="Holati")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   verbose_name="Yuklovchi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Boshlangan sana")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Oxirgi bo'lak")
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Yuklash sessiyasi"
+        verbose_name_plural = "Yuklash sessiyalari"
+
+
+class Job(models.Model):
+    """Background job stored in the database and executed by `manage.py run_worker`"""
+    STATUS_CHOICES = (
+        ('queued', "Navbatda"),
+        ('running', "Bajarilmoqda"),
+        ('done', "Bajarildi"),
+        ('failed', "Xato"),
+    )
+
+    name = models.CharField(max_length=100, verbose_name="Vazifa")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parametrlar")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name="Holati")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Urinishlar")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="Maksimal urinishlar")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Bajarish vaqti")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Olingan vaqt")
+    last_error = models.TextField(blank=True, verbose_name="Oxirgi xato")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="O'zgartirilgan sana")
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        verbose_name = "Fon vazifasi"
+        verbose_name_plural = "Fon vazifalari"
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='api_job_status_run_after'),
+        ]
@@ -0,0 +1,113 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+def _reverse(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class JournalCursorPagination(CursorPagination):
+    """Keyset pagination shared by all list endpoints.
+
+    Page size comes from REST_FRAMEWORK['PAGE_SIZE'], clients may ask for a
+    different size with ?page_size= up to API_MAX_PAGE_SIZE.
+    DRF's cursor keeps only the first ordering column and steps over ties
+    with an offset capped at `offset_cutoff`, so long runs of equal values
+    can't be paged through. Here the position holds every ordering column.
+    The orderings end with the primary key, so no two rows share a position.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = _reverse(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self._after(queryset.model, ordering, current_position))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, model, ordering, position):
+        """Rows following `position` in `ordering`: (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y)"""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            values = [model._meta.get_field(field.lstrip('-')).to_python(value)
+                      for field, value in zip(ordering, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = [field.lstrip('-') for field in ordering]
+        lookups = ['lt' if field.startswith('-') else 'gt' for field in ordering]
+        condition = Q()
+        for i, (field, lookup) in enumerate(zip(fields, lookups)):
+            condition |= Q(**dict(zip(fields[:i], values[:i])), **{f'{field}__{lookup}': values[i]})
+        # The leading column's bound on its own lets the index range scan start at the position
+        return Q(**{f'{fields[0]}__{lookups[0]}e': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return json.dumps([str(value) for value in values])
+
+
+class IssueCursorPagination(JournalCursorPagination):
+    ordering = ('-published_date', '-id')
+
+
+class CreatedAtCursorPagination(JournalCursorPagination):
+    """News and ContactMessage, newest first"""
+    ordering = ('-created_at', '-id')
+
+
+class OrderedCursorPagination(JournalCursorPagination):
+    """Models with a manual `order` column (board members, recent issue links)"""
+    ordering = ('order', 'id')
+
+
+class ArticleCursorPagination(JournalCursorPagination):
+    # `pages` is text ('101-109' < '11-19'), its numeric start is kept in its own column
+    ordering = ('start_page', 'id')
+
+
+class SearchPagination(LimitOffsetPagination):
+    """Search results are ordered by relevance, which has no keyset, so they use limit/offset"""
+    max_limit = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
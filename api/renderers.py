@@ -0,0 +1,48 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Everything still works with the stdlib json module, only slower
+    orjson = None
+
+# Dates and datetimes go through DRF's encoder, so the output matches the stdlib renderer byte for byte
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+_UTF8 = ('utf-8', 'utf8')
+
+_default = JSONEncoder().default
+
+
+def orjson_enabled():
+    return orjson is not None and getattr(settings, 'API_JSON_BACKEND', 'orjson') == 'orjson'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, the stdlib path is kept for indented and ASCII-only output"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (not orjson_enabled() or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(data, default=_default, option=_OPTIONS)
+        # Valid JSON but not valid JavaScript, escaped like the stdlib renderer does
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by orjson for UTF-8 bodies"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if not orjson_enabled() or encoding.lower() not in _UTF8:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
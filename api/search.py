@@ -0,0 +1,295 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from .models import Article, ArticleFullText, ArticleTranslation
+from .transactions import collect_on_commit
+
+SEARCH_TABLE = 'api_article_search'
+
+# Each article owns four consecutive rowids in the FTS table, one per language,
+# so reindexing an article is a cheap rowid range delete instead of a table scan
+LANGUAGE_SLOTS = {'': 0, 'uz': 1, 'ru': 2, 'en': 3}
+ROWS_PER_ARTICLE = len(LANGUAGE_SLOTS)
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def article_documents(article):
+    """Index rows for one article: (language, title, abstract, keywords, authors, body).
+
+    The PDF text is language neutral, so it is stored once in the '' slot
+    instead of being repeated in every translation row.
+    """
+    keywords = ' '.join(k.name for k in article.keywords.all())
+    authors = ' '.join(
+        ' '.join(filter(None, [a.last_name, a.first_name, a.patronymic, a.orcid_id])) for a in article.authors.all()
+    )
+    full_text = getattr(article, 'full_text', None)
+    body = full_text.text if full_text else ''
+    translations = list(article.translations.all())
+    if not translations:
+        return [('', '', '', keywords, authors, body)]
+    rows = [(t.language, t.title, t.abstract, keywords, authors, '') for t in translations]
+    if body:
+        rows.append(('', '', '', '', '', body))
+    return rows
+
+
+def articles_for_indexing(article_ids):
+    return Article.objects.filter(pk__in=article_ids).select_related('full_text').prefetch_related(
+        'authors', 'keywords', 'translations')
+
+
+class SearchBackend:
+    """Interface of the article search backends, see API_SEARCH_BACKEND"""
+
+    def index_articles(self, article_ids):
+        raise NotImplementedError
+
+    def remove_articles(self, article_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def count(self, query, language=None):
+        """Number of articles matching `query`"""
+        raise NotImplementedError
+
+    def search(self, query, language=None, limit=20, offset=0):
+        """Matching articles ordered by relevance, as dicts with highlighted title and snippet"""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """FTS5 inverted index over translations, keywords, author names and the PDF text"""
+
+    # bm25 weights per column: article_id, language, title, abstract, keywords, authors, body
+    weights = (0.0, 0.0, 10.0, 3.0, 6.0, 4.0, 1.0)
+
+    def index_articles(self, article_ids):
+        article_ids = list(article_ids)
+        if not article_ids:
+            return
+        rows = []
+        for article in articles_for_indexing(article_ids):
+            for language, *columns in article_documents(article):
+                rowid = article.pk * ROWS_PER_ARTICLE + LANGUAGE_SLOTS.get(language, 0)
+                rows.append((rowid, article.pk, language, *columns))
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._delete(cursor, article_ids)
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, article_id, language, title, abstract, keywords, authors, body) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove_articles(self, article_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, list(article_ids))
+
+    def _delete(self, cursor, article_ids):
+        for pk in article_ids:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN %s AND %s',
+                [pk * ROWS_PER_ARTICLE, pk * ROWS_PER_ARTICLE + ROWS_PER_ARTICLE - 1],
+            )
+
+    def rebuild(self, batch_size=500):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        ids = list(Article.objects.values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            self.index_articles(ids[start:start + batch_size])
+
+    @staticmethod
+    def match_expression(query):
+        """Turn free text into an FTS5 query: every word must match, the last one as a prefix"""
+        words = _WORD_RE.findall(query)
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def _where(self, query, language):
+        match = self.match_expression(query)
+        if match is None:
+            return None, []
+        where = f'{SEARCH_TABLE} MATCH %s'
+        params = [match]
+        if language:
+            # The language neutral row holds the PDF text, it matches every language
+            where += " AND language IN (%s, '')"
+            params.append(language)
+        return where, params
+
+    def count(self, query, language=None):
+        where, params = self._where(query, language)
+        if where is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(DISTINCT article_id) FROM {SEARCH_TABLE} WHERE {where}', params)
+            return cursor.fetchone()[0]
+
+    def search(self, query, language=None, limit=20, offset=0):
+        where, params = self._where(query, language)
+        if where is None:
+            return []
+        weights = ', '.join(str(w) for w in self.weights)
+        with connection.cursor() as cursor:
+            # Articles are ranked by their best matching row and the snippet comes from that row.
+            # A hit in the PDF text alone comes from the language neutral row, so the title and
+            # language are those of the best matching translation, else of the translation in
+            # the requested language (or the first one). SQLite returns the bare columns of the
+            # row that produced MIN(rank). The CTE is materialized because the FTS auxiliary
+            # functions can't run inside a flattened subquery.
+            cursor.execute(
+                f'WITH matches AS MATERIALIZED ('
+                f'  SELECT article_id, language, bm25({SEARCH_TABLE}, {weights}) AS rank,'
+                f'  highlight({SEARCH_TABLE}, 2, %s, %s) AS title,'
+                f"  CASE WHEN body != '' THEN snippet({SEARCH_TABLE}, 6, %s, %s, %s, 32)"
+                f'  ELSE snippet({SEARCH_TABLE}, 3, %s, %s, %s, 32) END AS snippet'
+                f'  FROM {SEARCH_TABLE} WHERE {where}'
+                f'), best AS ('
+                f'  SELECT article_id, MIN(rank) AS rank, snippet FROM matches'
+                f'  GROUP BY article_id ORDER BY MIN(rank) LIMIT %s OFFSET %s'
+                f'), titled AS ('
+                f"  SELECT article_id, language, MIN(rank), title FROM matches WHERE language != ''"
+                f'  GROUP BY article_id'
+                f") SELECT best.article_id, COALESCE(titled.language, fallback.language, ''), best.rank,"
+                f"  COALESCE(titled.title, fallback.title, ''), best.snippet"
+                f'  FROM best LEFT JOIN titled ON titled.article_id = best.article_id'
+                f'  LEFT JOIN {SEARCH_TABLE} AS fallback ON fallback.rowid = ('
+                f'    SELECT rowid FROM {SEARCH_TABLE} WHERE rowid BETWEEN best.article_id * {ROWS_PER_ARTICLE} + 1'
+                f'    AND best.article_id * {ROWS_PER_ARTICLE} + {ROWS_PER_ARTICLE - 1}'
+                f'    ORDER BY language = %s DESC, rowid LIMIT 1'
+                f'  ) AND titled.article_id IS NULL'
+                f'  ORDER BY best.rank',
+                [HIGHLIGHT_START, HIGHLIGHT_END, *[HIGHLIGHT_START, HIGHLIGHT_END, '…'] * 2, *params, limit, offset,
+                 language or ''],
+            )
+            return [
+                {'article_id': article_id, 'language': language, 'rank': -rank, 'title': title, 'snippet': snippet}
+                for article_id, language, rank, title, snippet in cursor.fetchall()
+            ]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector search computed over the translation tables.
+
+    Nothing has to be maintained by signals; for large catalogues add a GIN
+    index on the same SearchVector expression.
+    """
+
+    def index_articles(self, article_ids):
+        pass
+
+    def remove_articles(self, article_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def _best_matches(self, query, language):
+        """(best translation per article, vector, search query)"""
+        from django.contrib.postgres.aggregates import StringAgg
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        from django.db.models import CharField, OuterRef, Subquery, Value
+        from django.db.models.functions import Concat
+
+        search_query = SearchQuery(query, search_type='websearch', config='simple')
+        keywords = Article.keywords.through.objects.filter(article_id=OuterRef('article_id')).values(
+            'article_id').annotate(names=StringAgg('keyword__name', ' ')).values('names')
+        authors = Article.authors.through.objects.filter(article_id=OuterRef('article_id')).values(
+            'article_id').annotate(names=StringAgg(Concat(
+                'author__last_name', Value(' '), 'author__first_name', Value(' '), 'author__patronymic', Value(' '),
+                'author__orcid_id', output_field=CharField()), ' ')).values('names')
+        body = ArticleFullText.objects.filter(article_id=OuterRef('article_id')).values('text')
+        vector = (SearchVector('title', weight='A', config='simple')
+                  + SearchVector(Subquery(keywords), weight='B', config='simple')
+                  + SearchVector(Subquery(authors), weight='B', config='simple')
+                  + SearchVector('abstract', weight='C', config='simple')
+                  + SearchVector(Subquery(body), weight='D', config='simple'))
+        qs = ArticleTranslation.objects.annotate(vector=vector).filter(vector=search_query)
+        if language:
+            qs = qs.filter(language=language)
+        best = qs.annotate(rank=SearchRank(vector, search_query)).order_by('article_id', '-rank').distinct('article_id')
+        return best, vector, search_query
+
+    def count(self, query, language=None):
+        best, _, _ = self._best_matches(query, language)
+        return best.count()
+
+    def search(self, query, language=None, limit=20, offset=0):
+        from django.contrib.postgres.search import SearchHeadline, SearchRank
+        from django.db.models import Subquery
+
+        best, vector, search_query = self._best_matches(query, language)
+        rows = ArticleTranslation.objects.filter(pk__in=Subquery(best.values('pk'))).annotate(
+            rank=SearchRank(vector, search_query),
+            highlighted_title=SearchHeadline('title', search_query, config='simple',
+                                             start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_END),
+            snippet=SearchHeadline('abstract', search_query, config='simple',
+                                   start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_END, max_words=32),
+        ).order_by('-rank', 'article_id')[offset:offset + limit]
+        return [
+            {'article_id': t.article_id, 'language': t.language, 'rank': t.rank, 'title': t.highlighted_title,
+             'snippet': t.snippet}
+            for t in rows
+        ]
+
+
+class SearchResults:
+    """Lazy sequence over a search, so DRF paginators can count and slice it"""
+
+    def __init__(self, query, language=None, backend=None):
+        self.query = query
+        self.language = language
+        self.backend = backend or get_backend()
+
+    def count(self):
+        return self.backend.count(self.query, self.language)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError('SearchResults only supports slicing')
+        offset = item.start or 0
+        return self.backend.search(self.query, self.language, limit=item.stop - offset, offset=offset)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'API_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = SQLiteFTSBackend()
+    return _backend
+
+
+def reindex_now(article_ids):
+    existing = set(Article.objects.filter(pk__in=article_ids).values_list('pk', flat=True))
+    backend = get_backend()
+    backend.index_articles(existing)
+    backend.remove_articles(set(article_ids) - existing)
+
+
+def schedule_reindex(article_ids):
+    """Reindex articles once the current transaction commits, batching repeated signals"""
+    collect_on_commit(reindex_now, article_ids)
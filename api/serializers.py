@@ -1,18 +1,90 @@
 from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
 import json
+import os
+from django.db import transaction
 from .models import (
     ContactMessage, ContactMessageFile, Journal, News, EditorialBoardMember, RecentIssueLink,
-    Issue, Author, Keyword, Article, ArticleTranslation
+    Issue, Author, Keyword, Article, ArticleTranslation, UploadSession
 )
+from .fieldsets import SparseFieldsMixin
+from .images import variant_urls
+from .signals import article_changed
+from .uploads import TARGETS, max_chunk_size
 
 
-class ContactMessageFileSerializer(serializers.ModelSerializer):
+def image_variants(value, request=None):
+    """srcset-style map {variant: {format: url}} of the resized renditions of an image"""
+    if not value:
+        return None
+    urls = variant_urls(value)
+    if urls is None:
+        # Renditions are queued by the post_save signal, until they exist clients use the original
+        return None
+    if request is None:
+        return urls
+    return {variant: {ext: request.build_absolute_uri(url) for ext, url in formats.items()}
+            for variant, formats in urls.items()}
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only field rendering image_variants()"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return image_variants(value, self.context.get('request'))
+
+
+class _Row:
+    """Attribute access over a `.values()` row: `obj.journal.short_name` reads 'journal__short_name'"""
+    __slots__ = ('_row', '_prefix')
+
+    def __init__(self, row, prefix=''):
+        self._row = row
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        key = self._prefix + name
+        if any(column.startswith(key + '__') for column in self._row):
+            return _Row(self._row, key + '__')
+        try:
+            return self._row[key]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def lean_reader(serializer, field):
+    """Function rendering `field` of `serializer` from a `.values()` row, as field.to_representation() would"""
+    model = serializer.Meta.model
+    if isinstance(field, serializers.SerializerMethodField):
+        method = getattr(serializer, field.method_name)
+        return lambda row: method(_Row(row))
+    if isinstance(field, ImageVariantsField):
+        # The renditions check reads the marker column, so the listed columns become an unsaved instance
+        columns = serializer.sparse_sources[field.field_name]
+        pk = model._meta.pk.attname
+        return lambda row: field.to_representation(
+            getattr(model(**{pk: row[pk]}, **{column: row[column] for column in columns}), field.source))
+
+    key = '__'.join(field.source_attrs)
+    if isinstance(field, serializers.FileField):
+        model_field = model._meta.get_field(field.source)
+        return lambda row: field.to_representation(model_field.attr_class(None, model_field, row[key]))
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return lambda row: None if row[key] is None else field.to_representation(PKOnlyObject(row[key]))
+    return lambda row: None if row[key] is None else field.to_representation(row[key])
+
+
+class ContactMessageFileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactMessageFile
         fields = ['id', 'file', 'uploaded_at']
 
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     files = ContactMessageFileSerializer(many=True, read_only=True)
 
     class Meta:
@@ -20,19 +92,39 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'email', 'subject', 'message', 'is_read', 'created_at', 'files']
 
 
-class JournalSerializer(serializers.ModelSerializer):
+class ContactMessageBulkSerializer(serializers.Serializer):
+    """Messages selected in the inbox for a bulk action"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    is_read = serializers.BooleanField(required=False, default=True)
+
+
+class JournalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Journal
         fields = '__all__'
 
+    def validate_short_name(self, value):
+        # Stored upper-case (Journal.save), so 'qx' must clash with an existing 'QX' here rather than in the database
+        value = value.strip().upper()
+        journals = Journal.objects.filter(short_name__iexact=value)
+        if self.instance is not None:
+            journals = journals.exclude(pk=self.instance.pk)
+        if journals.exists():
+            raise serializers.ValidationError(f'"{value}" qisqa nomli jurnal allaqachon mavjud')
+        return value
+
+
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField(source='image')
+
+    sparse_sources = {'image_variants': ('image', 'image_variants_of')}
 
-class NewsSerializer(serializers.ModelSerializer):
     class Meta:
         model = News
-        fields = '__all__'
+        exclude = ['image_variants_of']
 
 
-class EditorialBoardMemberSerializer(serializers.ModelSerializer):
+class EditorialBoardMemberSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     journal_name = serializers.CharField(source='journal.name', read_only=True)
     journal_short_name = serializers.CharField(source='journal.short_name', read_only=True)
 
@@ -42,13 +134,13 @@ class EditorialBoardMemberSerializer(serializers.ModelSerializer):
                   'order']
 
 
-class RecentIssueLinkSerializer(serializers.ModelSerializer):
+class RecentIssueLinkSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = RecentIssueLink
         fields = '__all__'
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Author
         fields = '__all__'
@@ -74,7 +166,7 @@ class AuthorSerializer(serializers.ModelSerializer):
         return value
 
 
-class KeywordSerializer(serializers.ModelSerializer):
+class KeywordSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Keyword
         fields = '__all__'
@@ -87,13 +179,13 @@ class KeywordSerializer(serializers.ModelSerializer):
         return value
 
 
-class ArticleTranslationSerializer(serializers.ModelSerializer):
+class ArticleTranslationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ArticleTranslation
         fields = ['language', 'title', 'abstract']
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     authors_read = AuthorSerializer(source='authors', many=True, read_only=True)
     keywords_read = KeywordSerializer(source='keywords', many=True, read_only=True)
     translations = ArticleTranslationSerializer(many=True, read_only=True)
@@ -104,23 +196,26 @@ class ArticleSerializer(serializers.ModelSerializer):
                                                   required=False)
     translations_payload = serializers.CharField(write_only=True, required=False)
 
+    sparse_aliases = {'authors': 'authors_read', 'keywords': 'keywords_read'}
+
     class Meta:
         model = Article
         fields = [
             'id', 'issue', 'doi', 'pages', 'authors', 'authors_read', 'keywords', 'keywords_read',
-            'translations', 'translations_payload', 'references', 'views', 'article_file'
+            'translations', 'translations_payload', 'references', 'views', 'downloads', 'article_file',
+            'page_count', 'file_size'
         ]
+        read_only_fields = ['downloads']
 
     def to_representation(self, instance):
         """Override to return authors_read and keywords_read as authors and keywords in read operations"""
         data = super().to_representation(instance)
-        # Replace the write-only fields with read-only equivalents for output
-        authors_data = data.pop('authors_read', [])
-        keywords_data = data.pop('keywords_read', [])
-
-        # Ensure authors and keywords are properly included
-        data['authors'] = authors_data if authors_data is not None else []
-        data['keywords'] = keywords_data if keywords_data is not None else []
+        # Replace the write-only fields with read-only equivalents for output,
+        # unless a sparse fieldset left them out
+        for name in ('authors', 'keywords'):
+            if f'{name}_read' in data:
+                value = data.pop(f'{name}_read')
+                data[name] = value if value is not None else []
 
         return data
 
@@ -151,43 +246,139 @@ class ArticleSerializer(serializers.ModelSerializer):
         authors_data = validated_data.pop('authors', None)
         keywords_data = validated_data.pop('keywords', None)
         translations_str = validated_data.pop('translations_payload', None)
+        changed = set()
+
+        with transaction.atomic():
+            # Only write the columns whose value actually changed
+            fields = [attr for attr, val in validated_data.items() if getattr(instance, attr) != val]
+            for attr in fields:
+                setattr(instance, attr, validated_data[attr])
+            if fields:
+                instance.save(update_fields=fields)
+                changed.add('fields')
+
+            if authors_data is not None and self._sync_relation(instance.authors, authors_data):
+                changed.add('authors')
+
+            if keywords_data is not None and self._sync_relation(instance.keywords, keywords_data):
+                changed.add('keywords')
+
+            if translations_str is not None:
+                try:
+                    translations_payload = json.loads(translations_str)
+                except json.JSONDecodeError:
+                    translations_payload = None
+                if translations_payload is not None and self._sync_translations(instance, translations_payload):
+                    changed.add('translations')
+
+            if changed:
+                article_changed.send(sender=Article, article=instance, changed=changed)
 
-        for attr, val in validated_data.items():
-            setattr(instance, attr, val)
-        instance.save()
+        return instance
 
-        if authors_data is not None:
-            instance.authors.set(authors_data)
+    @staticmethod
+    def _sync_relation(manager, objects):
+        """Like manager.set(), but reports whether anything was added or removed"""
+        current = set(manager.values_list('pk', flat=True))
+        wanted = {obj.pk for obj in objects}
+        if current - wanted:
+            manager.remove(*(current - wanted))
+        if wanted - current:
+            manager.add(*(wanted - current))
+        return current != wanted
+
+    @staticmethod
+    def _sync_translations(instance, payload):
+        """Upsert translations by language: unchanged rows are left alone, missing languages are deleted"""
+        existing = {t.language: t for t in instance.translations.all()}
+        wanted = {tr['language']: tr for tr in payload}
+        created, updated = [], []
+        for language, tr in wanted.items():
+            translation = existing.get(language)
+            if translation is None:
+                created.append(ArticleTranslation(article=instance, **tr))
+            elif any(getattr(translation, attr) != value for attr, value in tr.items()):
+                for attr, value in tr.items():
+                    setattr(translation, attr, value)
+                updated.append(translation)
+        removed = [t.pk for language, t in existing.items() if language not in wanted]
+
+        if created:
+            ArticleTranslation.objects.bulk_create(created)
+        if updated:
+            ArticleTranslation.objects.bulk_update(updated, ['title', 'abstract'])
+        if removed:
+            ArticleTranslation.objects.filter(pk__in=removed).delete()
+        return bool(created or updated or removed)
+
+
+class IssueSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Issue without the nested article tree, used by list routes"""
+    journal_name = serializers.CharField(source='journal.name', read_only=True)
+    journal_short_name = serializers.CharField(source='journal.short_name', read_only=True)
+    journal_type = serializers.SerializerMethodField()
+    current_status_display = serializers.SerializerMethodField()
+    cover_variants = ImageVariantsField(source='cover_image')
+    # Filled by the `articles_count` annotation in IssueViewSet.get_queryset
+    articles_count = serializers.IntegerField(read_only=True)
 
-        if keywords_data is not None:
-            instance.keywords.set(keywords_data)
+    sparse_sources = {
+        'journal_type': ('journal_type', 'journal'),
+        'current_status_display': ('is_current', 'journal_type', 'journal'),
+        'articles_count': (),
+        'cover_variants': ('cover_image', 'cover_image_variants_of'),
+    }
 
-        if translations_str is not None:
-            try:
-                translations_payload = json.loads(translations_str)
-                instance.translations.all().delete()
-                for tr in translations_payload:
-                    ArticleTranslation.objects.create(article=instance, **tr)
-            except json.JSONDecodeError:
-                pass
+    class Meta:
+        model = Issue
+        fields = ['id', 'journal', 'journal_name', 'journal_short_name', 'journal_type', 'title', 'cover_image',
+                  'cover_variants', 'pdf_file', 'page_count', 'file_size', 'published_date', 'is_current',
+                  'current_status_display', 'articles_count']
 
-        return instance
+    # Columns read by lean_representation()
+    values_fields = ('id', 'journal', 'journal__name', 'journal__short_name', 'journal_type', 'title', 'cover_image',
+                     'cover_image_variants_of', 'pdf_file', 'page_count', 'file_size', 'published_date', 'is_current',
+                     'articles_count')
 
+    def get_journal_type(self, obj):
+        return obj.journal_type or obj.journal.short_name
+
+    def get_current_status_display(self, obj):
+        if obj.is_current:
+            return f"Joriy nashr ({self.get_journal_type(obj)})"
+        return "Joriy emas"
 
-class IssueSerializer(serializers.ModelSerializer):
+    @classmethod
+    def lean_representation(cls, rows, request=None):
+        """The serializer's output built straight from `.values(*values_fields)` rows, without model instances"""
+        serializer = cls(context={'request': request})
+        readers = [(name, lean_reader(serializer, field)) for name, field in serializer.fields.items()]
+        return [{name: read(row) for name, read in readers} for row in rows]
+
+
+class IssueSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     articles = ArticleSerializer(many=True, read_only=True)
     journal_name = serializers.CharField(source='journal.name', read_only=True)
     journal_short_name = serializers.CharField(source='journal.short_name', read_only=True)
     current_status_display = serializers.SerializerMethodField()
     journal_type_display = serializers.CharField(source='get_journal_type_display', read_only=True)
+    cover_variants = ImageVariantsField(source='cover_image')
     # Add fallback for journal_type if it's missing
     journal_type = serializers.SerializerMethodField()
 
+    sparse_sources = {
+        'journal_type': ('journal_type', 'journal'),
+        'journal_type_display': ('journal_type',),
+        'current_status_display': ('is_current', 'journal_type', 'journal'),
+        'cover_variants': ('cover_image', 'cover_image_variants_of'),
+    }
+
     class Meta:
         model = Issue
         fields = ['id', 'journal', 'journal_name', 'journal_short_name', 'journal_type', 'journal_type_display',
-                  'title', 'cover_image', 'pdf_file', 'published_date', 'is_current', 'current_status_display',
-                  'articles']
+                  'title', 'cover_image', 'cover_variants', 'pdf_file', 'page_count', 'file_size', 'published_date',
+                  'is_current', 'current_status_display', 'downloads', 'articles']
+        read_only_fields = ['downloads']
 
     def get_journal_type(self, obj):
         # Return journal_type if set, otherwise fallback to journal.short_name
@@ -236,4 +427,99 @@ class IssueSerializer(serializers.ModelSerializer):
         # Ensure journal_type is set
         if 'journal_type' not in validated_data and 'journal' in validated_data:
             validated_data['journal_type'] = validated_data['journal'].short_name
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+class UploadSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    sparse_sources = {'chunk_size': ()}
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'target', 'object_id', 'filename', 'size', 'checksum', 'received', 'status', 'chunk_size',
+                  'created_at']
+        read_only_fields = ['received', 'status', 'created_at']
+
+    def get_chunk_size(self, obj):
+        return max_chunk_size()
+
+    def validate_filename(self, value):
+        value = os.path.basename(value.strip())
+        if not value.lower().endswith('.pdf'):
+            raise serializers.ValidationError("Faqat PDF fayl yuklash mumkin")
+        return value
+
+    def validate_size(self, value):
+        limit = 100 * 1024 * 1024  # validate_file_size bilan bir xil
+        if value <= 0 or value > limit:
+            raise serializers.ValidationError(f'Fayl hajmi {limit / (1024 * 1024):.0f} MB dan oshmasligi kerak.')
+        return value
+
+    def validate_checksum(self, value):
+        value = value.strip().lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError("Checksum SHA-256 hex ko'rinishida bo'lishi kerak")
+        return value
+
+    def validate(self, data):
+        model, _ = TARGETS[data['target']]
+        if not model.objects.filter(pk=data['object_id']).exists():
+            raise serializers.ValidationError({'object_id': "Bunday obyekt topilmadi"})
+        return data
+
+
+class ImportAuthorSerializer(serializers.Serializer):
+    last_name = serializers.CharField(max_length=100)
+    first_name = serializers.CharField(max_length=100)
+    patronymic = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    orcid_id = serializers.CharField(max_length=25, required=False, allow_blank=True, default='')
+    organization = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    position = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    validate_orcid_id = AuthorSerializer.validate_orcid_id
+
+
+class StoredFileField(serializers.CharField):
+    """Name of a file already in the storage of a model file field, e.g. articles/maqola.pdf"""
+
+    def __init__(self, model_field, **kwargs):
+        self.storage = model_field.storage
+        kwargs.setdefault('max_length', model_field.max_length)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        name = super().to_internal_value(data)
+        if name and not self.storage.exists(name):
+            raise serializers.ValidationError(f"Fayl topilmadi: {name}")
+        return name
+
+
+class ImportArticleSerializer(serializers.Serializer):
+    pages = serializers.CharField(max_length=50)
+    doi = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    references = serializers.CharField(required=False, allow_blank=True, default='')
+    article_file = StoredFileField(Article._meta.get_field('article_file'), required=False, allow_blank=True,
+                                   default='')
+    authors = ImportAuthorSerializer(many=True)
+    keywords = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    translations = ArticleTranslationSerializer(many=True)
+
+    def validate_translations(self, value):
+        languages = [t['language'] for t in value]
+        if len(languages) != len(set(languages)):
+            raise serializers.ValidationError("Har bir til uchun bitta tarjima bo'lishi kerak")
+        return value
+
+
+class IssueImportSerializer(serializers.Serializer):
+    """Manifest of a whole issue for the bulk import, see api/importer.py"""
+    journal = serializers.SlugRelatedField(slug_field='short_name', queryset=Journal.objects.all())
+    journal_type = serializers.ChoiceField(choices=Issue.JOURNAL_TYPE_CHOICES, required=False)
+    title = serializers.CharField(max_length=255)
+    published_date = serializers.DateField()
+    is_current = serializers.BooleanField(required=False, default=False)
+    # Required by the model: bulk inserts skip its validation, so they are checked here
+    cover_image = StoredFileField(Issue._meta.get_field('cover_image'))
+    pdf_file = StoredFileField(Issue._meta.get_field('pdf_file'))
+    articles = ImportArticleSerializer(many=True, allow_empty=False)
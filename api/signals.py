@@ -0,0 +1,203 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from .models import (
+    ContactMessage, Journal, News, EditorialBoardMember, RecentIssueLink, Issue, Article, ArticleTranslation, Author, Keyword
+)
+from .cache import schedule_invalidation
+from .documents import schedule_extraction
+from .images import delete_variants, has_variants, schedule_variants
+from .search import schedule_reindex
+from .tasks import enqueue, notify_contact_message
+from .uploads import TARGETS
+from . import toc, versioning
+
+# Sent once per edit of an article, after its rows are written, with `article` and `changed`:
+# the set of parts that changed, out of 'fields', 'authors', 'keywords' and 'translations'.
+# Bulk writes send no model signals, so caches and indexes listen to this one.
+article_changed = Signal()
+
+# Models whose changes invalidate the ETag of the read endpoints
+VERSIONED_MODELS = (
+    Journal, News, EditorialBoardMember, RecentIssueLink, Issue, Article, ArticleTranslation, Author, Keyword
+)
+
+
+def bump_content_version(sender, **kwargs):
+    versioning.bump(sender._meta.model_name)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_content_version, sender=model, dispatch_uid=f'save-version-{model._meta.model_name}')
+    post_delete.connect(bump_content_version, sender=model, dispatch_uid=f'delete-version-{model._meta.model_name}')
+
+
+@receiver(m2m_changed, sender=Article.authors.through)
+@receiver(m2m_changed, sender=Article.keywords.through)
+def bump_article_version(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versioning.bump(Article._meta.model_name)
+
+
+def articles_touched(article_ids, issue_ids=()):
+    """Propagate a change of the given articles to the search index, the payload cache and the issue TOCs"""
+    article_ids = [pk for pk in article_ids if pk is not None]
+    schedule_reindex(article_ids)
+    schedule_invalidation(articles=article_ids, issues=issue_ids)
+    toc.schedule_rebuild(articles=article_ids, issues=issue_ids)
+
+
+@receiver(pre_save, sender=Article)
+def remember_article_issue(sender, instance, raw=False, **kwargs):
+    # An article moved to another issue must also leave the old issue's cached payload
+    if instance.pk and not raw:
+        instance._previous_issue_id, instance._previous_file = Article.objects.filter(pk=instance.pk).values_list(
+            'issue_id', 'article_file').first() or (None, None)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_saved(sender, instance, **kwargs):
+    articles_touched([instance.pk], [instance.issue_id, getattr(instance, '_previous_issue_id', None)])
+
+
+@receiver(article_changed)
+def article_edited(sender, article, changed, **kwargs):
+    if 'translations' in changed:
+        versioning.bump(ArticleTranslation._meta.model_name)
+    articles_touched([article.pk], [article.issue_id])
+
+
+@receiver(post_save, sender=ArticleTranslation)
+@receiver(post_delete, sender=ArticleTranslation)
+def translation_saved(sender, instance, **kwargs):
+    articles_touched([instance.article_id])
+
+
+@receiver(m2m_changed, sender=Article.authors.through)
+@receiver(m2m_changed, sender=Article.keywords.through)
+def article_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            articles_touched([instance.pk])
+    elif action == 'pre_clear':
+        # author.articles.clear() carries no pk_set, remember the ids before the rows go
+        instance._linked_article_ids = article_ids_for(instance)
+    elif action == 'post_clear':
+        articles_touched(getattr(instance, '_linked_article_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        articles_touched(pk_set)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Keyword)
+def related_entity_saved(sender, instance, created, **kwargs):
+    if not created:
+        articles_touched(article_ids_for(instance))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Keyword)
+def related_entity_deleting(sender, instance, **kwargs):
+    # The through rows are removed by the cascade without m2m_changed, keep the ids for post_delete
+    instance._linked_article_ids = article_ids_for(instance)
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Keyword)
+def related_entity_deleted(sender, instance, **kwargs):
+    articles_touched(getattr(instance, '_linked_article_ids', []))
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def issue_saved(sender, instance, **kwargs):
+    schedule_invalidation(issues=[instance.pk, *getattr(instance, '_demoted_ids', ())])
+
+
+@receiver(post_save, sender=Journal)
+def journal_saved(sender, instance, created, **kwargs):
+    # Issue payloads embed the journal name
+    if not created:
+        schedule_invalidation(issues=instance.issues.values_list('pk', flat=True))
+
+
+# Image fields that get resized renditions, see api/images.py
+IMAGE_FIELDS = {
+    Issue: 'cover_image',
+    News: 'image',
+}
+
+
+def remember_image(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_image = sender.objects.filter(pk=instance.pk).values_list(
+            IMAGE_FIELDS[sender], flat=True).first()
+
+
+def build_image_variants(sender, instance, update_fields=None, raw=False, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if raw or (update_fields is not None and field_name not in update_fields):
+        return
+    field_file = getattr(instance, field_name)
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != field_file.name:
+        # The renditions of a replaced image are never served again
+        storage = field_file.storage
+        transaction.on_commit(lambda: delete_variants(storage, previous))
+    if field_file and not has_variants(field_file):
+        schedule_variants(instance, field_name)
+
+
+def remove_image_variants(sender, instance, **kwargs):
+    field_file = getattr(instance, IMAGE_FIELDS[sender])
+    if field_file:
+        delete_variants(field_file.storage, field_file.name)
+
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(remember_image, sender=model, dispatch_uid=f'variants-pre-{model._meta.model_name}')
+    post_save.connect(build_image_variants, sender=model, dispatch_uid=f'variants-{model._meta.model_name}')
+    post_delete.connect(remove_image_variants, sender=model, dispatch_uid=f'variants-del-{model._meta.model_name}')
+
+
+# PDF fields whose page count, size and text are extracted in the background, see api/documents.py
+DOCUMENT_TARGETS = {Issue: 'issue', Article: 'article'}
+
+
+@receiver(pre_save, sender=Issue)
+def remember_issue_file(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_file = Issue.objects.filter(pk=instance.pk).values_list('pdf_file', flat=True).first()
+
+
+def extract_document(sender, instance, update_fields=None, raw=False, **kwargs):
+    target = DOCUMENT_TARGETS[sender]
+    field_name = TARGETS[target][1]
+    if raw or (update_fields and field_name not in update_fields):
+        return
+    if (getattr(instance, '_previous_file', None) or '') != (getattr(instance, field_name).name or ''):
+        schedule_extraction(target, instance.pk)
+
+
+for model in DOCUMENT_TARGETS:
+    post_save.connect(extract_document, sender=model, dispatch_uid=f'document-{model._meta.model_name}')
+
+
+@receiver(post_save, sender=ContactMessage)
+def contact_message_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Attachments are uploaded with separate requests right after, give them time to arrive
+        delay = timedelta(seconds=getattr(settings, 'API_CONTACT_NOTIFY_DELAY', 120))
+        enqueue(notify_contact_message, delay=delay, message_id=instance.pk)
+
+
+def article_ids_for(instance):
+    """Ids of the articles linked to an Author or Keyword"""
+    through = Article.authors.through if isinstance(instance, Author) else Article.keywords.through
+    field = 'author_id' if isinstance(instance, Author) else 'keyword_id'
+    return list(through.objects.filter(**{field: instance.pk}).values_list('article_id', flat=True))
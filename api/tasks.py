@@ -0,0 +1,195 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import mail_admins
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, ContactMessage, ContactMessageFile
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name=None, max_attempts=3):
+    """Register a function as a background job, it receives the job payload as keyword arguments"""
+    def decorator(func):
+        job_name = name or f'{func.__module__}.{func.__name__}'
+        func.job_name = job_name
+        func.max_attempts = max_attempts
+        _registry[job_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, delay=None, **payload):
+    """Queue `func(**payload)`; the row is written in the caller's transaction.
+
+    With API_TASKS_EAGER the job runs in-process right after the commit,
+    which is handy for local development without a worker. Delays and
+    retries are still honoured, with a timer thread.
+    """
+    job = Job.objects.create(
+        name=func.job_name, payload=payload, max_attempts=func.max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+    if getattr(settings, 'API_TASKS_EAGER', False):
+        transaction.on_commit(lambda: _run_eager(job.pk, job.run_after))
+    return job
+
+
+def _run_eager(pk, run_after):
+    """Run a job in-process once it is due, and again after each retry delay while it fails"""
+    wait = (run_after - timezone.now()).total_seconds()
+    if wait > 0:
+        timer = threading.Timer(wait, _run_eager_in_thread, args=(pk,))
+        timer.daemon = True
+        timer.start()
+        return
+    job = run_job(claim(pk))
+    if job is not None and job.status == 'queued':
+        _run_eager(pk, job.run_after)
+
+
+def _run_eager_in_thread(pk):
+    try:
+        _run_eager(pk, timezone.now())
+    finally:
+        # The timer thread opened its own connection
+        connections.close_all()
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(pk, worker=None):
+    """Move a queued job to running; the conditional UPDATE makes it safe between workers"""
+    updated = Job.objects.filter(pk=pk, status='queued').update(
+        status='running', locked_by=worker or worker_id(), locked_at=timezone.now(), attempts=F('attempts') + 1)
+    return Job.objects.get(pk=pk) if updated else None
+
+
+def claim_next(worker=None):
+    """Claim the oldest job that is due, None when the queue is empty"""
+    while True:
+        pk = Job.objects.filter(status='queued', run_after__lte=timezone.now()).order_by(
+            'run_after', 'id').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        job = claim(pk, worker)
+        if job is not None:
+            return job
+        # Another worker took it first, try the next one
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'API_TASKS_RETRY_DELAY', 30)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome, failed jobs are retried with exponential backoff"""
+    if job is None:
+        return None
+    func = _registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown job: {job.name}')
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = 'failed'
+            logger.error('Job %s #%s failed after %d attempts', job.name, job.pk, job.attempts)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'run_after', 'last_error', 'locked_by', 'locked_at', 'updated_at'])
+    return job
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs whose worker died while running them, returns how many were requeued.
+
+    A job that has used all its attempts is marked failed instead: it may be
+    the one crashing the workers.
+    """
+    timeout = timeout or getattr(settings, 'API_TASKS_STALE_TIMEOUT', 30 * 60)
+    stale = Job.objects.filter(status='running', locked_at__lt=timezone.now() - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_at=None, last_error="Worker vazifani bajarayotganda to'xtab qoldi")
+    if failed:
+        logger.error('%d stale jobs failed after their last attempt', failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(status='queued', locked_by='', locked_at=None)
+
+
+def run_pending(worker=None, limit=None):
+    """Run due jobs until the queue is empty (or `limit` jobs ran), returns the number executed"""
+    worker = worker or worker_id()
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+@task(max_attempts=5)
+def notify_contact_message(message_id):
+    """E-mail the editors about a new contact form message"""
+    message = ContactMessage.objects.filter(pk=message_id).prefetch_related('files').first()
+    if message is None:
+        return
+    files = '\n'.join(f'- {f.file.name}' for f in message.files.all())
+    mail_admins(
+        f"Yangi xabar: {message.subject}",
+        f"{message.name} <{message.email}>\n\n{message.message}" + (f"\n\nFayllar:\n{files}" if files else ''),
+        fail_silently=False,
+    )
+
+
+@task()
+def delete_stored_files(names):
+    """Remove files whose rows were deleted in bulk (no model signals run for those)"""
+    storage = ContactMessageFile._meta.get_field('file').storage
+    for name in names:
+        storage.delete(name)
+
+
+@task(max_attempts=1)
+def purge_contact_attachments(days=None, batch_size=None):
+    """Delete contact form attachments older than `days` from disk and the database, in batches.
+
+    The files of a batch are removed before its rows, so a batch interrupted
+    half-way is picked up again by the next run. Returns the number purged.
+    """
+    days = days if days is not None else getattr(settings, 'API_CONTACT_ATTACHMENT_RETENTION_DAYS', 365)
+    batch_size = batch_size or getattr(settings, 'API_CONTACT_PURGE_BATCH_SIZE', 500)
+    cutoff = timezone.now() - timedelta(days=days)
+    storage = ContactMessageFile._meta.get_field('file').storage
+    total = 0
+    while True:
+        batch = list(ContactMessageFile.objects.filter(uploaded_at__lt=cutoff).order_by(
+            'uploaded_at', 'id').values_list('pk', 'file')[:batch_size])
+        if not batch:
+            return total
+        for _, name in batch:
+            if name:
+                storage.delete(name)
+        ContactMessageFile.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        total += len(batch)
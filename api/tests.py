@@ -1,3 +1,1384 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.apps import apps as django_apps
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle
+
+from . import benchmark, db, documents, export, renderers, tasks, uploads, views
+from . import cache as payload_cache
+from .async_views import async_read_view
+from .documents import extract_file_text, normalize_text
+from .images import generate_image_variants, has_variants, variant_name
+from .counters import COUNTERS, BatchedCounter, article_views, client_ip, issue_downloads
+from .models import (
+    ArticleFullText, ContactMessage, ContactMessageFile, Job, Journal, Issue, Author, Keyword, Article,
+    ArticleTranslation, EditorialBoardMember, News, RecentIssueLink, UploadSession
+)
+from .serializers import ArticleSerializer
+from .signals import article_changed
+from .transactions import collect_on_commit
+
+
+def create_catalogue(issues=3, articles_per_issue=5):
+    """Seed a small catalogue where every article has authors, keywords and translations"""
+    journal = Journal.objects.create(name='Qishloq xo\'jaligi', short_name='QX')
+    authors = [Author.objects.create(last_name=f'Familiya{i}', first_name=f'Ism{i}') for i in range(3)]
+    keywords = [Keyword.objects.create(name=f'kalit{i}') for i in range(3)]
+    for i in range(issues):
+        issue = Issue.objects.create(
+            journal=journal, journal_type='QX', title=f'{i + 1}-son', cover_image='covers/cover.png',
+            pdf_file='issues/issue.pdf', published_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=30 * i),
+            is_current=(i == issues - 1),
+        )
+        for n in range(articles_per_issue):
+            article = Article.objects.create(issue=issue, pages=f'{n * 10 + 1}-{n * 10 + 9}')
+            article.authors.set(authors)
+            article.keywords.set(keywords)
+            for language in ('uz', 'ru', 'en'):
+                ArticleTranslation.objects.create(article=article, language=language, title=f'Maqola {n}',
+                                                  abstract='Annotatsiya')
+    EditorialBoardMember.objects.create(journal=journal, full_name='F.I.O', position_description='-',
+                                        role='hayat_azosi')
+    return journal
+
+
+def make_pdf(pages):
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+class APITestCase(TestCase):
+
+    def setUp(self):
+        # Cached payloads would survive the rolled back test data otherwise
+        cache.clear()
+        # Hits buffered by earlier tests are written (and rolled back) here instead of leaking into this one
+        self.flush_counters()
+        # Nor into the development database, which the exit-time flush would write them to
+        self.addCleanup(self.flush_counters)
+        self.client = APIClient()
+
+    def flush_counters(self):
+        for counter in COUNTERS:
+            counter.flush()
+
+
+class QueryCountTests(APITestCase):
+    """Caps the number of queries per endpoint so N+1 regressions fail the suite"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue()
+
+    def tearDown(self):
+        # Write buffered article views inside the test transaction, not at interpreter exit
+        article_views.flush()
+
+    def assertQueries(self, url, num):
+        # Plus the ContentVersion lookup that produces the ETag
+        with self.assertNumQueries(num + 1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_issue_list(self):
+        self.assertQueries('/api/issues/', 1)
+
+    def test_issue_list_expanded(self):
+        # issues + articles + authors + keywords + translations
+        self.assertQueries('/api/issues/?expand=articles', 5)
+
+    def test_issue_detail(self):
+        self.assertQueries(f'/api/issues/{Issue.objects.first().pk}/', 5)
+
+    def test_current_issues(self):
+        self.assertQueries('/api/issues/current-issues/', 1)
+
+    def test_current_by_type(self):
+        # Current issue id lookup, then the cold payload: issue + 4 prefetches
+        response = self.assertQueries('/api/issues/current-by-type/qx/', 6)
+        self.assertEqual(len(response.data['articles']), 5)
+
+    def test_by_journal_type(self):
+        self.assertQueries('/api/issues/by-journal-type/qx/', 1)
+
+    def test_article_list(self):
+        issue = Issue.objects.first()
+        self.assertQueries(f'/api/articles/?issue={issue.pk}', 4)
+
+    def test_article_detail(self):
+        self.assertQueries(f'/api/articles/{Article.objects.first().pk}/', 4)
+
+    def test_board_members(self):
+        self.assertQueries('/api/board-members/?journal=qx', 1)
+
+
+class IssueSummaryTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=2, articles_per_issue=3)
+
+    def test_list_routes_return_summaries(self):
+        for url in ('/api/issues/', '/api/issues/current-issues/', '/api/issues/by-journal-type/qx/'):
+            with self.subTest(url=url):
+                data = self.client.get(url).data
+                issues = data['results'] if isinstance(data, dict) else data
+                self.assertTrue(issues)
+                for issue in issues:
+                    self.assertNotIn('articles', issue)
+                    self.assertEqual(issue['articles_count'], 3)
+
+    def test_expand_articles(self):
+        for expand in ('articles', 'authors, articles'):
+            with self.subTest(expand=expand):
+                issues = self.client.get('/api/issues/', {'expand': expand}).data['results']
+                self.assertEqual([len(issue['articles']) for issue in issues], [3, 3])
+                self.assertIn('references', issues[0]['articles'][0])
+        issues = self.client.get('/api/issues/', {'expand': 'articles_count'}).data['results']
+        self.assertNotIn('articles', issues[0])
+
+    def test_detail_always_has_the_articles(self):
+        data = self.client.get(f'/api/issues/{Issue.objects.first().pk}/').data
+        self.assertEqual(len(data['articles']), 3)
+
+
+class ConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=1, articles_per_issue=1)
+
+    def test_not_modified_skips_serialization(self):
+        etag = self.client.get('/api/issues/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/issues/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_content(self):
+        etag = self.client.get('/api/issues/')['ETag']
+        Keyword.objects.first().save()
+        response = self.client.get('/api/issues/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        self.assertNotEqual(self.client.get('/api/issues/')['ETag'],
+                            self.client.get('/api/issues/?expand=articles')['ETag'])
+
+    def test_revalidated_article_counts_as_a_view(self):
+        article = Article.objects.get()
+        url = f'/api/articles/{article.pk}/'
+        etag = self.client.get(url)['ETag']
+        other = APIClient(HTTP_USER_AGENT='boshqa brauzer')
+        self.assertEqual(other.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(article_views.pending(), {article.pk: 2})
+
+        # The flushed count changes the response, so the old ETag must stop matching
+        article_views.flush()
+        response = other.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['views']), (200, 2))
+
+    def test_counters_only_revalidate_detail_views(self):
+        article = Article.objects.get()
+        detail_etag = self.client.get(f'/api/articles/{article.pk}/')['ETag']
+        list_etags = {url: self.client.get(url)['ETag'] for url in ('/api/articles/', '/api/issues/', '/api/home/')}
+        article_views.flush()
+        self.assertNotEqual(self.client.get(f'/api/articles/{article.pk}/')['ETag'], detail_etag)
+        for url, etag in list_etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+        article_views.flush()
+
+
+class ArticleSearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_catalogue(issues=1, articles_per_issue=2)
+            self.article = Article.objects.first()
+            self.article.translations.filter(language='en').update(title='Soil salinity in irrigated fields')
+            translation = self.article.translations.get(language='en')
+            translation.save()
+
+    def test_search_ranks_and_highlights(self):
+        response = self.client.get('/api/articles/search/?q=salin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        hit = response.data['results'][0]
+        self.assertEqual(hit['id'], self.article.pk)
+        self.assertEqual(hit['search']['language'], 'en')
+        self.assertIn('<mark>salinity</mark>', hit['search']['title'])
+
+    def test_index_follows_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        self.assertEqual(self.client.get('/api/articles/search/?q=salinity').data['count'], 0)
+
+    def test_author_names_are_indexed(self):
+        response = self.client.get('/api/articles/search/?q=Familiya1')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_empty_query(self):
+        self.assertEqual(self.client.get('/api/articles/search/?q=').status_code, 400)
+
+
+class PayloadCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=1, articles_per_issue=2)
+
+    def test_issue_detail_is_cached(self):
+        issue = Issue.objects.get()
+        self.client.get(f'/api/issues/{issue.pk}/')
+        # The ETag version lookup and the current download/view counters remain
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/issues/{issue.pk}/')
+        self.assertEqual(len(response.data['articles']), 2)
+
+    def test_unknown_pks_leave_no_cache_keys(self):
+        backend = payload_cache.get_cache()
+        for pk in ('999999', '9' * 300):
+            self.assertEqual(self.client.get(f'/api/articles/{pk}/').status_code, 404)
+            self.assertIsNone(backend.get(payload_cache._version_key('article', pk)))
+
+    def test_cached_hit_respects_the_queryset_filters(self):
+        issue = Issue.objects.get()
+        article = issue.articles.first()
+        self.assertEqual(self.client.get(f'/api/articles/{article.pk}/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/articles/{article.pk}/?issue={issue.pk + 1}').status_code, 404)
+        article.delete()
+        self.assertEqual(self.client.get(f'/api/articles/{article.pk}/').status_code, 404)
+
+    def test_equivalent_fieldsets_share_one_cache_entry(self):
+        article = Article.objects.first()
+        self.client.get(f'/api/articles/{article.pk}/?fields=doi,pages')
+        for query in ('fields=pages,doi,doi', 'fields=doi,pages,bogus,nope.x'):
+            with mock.patch.object(ArticleSerializer, 'to_representation', side_effect=AssertionError('rebuilt')):
+                response = self.client.get(f'/api/articles/{article.pk}/?{query}')
+            self.assertEqual(set(response.data), {'id', 'doi', 'pages'})
+
+    def test_counters_are_current_without_evicting_the_payload(self):
+        issue = Issue.objects.get()
+        article = issue.articles.first()
+        self.client.get(f'/api/issues/{issue.pk}/')
+        self.client.get(f'/api/articles/{article.pk}/')
+        Article.objects.filter(pk=article.pk).update(views=7, downloads=3)
+        Issue.objects.filter(pk=issue.pk).update(downloads=5)
+        with self.assertNumQueries(2):
+            data = self.client.get(f'/api/articles/{article.pk}/').data
+        self.assertEqual((data['views'], data['downloads']), (7, 3))
+        data = self.client.get(f'/api/issues/{issue.pk}/').data
+        self.assertEqual(data['downloads'], 5)
+        self.assertEqual([a['views'] for a in data['articles'] if a['id'] == article.pk], [7])
+        article_views.flush()
+
+    def test_translation_change_invalidates_issue_and_article(self):
+        issue = Issue.objects.get()
+        article = issue.articles.first()
+        self.client.get(f'/api/issues/{issue.pk}/')
+        self.client.get(f'/api/articles/{article.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            translation = article.translations.get(language='en')
+            translation.title = 'Yangi nom'
+            translation.save()
+        issue_data = self.client.get(f'/api/issues/{issue.pk}/').data
+        titles = [t['title'] for a in issue_data['articles'] for t in a['translations']]
+        self.assertIn('Yangi nom', titles)
+        article_data = self.client.get(f'/api/articles/{article.pk}/').data
+        self.assertIn('Yangi nom', [t['title'] for t in article_data['translations']])
+
+    def test_set_current_invalidates_the_demoted_issue(self):
+        journal = Journal.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            old, new = (Issue.objects.create(
+                journal=journal, journal_type='AI', title=title, cover_image='c.png', pdf_file='i.pdf',
+                published_date=datetime.date(2025, 1, 1), is_current=title == '1-son') for title in ('1-son', '2-son'))
+        self.assertTrue(self.client.get(f'/api/issues/{old.pk}/').data['is_current'])
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f'/api/issues/{new.pk}/set-current/').status_code, 200)
+        self.assertFalse(self.client.get(f'/api/issues/{old.pk}/').data['is_current'])
+
+
+class CounterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        create_catalogue(issues=1, articles_per_issue=2)
+        self.article = Article.objects.first()
+        self.counter = BatchedCounter('api.Article', 'views', flush_threshold=3, dedup_window=60)
+        # The flusher thread has its own connection and wouldn't see the test transaction
+        patcher = mock.patch.object(self.counter, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_hits_of_a_client_count_once(self):
+        self.counter.hit(self.article.pk, 'a')
+        self.counter.hit(self.article.pk, 'a')
+        self.counter.hit(self.article.pk, 'b')
+        self.assertEqual(self.counter.pending(), {self.article.pk: 2})
+
+    def test_threshold_wakes_the_flusher(self):
+        self.counter.hit(self.article.pk, 'a')
+        self.counter.hit(self.article.pk, 'b')
+        self.assertFalse(self.counter._wakeup.is_set())
+        self.counter.hit(self.article.pk, 'c')
+        self.assertTrue(self.counter._wakeup.is_set())
+
+    def test_flush_adds_to_the_stored_value(self):
+        other = Article.objects.exclude(pk=self.article.pk).get()
+        for client in 'ab':
+            self.counter.hit(self.article.pk, client)
+        self.counter.hit(other.pk, 'a')
+        # Written concurrently by another process, F() keeps both
+        Article.objects.filter(pk=self.article.pk).update(views=10)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.counter.flush(), 3)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).views, 12)
+        self.assertEqual(Article.objects.get(pk=other.pk).views, 1)
+        self.assertEqual(self.counter.pending(), {})
+
+    def test_not_modified_article_counts_a_view(self):
+        url = f'/api/articles/{self.article.pk}/'
+        etag = self.client.get(url)['ETag']
+        response = APIClient(HTTP_USER_AGENT='boshqa').get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertEqual(article_views.pending(), {self.article.pk: 2})
+        # Lists don't count views, revalidated or not
+        list_etag = self.client.get('/api/articles/')['ETag']
+        self.assertEqual(self.client.get('/api/articles/', HTTP_IF_NONE_MATCH=list_etag).status_code, 304)
+        self.assertEqual(article_views.pending(), {self.article.pk: 2})
+        article_views.flush()
+
+    def test_flushed_views_change_the_article_etag(self):
+        url = f'/api/articles/{self.article.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(article_views.flush(), 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['views']), (200, 1))
+        self.assertNotEqual(response['ETag'], etag)
+        # The same client inside the window: no new hit, nothing to flush, the new ETag holds
+        self.assertEqual(article_views.flush(), 0)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_forwarded_for_needs_a_trusted_proxy(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with override_settings(API_TRUSTED_PROXIES=['10.0.0.1']):
+            self.assertEqual(client_ip(request), '2.2.2.2')
+
+
+class DownloadTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        create_catalogue(issues=1, articles_per_issue=1)
+        self.issue = Issue.objects.get()
+        self.issue.pdf_file.save('nashr.pdf', ContentFile(b'%PDF-' + bytes(range(256)) * 4))
+        self.url = f'/api/issues/{self.issue.pk}/download/'
+
+    def tearDown(self):
+        issue_downloads.flush()
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(self.content(response)), 1029)
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 5-9/1029')
+        self.assertEqual(self.content(response), bytes(range(5)))
+
+    def test_suffix_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(self.content(response), bytes([252, 253, 254, 255]))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1029')
+
+    def test_downloads_are_counted_once_per_client(self):
+        self.content(self.client.get(self.url))
+        self.content(self.client.get(self.url, HTTP_RANGE='bytes=0-99'))
+        self.content(self.client.get(self.url, HTTP_RANGE='bytes=100-199'))
+        issue_downloads.flush()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.downloads, 1)
+
+    def test_head_is_not_a_download(self):
+        for offload in (None, 'x-accel-redirect'):
+            with self.subTest(offload=offload), override_settings(API_FILE_OFFLOAD=offload):
+                self.assertEqual(self.client.head(self.url).status_code, 200)
+        issue_downloads.flush()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.downloads, 0)
+
+    def test_if_range(self):
+        validators = self.client.get(self.url)
+        for if_range, status in ((validators['ETag'], 206), (validators['Last-Modified'], 206),
+                                 ('"eski"', 200), ('Wed, 01 Jan 2020 00:00:00 GMT', 200), ('W/"x"', 200)):
+            with self.subTest(if_range=if_range):
+                response = self.client.get(self.url, HTTP_RANGE='bytes=5-9', HTTP_IF_RANGE=if_range)
+                self.assertEqual(response.status_code, status)
+
+    def test_errors_are_json(self):
+        response = self.client.get(f'/api/issues/{self.issue.pk + 1}/download/', HTTP_ACCEPT='*/*')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', json.loads(response.content))
+
+    @override_settings(API_FILE_OFFLOAD='x-accel-redirect', API_FILE_OFFLOAD_LOCATION='/protected/')
+    def test_nginx_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.issue.pdf_file.name}')
+        self.assertEqual(response.content, b'')
+
+
+class ChunkedUploadTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, API_UPLOAD_TEMP_DIR=f'{self.media_root}/tmp', API_UPLOAD_CHUNK_SIZE=1024)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        create_catalogue(issues=1, articles_per_issue=1)
+        self.issue = Issue.objects.get()
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        self.payload = b'%PDF-' + bytes(range(256)) * 10
+
+    def start(self, **extra):
+        data = {'target': 'issue', 'object_id': self.issue.pk, 'filename': 'katta.pdf', 'size': len(self.payload),
+                'checksum': hashlib.sha256(self.payload).hexdigest(), **extra}
+        response = self.client.post('/api/uploads/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def put_chunk(self, session_id, offset, chunk, **headers):
+        return self.client.generic('PUT', f'/api/uploads/{session_id}/chunk/?offset={offset}', chunk,
+                                   content_type='application/octet-stream', **headers)
+
+    def test_upload_in_chunks(self):
+        session_id = self.start()
+        for offset in range(0, len(self.payload), 1024):
+            chunk = self.payload[offset:offset + 1024]
+            response = self.put_chunk(session_id, offset, chunk,
+                                      HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest())
+            self.assertEqual(response.status_code, 200, response.data)
+        response = self.client.post(f'/api/uploads/{session_id}/finalize/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.issue.refresh_from_db()
+        with self.issue.pdf_file.open('rb') as f:
+            self.assertEqual(f.read(), self.payload)
+
+    def test_out_of_order_chunk_is_rejected(self):
+        session_id = self.start()
+        response = self.put_chunk(session_id, 1024, self.payload[1024:2048])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 0)
+
+    def test_corrupt_chunk_can_be_resent(self):
+        session_id = self.start()
+        response = self.put_chunk(session_id, 0, self.payload[:1024], HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        response = self.put_chunk(session_id, 0, self.payload[:1024])
+        self.assertEqual(response.data['received'], 1024)
+
+    def test_a_chunk_is_written_once(self):
+        session_id = self.start()
+        stale = UploadSession.objects.get(pk=session_id)
+        self.assertEqual(self.put_chunk(session_id, 0, self.payload[:1024]).status_code, 200)
+        # A request that read the session before the first one recorded its chunk
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.write_chunk(stale, BytesIO(b'x' * 1024), 0, 1024)
+        self.assertEqual((raised.exception.status, stale.received), (409, 1024))
+        with open(uploads.temp_path(stale), 'rb') as part:
+            self.assertEqual(part.read(), self.payload[:1024])
+
+    @skipUnless(uploads.fcntl, 'fcntl is not available')
+    def test_chunk_of_a_session_being_written_is_refused(self):
+        session_id = self.start()
+        session = UploadSession.objects.get(pk=session_id)
+        with open(uploads.temp_path(session), 'r+b') as part:
+            # Another request holds the part file while it streams a chunk
+            uploads.fcntl.flock(part, uploads.fcntl.LOCK_EX)
+            response = self.put_chunk(session_id, 0, self.payload[:1024])
+        self.assertEqual((response.status_code, response.data['received']), (409, 0))
+        self.assertEqual(self.put_chunk(session_id, 0, self.payload[:1024]).status_code, 200)
+
+    def test_finalize_after_the_target_was_deleted(self):
+        session_id = self.start()
+        for offset in range(0, len(self.payload), 1024):
+            self.put_chunk(session_id, offset, self.payload[offset:offset + 1024])
+        self.issue.delete()
+        response = self.client.post(f'/api/uploads/{session_id}/finalize/')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).status, 'active')
+
+    def test_finalize_requires_complete_file(self):
+        session_id = self.start()
+        self.put_chunk(session_id, 0, self.payload[:1024])
+        self.assertEqual(self.client.post(f'/api/uploads/{session_id}/finalize/').status_code, 409)
+
+    def test_checksum_mismatch(self):
+        session_id = self.start(checksum='0' * 64)
+        for offset in range(0, len(self.payload), 1024):
+            self.put_chunk(session_id, offset, self.payload[offset:offset + 1024])
+        self.assertEqual(self.client.post(f'/api/uploads/{session_id}/finalize/').status_code, 400)
+
+
+class ImageVariantTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        from PIL import Image
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        create_catalogue(issues=1, articles_per_issue=1)
+        self.issue = Issue.objects.get()
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1000), 'red').save(buffer, 'PNG')
+        self.issue.cover_image.save('muqova.png', ContentFile(buffer.getvalue()))
+
+    def test_variants_are_missing_until_generated(self):
+        Job.objects.all().delete()
+        response = self.client.get(f'/api/issues/{self.issue.pk}/')
+        self.assertIsNone(response.data['cover_variants'])
+        # Reads never queue jobs, the upload's post_save did
+        self.assertFalse(Job.objects.exists())
+
+    def test_upload_queues_variants_job(self):
+        job = Job.objects.get(name='api.images.generate_image_variants')
+        self.assertEqual(job.payload, {'model_label': 'api.Issue', 'pk': self.issue.pk, 'field_name': 'cover_image'})
+        tasks.run_job(tasks.claim(job.pk))
+        self.issue.refresh_from_db()
+        self.assertTrue(has_variants(self.issue.cover_image))
+
+    def test_variant_urls(self):
+        from PIL import Image
+
+        generate_image_variants('api.Issue', self.issue.pk, 'cover_image')
+        # Availability is read from the row, serializing never asks the storage
+        with mock.patch.object(FileSystemStorage, 'exists', side_effect=AssertionError):
+            variants = self.client.get('/api/issues/').data['results'][0]['cover_variants']
+        self.assertEqual(set(variants), {'thumb', 'medium', 'large'})
+        self.assertEqual(set(variants['thumb']), {'webp', 'png'})
+        self.assertTrue(variants['thumb']['webp'].startswith('http://testserver/media/variants/covers/'))
+        with Image.open(f'{self.media_root}/variants/covers/muqova.png_thumb.webp') as thumb:
+            self.assertEqual(thumb.size, (300, 150))
+
+    def test_replaced_image_drops_its_renditions(self):
+        generate_image_variants('api.Issue', self.issue.pk, 'cover_image')
+        self.issue.refresh_from_db()
+        old_thumb = f'{self.media_root}/variants/covers/muqova.png_thumb.webp'
+        self.assertTrue(os.path.exists(old_thumb))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issue.cover_image.save('yangi.png', ContentFile(self.issue.cover_image.read()))
+        self.assertFalse(os.path.exists(old_thumb))
+        self.assertFalse(has_variants(self.issue.cover_image))
+
+    def test_same_stem_images_keep_their_own_renditions(self):
+        self.assertNotEqual(variant_name('covers/muqova.png', 'thumb', 'webp'),
+                            variant_name('covers/muqova.jpg', 'thumb', 'webp'))
+
+    def test_migration_moves_renditions_to_the_new_names(self):
+        migration = importlib.import_module('api.migrations.0014_rename_image_variants')
+        generate_image_variants('api.Issue', self.issue.pk, 'cover_image')
+        old_thumb = f'{self.media_root}/variants/covers/muqova_thumb.webp'
+        new_thumb = f'{self.media_root}/variants/covers/muqova.png_thumb.webp'
+        # Back to the layout written before the rename, then forward again
+        migration.move_renditions(migration.filename_name, migration.stem_name)(django_apps, None)
+        self.assertEqual((os.path.exists(old_thumb), os.path.exists(new_thumb)), (True, False))
+        migration.move_renditions(migration.stem_name, migration.filename_name)(django_apps, None)
+        self.assertEqual((os.path.exists(old_thumb), os.path.exists(new_thumb)), (False, True))
+
+
+@tasks.task(name='tests.flaky', max_attempts=2)
+def flaky_job(fail):
+    if fail:
+        raise RuntimeError('xato')
+
+
+class JobQueueTests(APITestCase):
+
+    def test_successful_job(self):
+        job = tasks.enqueue(flaky_job, fail=False)
+        self.assertEqual(tasks.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+
+    def test_delayed_job_waits(self):
+        tasks.enqueue(flaky_job, delay=datetime.timedelta(minutes=5), fail=False)
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_failed_job_is_retried_then_given_up(self):
+        job = tasks.enqueue(flaky_job, fail=True)
+        tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        tasks.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_stale_jobs_are_requeued(self):
+        job = tasks.enqueue(flaky_job, fail=False)
+        tasks.claim(job.pk)
+        Job.objects.filter(pk=job.pk).update(locked_at=job.created_at - datetime.timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.run_pending(), 1)
+
+    def test_stale_job_without_attempts_left_fails(self):
+        job = tasks.enqueue(flaky_job, fail=False)
+        Job.objects.filter(pk=job.pk).update(attempts=1)
+        tasks.claim(job.pk)
+        Job.objects.filter(pk=job.pk).update(locked_at=job.created_at - datetime.timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    @override_settings(API_TASKS_EAGER=True)
+    def test_eager_jobs_keep_their_delay_and_retries(self):
+        with mock.patch('api.tasks.threading.Timer') as timer:
+            with self.captureOnCommitCallbacks(execute=True):
+                delayed = tasks.enqueue(flaky_job, delay=datetime.timedelta(minutes=2), fail=False)
+            self.assertAlmostEqual(timer.call_args.args[0], 120, delta=5)
+            delayed.refresh_from_db()
+            self.assertEqual(delayed.status, 'queued')
+
+            timer.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                failing = tasks.enqueue(flaky_job, fail=True)
+            failing.refresh_from_db()
+            self.assertEqual((failing.status, failing.attempts), ('queued', 1))
+            # Retried after the backoff instead of being left in the queue with no worker
+            self.assertIs(timer.call_args.args[1], tasks._run_eager_in_thread)
+            self.assertEqual(timer.call_args.kwargs['args'], (failing.pk,))
+
+    @override_settings(ADMINS=[('Tahririyat', 'editor@example.com')], API_CONTACT_NOTIFY_DELAY=0)
+    def test_contact_message_notification(self):
+        message = ContactMessage.objects.create(name='Ali', email='ali@example.com', subject='Savol', message='Salom')
+        job = Job.objects.get(name='api.tasks.notify_contact_message')
+        self.assertEqual(job.payload, {'message_id': message.pk})
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Savol', mail.outbox[0].subject)
+
+
+@skipUnless(documents.PdfReader, 'pypdf is not installed')
+class DocumentTextTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        create_catalogue(issues=1, articles_per_issue=1)
+        self.article = Article.objects.get()
+        self.pdf = make_pdf(['Paxta hosildorligi', 'Sug\'orish tizimlari'])
+        self.article.article_file.save('maqola.pdf', ContentFile(self.pdf))
+
+    def extraction_jobs(self):
+        return Job.objects.filter(name='api.documents.extract_file_text', payload__target='article')
+
+    def test_saving_a_file_queues_extraction(self):
+        self.assertEqual(self.extraction_jobs().count(), 1)
+        self.article.doi = '10.1/abc'
+        self.article.save()
+        self.assertEqual(self.extraction_jobs().count(), 1)
+
+    def test_extraction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.run_pending()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.page_count, 2)
+        self.assertEqual(self.article.file_size, len(self.pdf))
+        self.assertEqual(self.article.file_sha256, hashlib.sha256(self.pdf).hexdigest())
+        self.assertEqual(self.article.full_text.text, "Paxta hosildorligi Sug'orish tizimlari")
+
+        data = self.client.get(f'/api/articles/{self.article.pk}/').data
+        self.assertEqual((data['page_count'], data['file_size']), (2, len(self.pdf)))
+        results = self.client.get('/api/articles/search/', {'q': 'sug\'orish', 'lang': 'uz'}).data['results']
+        self.assertEqual([r['id'] for r in results], [self.article.pk])
+        self.assertIn('<mark>', results[0]['search']['snippet'])
+        # Only the PDF text matched: the title and language are still those of a translation
+        self.assertEqual((results[0]['search']['language'], results[0]['search']['title']), ('uz', 'Maqola 0'))
+        hit = self.client.get('/api/articles/search/', {'q': 'sug\'orish'}).data['results'][0]
+        self.assertIn(hit['search']['language'], ('uz', 'ru', 'en'))
+        self.assertEqual(hit['search']['title'], 'Maqola 0')
+        hit = self.client.get('/api/articles/search/', {'q': 'sug\'orish', 'lang': 'ru'}).data['results'][0]
+        self.assertEqual(hit['search']['language'], 'ru')
+
+    def test_unchanged_file_is_not_extracted_again(self):
+        tasks.run_pending()
+        ArticleFullText.objects.filter(article=self.article).update(text='eski')
+        extract_file_text('article', self.article.pk)
+        self.assertEqual(ArticleFullText.objects.get(article=self.article).text, 'eski')
+        extract_file_text('article', self.article.pk, force=True)
+        self.assertNotEqual(ArticleFullText.objects.get(article=self.article).text, 'eski')
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('qishloq xo\'ja-\nligi\x00  va\n\nsuv'), "qishloq xo'jaligi va suv")
+
+
+class IssueImportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        storage = FileSystemStorage(location=self.media_root)
+        storage.save('covers/1-son.png', ContentFile(b'png'))
+        storage.save('issues/1-son.pdf', ContentFile(b'%PDF'))
+        self.journal = Journal.objects.create(name='Agro', short_name='QX')
+        self.existing = Author.objects.create(last_name='Karimov', first_name='Anvar', orcid_id='0000-0002-1495-3967')
+        Keyword.objects.create(name='paxta')
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+
+    def manifest(self, articles=20):
+        return {
+            'journal': 'QX', 'title': '1-son, 2025', 'published_date': '2025-03-01',
+            'cover_image': 'covers/1-son.png', 'pdf_file': 'issues/1-son.pdf',
+            'articles': [{
+                'pages': f'{i * 10 + 1}-{i * 10 + 9}',
+                'authors': [
+                    {'last_name': 'Karimov', 'first_name': 'A.', 'orcid_id': '0000-0002-1495-3967'},
+                    {'last_name': 'Aliyeva', 'first_name': 'Dilnoza'},
+                ],
+                'keywords': ['paxta', f'kalit{i % 3}'],
+                'translations': [{'language': 'uz', 'title': f'Maqola {i}', 'abstract': 'Annotatsiya'},
+                                 {'language': 'en', 'title': f'Article {i}', 'abstract': 'Abstract'}],
+            } for i in range(articles)],
+        }
+
+    def test_bulk_endpoint(self):
+        # Includes queuing the cover renditions and the PDF text extraction of the issue
+        with self.assertNumQueries(30):
+            response = self.client.post('/api/issues/import/', self.manifest(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['articles'], 20)
+        self.assertEqual((response.data['authors_created'], response.data['keywords_created']), (1, 3))
+
+        issue = Issue.objects.get(pk=response.data['id'])
+        self.assertEqual(issue.journal_type, 'QX')
+        self.assertEqual(Article.objects.filter(issue=issue).count(), 20)
+        self.assertEqual(ArticleTranslation.objects.filter(article__issue=issue).count(), 40)
+        self.assertEqual(self.existing.articles.count(), 20)
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_query_count_does_not_grow_with_articles(self):
+        with self.assertNumQueries(30):
+            self.client.post('/api/issues/import/', self.manifest(articles=50), format='json')
+
+    def test_invalid_manifest_writes_nothing(self):
+        manifest = self.manifest()
+        manifest['articles'][5]['authors'][0]['orcid_id'] = 'noto‘g‘ri'
+        response = self.client.post('/api/issues/import/', manifest, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Issue.objects.exists())
+
+    def test_issue_files_must_be_stored(self):
+        manifest = self.manifest(articles=1)
+        del manifest['cover_image']
+        manifest['pdf_file'] = 'issues/yoq.pdf'
+        response = self.client.post('/api/issues/import/', manifest, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'cover_image', 'pdf_file'})
+        self.assertFalse(Issue.objects.exists())
+
+    def test_csv_command(self):
+        path = f'{tempfile.mkdtemp()}/son.csv'
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('pages,authors,keywords,title_uz,abstract_uz,title_ru,abstract_ru\n')
+            f.write('1-9,Karimov|Anvar||0000-0002-1495-3967;Aliyeva|Dilnoza,paxta;suv,Sarlavha,Matn,Заголовок,Текст\n')
+        call_command('import_issue', path, journal='QX', title='2-son', published_date='2025-06-01',
+                     cover_image='covers/1-son.png', pdf_file='issues/1-son.pdf', stdout=StringIO())
+        article = Article.objects.get(issue__title='2-son')
+        self.assertEqual(sorted(article.translations.values_list('language', flat=True)), ['ru', 'uz'])
+        self.assertEqual(article.authors.count(), 2)
+        self.assertEqual(set(article.keywords.values_list('name', flat=True)), {'paxta', 'suv'})
+
+
+class CatalogueExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=3, articles_per_issue=4)
+        Article.objects.filter(pages__startswith='1-').update(doi='10.1234/qx.1')
+        cls.admin = User.objects.create_user('admin', is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def test_ndjson(self):
+        response = self.client.get('/api/export/ndjson/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r['type'] for r in records[:2]], ['issue', 'article'])
+        self.assertEqual(len(records), 3 + 12)
+        article = records[1]
+        self.assertEqual(set(article['translations']), {'uz', 'ru', 'en'})
+        self.assertEqual(len(article['authors']), 3)
+
+    def test_crossref_xml(self):
+        from xml.etree import ElementTree
+
+        response = self.client.get('/api/export/crossref/', HTTP_ACCEPT='application/xml')
+        root = ElementTree.fromstring(b''.join(response.streaming_content))
+        ns = {'c': 'http://www.crossref.org/schema/5.3.1'}
+        # Only the articles with a DOI are deposited
+        articles = root.findall('.//c:journal_article', ns)
+        self.assertEqual(len(articles), 3)
+        self.assertEqual(articles[0].find('c:doi_data/c:doi', ns).text, '10.1234/qx.1')
+        self.assertEqual(articles[0].find('c:pages/c:last_page', ns).text, '9')
+        self.assertEqual(len(articles[0].findall('c:contributors/c:person_name', ns)), 3)
+
+    def test_queries_per_chunk(self):
+        # One streamed issue query, then articles and their three relations for each chunk of issues
+        with self.assertNumQueries(1 + 2 * 4):
+            list(export.ndjson(export.catalogue(chunk_size=2)))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_catalogue', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 15)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get('/api/export/ndjson/').status_code, (401, 403))
+
+
+class ArticleUpdateTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=1, articles_per_issue=1)
+        cls.admin = User.objects.create_user('admin', is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+        self.article = Article.objects.get()
+        self.events = []
+        receiver = lambda sender, changed, **kwargs: self.events.append(changed)
+        article_changed.connect(receiver)
+        self.addCleanup(article_changed.disconnect, receiver)
+
+    def patch(self, **data):
+        response = self.client.patch(f'/api/articles/{self.article.pk}/', data, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_unchanged_translations_are_kept(self):
+        before = dict(self.article.translations.values_list('language', 'pk'))
+        payload = [{'language': language, 'title': 'Maqola 0', 'abstract': 'Annotatsiya'} for language in before]
+        self.patch(doi='10.1/x', translations_payload=json.dumps(payload))
+        self.assertEqual(dict(self.article.translations.values_list('language', 'pk')), before)
+        self.assertEqual(self.events, [{'fields'}])
+
+    def test_translations_are_upserted_by_language(self):
+        before = dict(self.article.translations.values_list('language', 'pk'))
+        payload = [{'language': 'uz', 'title': 'Yangi nom', 'abstract': 'Annotatsiya'},
+                   {'language': 'ru', 'title': 'Maqola 0', 'abstract': 'Annotatsiya'}]
+        self.patch(translations_payload=json.dumps(payload))
+        after = {t.language: t for t in self.article.translations.all()}
+        self.assertEqual(set(after), {'uz', 'ru'})
+        self.assertEqual(after['uz'].pk, before['uz'])
+        self.assertEqual(after['uz'].title, 'Yangi nom')
+        self.assertEqual(self.events, [{'translations'}])
+
+    def test_articles_are_listed_in_numeric_page_order(self):
+        Article.objects.create(issue=self.article.issue, pages='11-19')
+        self.patch(pages='101-109')
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.start_page, 101)
+        results = self.client.get('/api/articles/', {'issue': self.article.issue_id}).data['results']
+        self.assertEqual([article['pages'] for article in results], ['11-19', '101-109'])
+
+    def test_cursor_pages_through_tied_start_pages(self):
+        from .pagination import ArticleCursorPagination
+        count = ArticleCursorPagination.offset_cutoff + 50
+        Article.objects.bulk_create(
+            [Article(issue=self.article.issue, pages='1-9', start_page=1) for _ in range(count)])
+        ids, url = [], '/api/articles/?page_size=100'
+        while url:
+            # ETag + articles + 3 prefetches, whatever the page
+            with self.assertNumQueries(5):
+                data = self.client.get(url).data
+            ids += [article['id'] for article in data['results']]
+            url = data['next']
+        self.assertEqual(ids, sorted(Article.objects.values_list('pk', flat=True)))
+
+        # And back again through the previous links
+        back, url = [article['id'] for article in data['results']], data['previous']
+        while url:
+            data = self.client.get(url).data
+            back = [article['id'] for article in data['results']] + back
+            url = data['previous']
+        self.assertEqual(back, ids)
+        # A forged position that isn't a start page is an invalid cursor, not a server error
+        cursor = 'cD0lNUIlMjJ4JTIyJTJDKyUyMjElMjIlNUQ='
+        self.assertEqual(self.client.get('/api/articles/', {'cursor': cursor}).status_code, 404)
+
+    def test_noop_edit_sends_no_event(self):
+        self.patch(pages=self.article.pages, authors=list(self.article.authors.values_list('pk', flat=True)))
+        self.assertEqual(self.events, [])
+
+
+class IssueTOCTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=1, articles_per_issue=12)
+        cls.issue = Issue.objects.get()
+
+    def test_numeric_page_order(self):
+        entries = self.client.get(f'/api/issues/{self.issue.pk}/toc/', {'lang': 'uz'}).data
+        pages = [entry['pages'] for entry in entries]
+        self.assertEqual(pages[:3], ['1-9', '11-19', '21-29'])
+        self.assertEqual(pages[-1], '111-119')
+        self.assertEqual(len(entries[0]['authors']), 3)
+
+    def test_snapshot_is_a_single_row_read(self):
+        self.client.get(f'/api/issues/{self.issue.pk}/toc/')
+        # The content version lookup and the snapshot row
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/issues/{self.issue.pk}/toc/')
+        self.assertEqual(set(response.data), {'uz', 'ru', 'en'})
+
+    def test_rebuilt_when_a_translation_changes(self):
+        self.client.get(f'/api/issues/{self.issue.pk}/toc/')
+        article = self.issue.articles.get(pages='1-9')
+        with self.captureOnCommitCallbacks(execute=True):
+            translation = article.translations.get(language='ru')
+            translation.title = 'Новое название'
+            translation.save()
+        entries = self.client.get(f'/api/issues/{self.issue.pk}/toc/', {'lang': 'ru'}).data
+        self.assertEqual(entries[0]['title'], 'Новое название')
+
+    def test_missing_translation_falls_back(self):
+        article = self.issue.articles.get(pages='1-9')
+        with self.captureOnCommitCallbacks(execute=True):
+            article.translations.filter(language='en').delete()
+        entry = self.client.get(f'/api/issues/{self.issue.pk}/toc/', {'lang': 'en'}).data[0]
+        self.assertEqual((entry['title'], entry['title_language']), ('Maqola 0', 'uz'))
+
+
+class JournalCodeTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=2, articles_per_issue=1)
+
+    def test_short_name_is_stored_upper_case(self):
+        self.assertEqual(Journal.objects.create(name='Yangi', short_name=' ai ').short_name, 'AI')
+
+    def test_case_variant_short_name_is_rejected(self):
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        response = self.client.post('/api/journals/', {'name': 'Nusxa', 'short_name': 'qx'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('short_name', response.data)
+        response = self.client.post('/api/journals/', {'name': 'Yangi', 'short_name': 'ai '}, format='json')
+        self.assertEqual((response.status_code, response.data['short_name']), (201, 'AI'))
+
+    def test_lower_case_filters(self):
+        self.assertEqual(len(self.client.get('/api/issues/', {'journal': 'qx'}).data['results']), 2)
+        self.assertEqual(self.client.get('/api/issues/current-by-type/qx/').status_code, 200)
+        self.assertEqual(len(self.client.get('/api/board-members/', {'journal': 'qx'}).data['results']), 1)
+
+
+class HomeTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=3, articles_per_issue=2)
+        first = Issue.objects.order_by('published_date').first()
+        RecentIssueLink.objects.create(title='2024 - №1', link_to_issue=first, order=1)
+        RecentIssueLink.objects.create(title='Arxiv', order=2)
+        for n in range(7):
+            News.objects.create(title=f'Yangilik {n}', content='Matn')
+
+    def test_sections_in_fixed_queries(self):
+        # ContentVersion + journal + links + issues + news + board members
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/home/', {'journal': 'qx'})
+        data = response.data
+        self.assertEqual([issue['is_current'] for issue in data['current_issues']], [True])
+        self.assertEqual(data['current_issues'][0]['articles_count'], 2)
+        self.assertEqual(data['recent_issues'][0]['issue']['id'], data['recent_issues'][0]['link_to_issue'])
+        self.assertIsNone(data['recent_issues'][1]['issue'])
+        self.assertEqual(data['latest_year']['title'], '3-son')
+        self.assertEqual(len(data['news']), 5)
+        self.assertEqual(len(data['board_members']), 1)
+
+    def test_cached_as_one_unit(self):
+        etag = self.client.get('/api/home/')['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/home/').status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/home/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        News.objects.create(title='Yangi', content='Matn')
+        response = self.client.get('/api/home/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['news'][0]['title'], 'Yangi')
+
+    def test_unknown_journal_is_not_cached(self):
+        backend = payload_cache.get_cache()
+        for code in ('yo', 'x' * 300):
+            self.assertEqual(self.client.get('/api/home/', {'journal': code}).status_code, 404)
+            self.assertIsNone(backend.get(payload_cache._version_key('home', code.upper())))
+
+    def test_query_string_neither_reshapes_nor_rekeys_the_payload(self):
+        full = self.client.get('/api/home/').data
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/home/', {'fields': 'id', 'utm_source': 'x'})
+        self.assertEqual(response.data, full)
+        self.assertIn('title', response.data['news'][0])
+
+
+class SparseFieldsetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=1, articles_per_issue=2)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_fields_prune_payload_and_queries(self):
+        issue = Issue.objects.get()
+        data, sql = self.get('/api/articles/', {'issue': issue.pk, 'fields': 'pages,translations.title'})
+        article = data['results'][0]
+        self.assertEqual(set(article), {'id', 'pages', 'translations'})
+        self.assertEqual(set(article['translations'][0]), {'title'})
+        self.assertNotIn('references', sql)
+        self.assertNotIn('abstract', sql)
+        self.assertNotIn('api_author', sql)
+
+    def test_omit_nested_fields(self):
+        data, sql = self.get(f'/api/issues/{Issue.objects.get().pk}/',
+                             {'omit': 'articles.references,articles.authors.organization'})
+        article = data['articles'][0]
+        self.assertNotIn('references', article)
+        self.assertEqual(set(article['authors'][0]) & {'last_name', 'organization'}, {'last_name'})
+        self.assertIn('keywords', article)
+        self.assertNotIn('"references"', sql)
+        self.assertNotIn('"organization"', sql)
+
+    def test_cached_payloads_are_per_fieldset(self):
+        url = f'/api/articles/{Article.objects.first().pk}/'
+        self.assertIn('references', self.client.get(url).data)
+        self.assertEqual(set(self.client.get(url, {'fields': 'doi'}).data), {'id', 'doi'})
+        self.assertIn('references', self.client.get(url).data)
+
+
+class JSONBackendTests(APITestCase):
+
+    @skipUnless(renderers.orjson, 'orjson is not installed')
+    def test_orjson_output_matches_stdlib(self):
+        from decimal import Decimal
+        from django.utils import timezone
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        data = {
+            'title': "Qishloq xo'jaligi — ўзбек", 'separator': 'a\u2028b', 'count': 3, 'ratio': 0.5,
+            'price': Decimal('1.50'), 'created_at': timezone.now(), 'date': datetime.date(2024, 1, 2),
+            'detail': gettext_lazy('Not found.'), 'items': [{'id': 1, 'ok': True, 'none': None}],
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"a": ["ў", 1]}'.encode())), {'a': ['ў', 1]})
+        from rest_framework.exceptions import ParseError
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"a": '))
+
+    def test_lean_issue_summaries_match_the_serializer(self):
+        create_catalogue(issues=3, articles_per_issue=2)
+        for url in ('/api/issues/', '/api/issues/current-issues/', '/api/issues/by-journal-type/qx/?page_size=2'):
+            lean = self.client.get(url)
+            with override_settings(API_LEAN_LISTS=False):
+                full = self.client.get(url)
+            self.assertEqual(json.loads(lean.content), json.loads(full.content))
+
+
+class ContactInboxTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        self.messages = []
+        for number in range(4):
+            message = ContactMessage.objects.create(
+                name=f'Yozuvchi {number}', email=f'user{number}@example.com', subject=f'Mavzu {number}',
+                message='Maqola haqida savol' if number % 2 else 'Obuna', is_read=number == 0)
+            ContactMessageFile.objects.create(message=message, file=ContentFile(b'%PDF-1.4', name=f'ilova{number}.pdf'))
+            self.messages.append(message)
+        ContactMessage.objects.filter(pk=self.messages[0].pk).update(
+            created_at=datetime.datetime(2024, 1, 10, 12, tzinfo=datetime.timezone.utc))
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(item['id'] for item in response.json()['results'])
+
+    def test_list_prefetches_files(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/contact/')
+        self.assertEqual(len(response.json()['results']), 4)
+        self.assertEqual(len(response.json()['results'][0]['files']), 1)
+
+    def test_filters(self):
+        self.assertEqual(self.ids(self.client.get('/api/contact/?is_read=false')), [m.pk for m in self.messages[1:]])
+        self.assertEqual(self.ids(self.client.get('/api/contact/', {'is_read': "yo'q"})),
+                         [m.pk for m in self.messages[1:]])
+        self.assertEqual(self.ids(self.client.get('/api/contact/?is_read=Ha')), [self.messages[0].pk])
+        response = self.client.get('/api/contact/?is_read=balki')
+        self.assertEqual((response.status_code, list(response.json())), (400, ['is_read']))
+        self.assertEqual(self.ids(self.client.get('/api/contact/?q=savol')), [self.messages[1].pk, self.messages[3].pk])
+        self.assertEqual(self.ids(self.client.get('/api/contact/?created_before=2024-01-10')), [self.messages[0].pk])
+        self.assertEqual(self.ids(self.client.get('/api/contact/?created_after=2024-01-11')),
+                         [m.pk for m in self.messages[1:]])
+        response = self.client.get('/api/contact/?created_after=kecha')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('created_after', response.json())
+
+    def test_inbox_is_for_editors(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/contact/').status_code, 401)
+        self.assertEqual(self.client.post('/api/contact/mark-read/', {'ids': [1]}, format='json').status_code, 401)
+
+    def test_bulk_mark_read(self):
+        ids = [m.pk for m in self.messages[:3]]
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/contact/mark-read/', {'ids': ids}, format='json')
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertEqual(ContactMessage.objects.filter(is_read=True).count(), 3)
+        response = self.client.post('/api/contact/mark-read/', {'ids': ids, 'is_read': False}, format='json')
+        self.assertEqual(response.json(), {'updated': 3})
+
+    def test_bulk_delete_removes_files(self):
+        paths = [m.files.get().file.path for m in self.messages[:2]]
+        response = self.client.post('/api/contact/bulk-delete/', {'ids': [m.pk for m in self.messages[:2]]},
+                                    format='json')
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertEqual(ContactMessageFile.objects.count(), 2)
+        tasks.run_pending()
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_attachment_download(self):
+        attachment = self.messages[1].files.get()
+        response = self.client.get(f'/api/contact/{self.messages[1].pk}/files/{attachment.pk}/')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(self.client.get(f'/api/contact/{self.messages[0].pk}/files/{attachment.pk}/').status_code, 404)
+
+    def test_retention_purge(self):
+        old = ContactMessageFile.objects.filter(message__in=self.messages[:3])
+        paths = [attachment.file.path for attachment in old]
+        old.update(uploaded_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertEqual(tasks.purge_contact_attachments(days=30, batch_size=2), 3)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertEqual(ContactMessageFile.objects.count(), 1)
+        self.assertEqual(ContactMessage.objects.count(), 4)
+
+
+class OneRequestThrottle(AnonRateThrottle):
+    rate = '1/minute'
+
+
+class AsyncReadTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalogue(issues=2, articles_per_issue=2)
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.issue_detail = async_read_view(views.IssueViewSet, 'issue')
+        self.article_detail = async_read_view(views.ArticleViewSet, 'article')
+
+    def tearDown(self):
+        article_views.flush()
+
+    async def test_same_payload_as_the_sync_view(self):
+        pk = await Issue.objects.values_list('pk', flat=True).afirst()
+        response = await self.issue_detail(self.factory.get(f'/api/issues/{pk}/'), pk=str(pk))
+        self.assertEqual(response.status_code, 200)
+        sync_response = await sync_to_async(self.client.get)(f'/api/issues/{pk}/')
+        self.assertEqual(json.loads(response.content), json.loads(sync_response.content))
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+
+    async def test_conditional_and_cached_retrieve(self):
+        pk = await Article.objects.values_list('pk', flat=True).afirst()
+        response = await self.article_detail(self.factory.get(f'/api/articles/{pk}/'), pk=str(pk))
+        self.assertEqual(json.loads(response.content)['id'], pk)
+        response = await self.article_detail(
+            self.factory.get(f'/api/articles/{pk}/', headers={'If-None-Match': response['ETag'], 'User-Agent': 'boshqa'}),
+            pk=str(pk))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(article_views.pending(), {pk: 2})
+
+    async def test_initial_runs(self):
+        pk = await Article.objects.values_list('pk', flat=True).afirst()
+        with mock.patch.object(views.ArticleViewSet, 'throttle_classes', [OneRequestThrottle]):
+            self.assertEqual((await self.article_detail(self.factory.get('/'), pk=str(pk))).status_code, 200)
+            response = await self.article_detail(self.factory.get('/'), pk=str(pk))
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('detail', json.loads(response.content))
+
+    async def test_other_requests_go_to_the_viewset(self):
+        response = await self.article_detail(self.factory.get('/api/articles/999999/'), pk='999999')
+        self.assertEqual(response.status_code, 404)
+        pk = await Issue.objects.values_list('pk', flat=True).afirst()
+        response = await self.issue_detail(self.factory.get('/', headers={'Accept': 'text/html'}), pk=str(pk))
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        response = await self.issue_detail(self.factory.delete('/'), pk=str(pk))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_fallback_counts_one_throttle_hit(self):
+        pk = await Issue.objects.values_list('pk', flat=True).afirst()
+        with mock.patch.object(views.IssueViewSet, 'throttle_classes', [OneRequestThrottle]):
+            response = await self.issue_detail(self.factory.get('/', headers={'Accept': 'text/html'}), pk=str(pk))
+        self.assertEqual(response.status_code, 200)
+
+
+class CollectOnCommitTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+    def collect(self, items):
+        self.calls.append(items)
+
+    def test_one_call_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    collect_on_commit(self.collect, {1})
+                    raise ValueError
+            except ValueError:
+                pass
+            collect_on_commit(self.collect, {2})
+            with transaction.atomic():
+                collect_on_commit(self.collect, {3})
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, [{1, 2, 3}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            collect_on_commit(self.collect, {4})
+        self.assertEqual(self.calls, [{1, 2, 3}, {4}])
+
+
+@mock.patch('api.db.replica_aliases', return_value=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def read_alias(self, read_only):
+        token = db._read_only_request.set(read_only)
+        try:
+            return db.ReplicaRouter().db_for_read(Issue)
+        finally:
+            db._read_only_request.reset(token)
+
+    def test_reads_of_safe_requests_go_to_a_replica(self, replicas):
+        self.assertEqual(self.read_alias(True), 'replica1')
+
+    def test_everything_else_stays_on_the_primary(self, replicas):
+        self.assertEqual(self.read_alias(False), 'default')
+        self.assertEqual(db.ReplicaRouter().db_for_write(Issue), 'default')
+        self.assertFalse(db.ReplicaRouter().allow_migrate('replica1', 'api'))
+
+    def test_primary_pins_reads(self, replicas):
+        with db.primary():
+            self.assertEqual(self.read_alias(True), 'default')
+        self.assertEqual(self.read_alias(True), 'replica1')
+
+
+class BenchmarkTests(APITestCase):
+
+    def test_seed_and_run(self):
+        counts = benchmark.seed(journals=2, years=1, issues_per_year=2, articles_per_issue=3, keywords=10)
+        self.assertEqual(sorted(set(Article.objects.values_list('start_page', flat=True))), [1, 11, 21])
+        self.assertEqual((counts['issues'], counts['articles']), (4, 12))
+        result = benchmark.run(iterations=2, warmup=1)
+        json.dumps(result)
+        self.assertEqual(set(result['endpoints']), {name for name, _ in benchmark.endpoints()})
+        for values in result['endpoints'].values():
+            self.assertEqual(values['status'], 200)
+            self.assertGreater(values['peak_kib'], 0)
+        self.assertEqual(benchmark.compare(result, result)[0][-1], 0.0)
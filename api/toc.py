@@ -0,0 +1,82 @@
+from django.db import transaction
+
+from .db import primary
+from .models import Article, ArticleTranslation, Issue, IssueTOC, first_page
+from .transactions import collect_on_commit
+
+LANGUAGES = [code for code, _ in ArticleTranslation.LANGUAGE_CHOICES]
+
+
+def page_order(article):
+    """Sort key that puts '9-15' before '10-20', articles without a page number go last"""
+    start = first_page(article.pages)
+    return (0, start, article.pk) if start else (1, article.pages or '', article.pk)
+
+
+def _author_name(author):
+    return ' '.join(filter(None, [author.last_name, author.first_name, author.patronymic]))
+
+
+def build_entries(articles):
+    """{language: [entry, ...]} in page order; a missing translation falls back to another language's title"""
+    articles = sorted(articles, key=page_order)
+    entries = {language: [] for language in LANGUAGES}
+    for article in articles:
+        translations = {t.language: t.title for t in article.translations.all()}
+        base = {
+            'id': article.pk,
+            'pages': article.pages,
+            'doi': article.doi,
+            'authors': [{'name': _author_name(a), 'orcid_id': a.orcid_id} for a in article.authors.all()],
+        }
+        for language in LANGUAGES:
+            title_language = language if language in translations else next(
+                (code for code in LANGUAGES if code in translations), None)
+            entries[language].append({
+                **base,
+                'title': translations.get(title_language, ''),
+                'title_language': title_language,
+            })
+    return entries
+
+
+def rebuild(issue_ids):
+    """Recompute the snapshots of the given issues, dropping those of deleted issues"""
+    issue_ids = set(issue_ids)
+    if not issue_ids:
+        return
+    articles = Article.objects.filter(issue_id__in=issue_ids).prefetch_related('authors', 'translations')
+    by_issue = {pk: [] for pk in issue_ids}
+    for article in articles:
+        by_issue[article.issue_id].append(article)
+    existing = set(Issue.objects.filter(pk__in=issue_ids).values_list('pk', flat=True))
+    with transaction.atomic():
+        IssueTOC.objects.filter(issue_id__in=issue_ids - existing).delete()
+        for issue_id in existing:
+            IssueTOC.objects.update_or_create(issue_id=issue_id,
+                                              defaults={'entries': build_entries(by_issue[issue_id])})
+
+
+def get_entries(issue_id):
+    """Stored snapshot of an issue, built on first use; None when the issue doesn't exist"""
+    entries = IssueTOC.objects.filter(issue_id=issue_id).values_list('entries', flat=True).first()
+    if entries is None:
+        # The snapshot is written to the primary, read it back from there too
+        with primary():
+            if Issue.objects.filter(pk=issue_id).exists():
+                rebuild([issue_id])
+                entries = IssueTOC.objects.filter(issue_id=issue_id).values_list('entries', flat=True).first()
+    return entries
+
+
+def _rebuild_items(items):
+    article_ids = {pk for model_name, pk in items if model_name == 'article'}
+    issue_ids = {pk for model_name, pk in items if model_name == 'issue'}
+    issue_ids |= set(Article.objects.filter(pk__in=article_ids).values_list('issue_id', flat=True))
+    rebuild(issue_ids)
+
+
+def schedule_rebuild(articles=(), issues=()):
+    """Rebuild the snapshots touched by the given articles and issues once the transaction commits"""
+    items = {('article', pk) for pk in articles} | {('issue', pk) for pk in issues if pk is not None}
+    collect_on_commit(_rebuild_items, items)
@@ -0,0 +1,55 @@
+from asgiref.local import Local
+from django.db import connection, transaction
+
+# {(connection alias, callback): CommitBatch} of the transactions open in this thread or task
+_state = Local()
+
+
+def _pending():
+    try:
+        return _state.batches
+    except AttributeError:
+        _state.batches = {}
+        return _state.batches
+
+
+class CommitBatch:
+    """on_commit callback collecting the items touched during one transaction"""
+
+    def __init__(self, key, callback):
+        self.key = key
+        self.callback = callback
+        self.items = set()
+        self.done = False
+
+    def __call__(self):
+        # Registered once per collect_on_commit() call, the first surviving registration runs it
+        if self.done:
+            return
+        self.done = True
+        if _pending().get(self.key) is self:
+            del _pending()[self.key]
+        self.callback(self.items)
+
+
+def collect_on_commit(callback, items):
+    """Call `callback(items)` once when the current transaction commits.
+
+    Repeated calls with the same callback inside one transaction (one model
+    signal per saved row) are merged into a single call with the union of items.
+    Each call registers the batch again, so it still runs when the savepoint of
+    an earlier call is rolled back; the items of that savepoint are kept, the
+    callbacks only refresh derived data. Outside a transaction the callback
+    runs immediately.
+    """
+    key = (connection.alias, callback)
+    if not connection.in_atomic_block:
+        # A batch left by a rolled back transaction is never run, its items go with these
+        batch = _pending().pop(key, None)
+        callback(set(items) | (batch.items if batch else set()))
+        return
+    batch = _pending().get(key)
+    if batch is None:
+        batch = _pending()[key] = CommitBatch(key, callback)
+    batch.items.update(items)
+    transaction.on_commit(batch)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Issue, Article, UploadSession
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks of one session are not serialised there
+    fcntl = None
+
+# UploadSession.target -> (model, file field)
+TARGETS = {
+    'issue': (Issue, 'pdf_file'),
+    'article': (Article, 'article_file'),
+}
+
+READ_BLOCK = 64 * 1024
+
+
+class UploadError(Exception):
+    """Rejected chunk or finalize request, `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class AssembledFile(File):
+    """The assembled temp file; exposing its path lets FileSystemStorage move it instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def max_chunk_size():
+    return getattr(settings, 'API_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def temp_path(session):
+    directory = getattr(settings, 'API_UPLOAD_TEMP_DIR', os.path.join(settings.BASE_DIR, 'tmp_uploads'))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{session.pk}.part')
+
+
+def start(session):
+    """Create the empty part file of a new session"""
+    open(temp_path(session), 'wb').close()
+
+
+@contextmanager
+def _locked_part(session, blocking=False):
+    """Open the session's part file under an exclusive lock, held by one request of the session at a time.
+
+    The lock lives on the file rather than the session row, so no transaction
+    stays open while a chunk is streamed from the client. The part file is
+    local to the host, every request of a session lands on it anyway.
+    """
+    try:
+        part = open(temp_path(session), 'r+b')
+    except FileNotFoundError:
+        raise UploadError("Yuklash allaqachon yakunlangan yoki bekor qilingan", status=409)
+    with part:
+        if fcntl is not None:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Bu yuklashga boshqa so'rov yozmoqda, keyinroq qayta yuboring", status=409)
+        # Another request may have changed the session while this one waited
+        session.refresh_from_db(fields=['status', 'received'])
+        yield part
+
+
+def _check_position(session, offset):
+    if session.status != 'active':
+        raise UploadError("Yuklash allaqachon yakunlangan", status=409)
+    if offset != session.received:
+        raise UploadError(f"Kutilgan offset: {session.received}", status=409)
+
+
+def write_chunk(session, stream, offset, length, checksum=None):
+    """Append `length` bytes read from `stream` at `offset`, reading one block at a time.
+
+    Chunks must arrive in order: a client resuming after a failure asks for
+    the session first and continues from `session.received`. The part file
+    stays locked while the chunk is written, so of two requests sending the
+    same offset only one writes it.
+    """
+    _check_position(session, offset)
+    if length <= 0 or length > max_chunk_size():
+        raise UploadError(f"Bo'lak hajmi 1 dan {max_chunk_size()} baytgacha bo'lishi kerak")
+    if offset + length > session.size:
+        raise UploadError("Bo'lak e'lon qilingan fayl hajmidan oshib ketdi")
+
+    with _locked_part(session) as part:
+        _check_position(session, offset)
+        digest = hashlib.sha256()
+        written = 0
+        part.seek(offset)
+        while written < length:
+            block = stream.read(min(READ_BLOCK, length - written))
+            if not block:
+                break
+            part.write(block)
+            digest.update(block)
+            written += len(block)
+        if written != length or (checksum and checksum.lower() != digest.hexdigest()):
+            # Drop the partial or corrupt chunk so the client can resend it from the same offset
+            part.truncate(offset)
+            raise UploadError("Bo'lak to'liq yoki to'g'ri qabul qilinmadi, qayta yuboring")
+        part.flush()
+        UploadSession.objects.filter(pk=session.pk).update(received=offset + length, updated_at=timezone.now())
+        session.received = offset + length
+    return session
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(session):
+    """Verify the assembled file and attach it to the target object in one transaction"""
+    model, field_name = TARGETS[session.target]
+    path = temp_path(session)
+    with _locked_part(session):
+        if session.status != 'active':
+            raise UploadError("Yuklash allaqachon yakunlangan", status=409)
+        if session.received != session.size:
+            raise UploadError(f"Fayl to'liq yuklanmagan: {session.received}/{session.size}", status=409)
+        if session.checksum and file_checksum(path) != session.checksum.lower():
+            raise UploadError("Fayl checksum mos kelmadi")
+
+        with transaction.atomic():
+            try:
+                target = model.objects.select_for_update().get(pk=session.object_id)
+            except model.DoesNotExist:
+                raise UploadError("Fayl biriktiriladigan obyekt o'chirilgan", status=410)
+            with open(path, 'rb') as assembled:
+                getattr(target, field_name).save(session.filename, AssembledFile(assembled), save=False)
+            target.save(update_fields=[field_name])
+            session.status = 'completed'
+            session.save(update_fields=['status', 'updated_at'])
+        if os.path.exists(path):
+            os.remove(path)
+    return target
+
+
+def abort(session):
+    try:
+        # Wait for a chunk being written to finish before the file goes away
+        with _locked_part(session, blocking=True):
+            os.remove(temp_path(session))
+    except UploadError:
+        pass
+    session.delete()
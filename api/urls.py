@@ -1,7 +1,9 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 from django.views.generic import TemplateView
 from rest_framework.routers import DefaultRouter
 from . import views
+from .async_views import async_read_view
 
 router = DefaultRouter()
 router.register(r'contact', views.ContactMessageViewSet, basename='contact')
@@ -13,13 +15,25 @@ router.register(r'authors', views.AuthorViewSet)
 router.register(r'keywords', views.KeywordViewSet)
 router.register(r'issues', views.IssueViewSet)
 router.register(r'articles', views.ArticleViewSet)
+router.register(r'uploads', views.UploadSessionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('home/', views.HomeView.as_view(), name='home'),
+    path('export/<str:export_format>/', views.CatalogueExportView.as_view(), name='catalogue-export'),
 ]
 
+# Public catalogue details answered by async views when API_ASYNC_READS is on (ASGI only)
+ASYNC_READ_PREFIXES = ('issues', 'articles', 'news', 'board-members')
+
+if settings.API_ASYNC_READS:
+    # Ahead of the router, which keeps the lists and every other action
+    urlpatterns = [
+        re_path(rf'^{prefix}/(?P<pk>[0-9]+)/$', async_read_view(viewset, basename))
+        for prefix, viewset, basename in router.registry if prefix in ASYNC_READ_PREFIXES
+    ] + urlpatterns
+
 # Add URL patterns for development (debugging)
-from django.conf import settings
 if settings.DEBUG:
     urlpatterns += [
         # Additional debug URLs can be added here
@@ -0,0 +1,125 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import ContentVersion
+
+
+def bump(name):
+    """Mark the content of model `name` as changed"""
+    now = timezone.now()
+    if ContentVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            ContentVersion.objects.create(name=name, version=1, updated_at=now)
+    except IntegrityError:
+        # Created concurrently by another request
+        ContentVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+
+
+def _summarize(names, versions):
+    fingerprint = ','.join(f'{name}:{versions.get(name, (0, None))[0]}' for name in sorted(names))
+    modified = [updated_at for _, updated_at in versions.values()]
+    return fingerprint, max(modified) if modified else None
+
+
+def current(names):
+    """(version fingerprint, last modification time) of the given models, in one query.
+
+    Read from the primary: an ETag computed from a lagging replica would
+    label old content with a validator clients keep revalidating against.
+    """
+    rows = ContentVersion.objects.using('default').filter(name__in=names).values_list('name', 'version', 'updated_at')
+    return _summarize(names, {name: (version, updated_at) for name, version, updated_at in rows})
+
+
+def validators(request, fingerprint, last_modified, media_type):
+    """(ETag, Last-Modified timestamp) of a GET response"""
+    # The same URL may be rendered differently (browsable API vs JSON)
+    digest = hashlib.md5(f'{fingerprint}|{request.get_full_path()}|{media_type}'.encode()).hexdigest()
+    return quote_etag(digest), int(last_modified.timestamp()) if last_modified else None
+
+
+def add_validators(response, values):
+    """Set the validators returned by validators() on a 200/206/304 response"""
+    etag, timestamp = values
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Caches may store the payload but must revalidate it on every use
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+class _NotModified(Exception):
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified for read-only actions of a viewset.
+
+    `conditional_models` lists the ContentVersion names the payload depends on.
+    A matching If-None-Match / If-Modified-Since is answered with 304 before
+    any serializer runs. `counter_models` change with reads (view and download
+    counters) and only count for the `counter_actions` showing them current,
+    or every list would be revalidated whenever somebody opened an article.
+    """
+    conditional_models = ()
+    counter_models = ()
+    counter_actions = ('retrieve',)
+
+    def get_conditional_models(self):
+        if getattr(self, 'action', None) in self.counter_actions:
+            return (*self.conditional_models, *self.counter_models)
+        return self.conditional_models
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        names = self.get_conditional_models()
+        if request.method not in ('GET', 'HEAD') or not names:
+            return
+        fingerprint, last_modified = current(names)
+        self._fingerprint = fingerprint
+        etag, timestamp = self._validators = validators(
+            request, fingerprint, last_modified, getattr(request, 'accepted_media_type', ''))
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            self.not_modified(request)
+            raise _NotModified(response)
+
+    def not_modified(self, request):
+        """Called before answering 304, a revalidated copy is still a read (view counters)"""
+
+    def current_fingerprint(self):
+        """Versions of the conditional models read for the current GET request, None for other methods"""
+        return getattr(self, '_fingerprint', None) if getattr(self, '_validators', None) else None
+
+    def current_etag(self):
+        """ETag of the current GET request, None for other methods"""
+        response_validators = getattr(self, '_validators', None)
+        return response_validators[0] if response_validators else None
+
+    def current_last_modified(self):
+        """Last-Modified timestamp of the current GET request, None for other methods"""
+        response_validators = getattr(self, '_validators', None)
+        return response_validators[1] if response_validators else None
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        response_validators = getattr(self, '_validators', None)
+        if response_validators and response.status_code in (200, 206, 304):
+            add_validators(response, response_validators)
+        return response
@@ -3,18 +3,38 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
-from django.db.models import Q
-from django.http import JsonResponse
+from django.conf import settings
+from django.db.models import Q, Count
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from .models import (
     ContactMessage, ContactMessageFile, Journal, News, EditorialBoardMember, RecentIssueLink,
-    Issue, Author, Keyword, Article
+    Issue, Author, Keyword, Article, UploadSession
 )
+from .cache import CachedRetrieveMixin, get_or_build
+from .counters import article_views, article_downloads, issue_downloads, article_counts, issue_counts, client_key
+from .downloads import FileDownloadRenderer, serve_file
+from .fieldsets import SparseQuerysetMixin, requested_fieldset
+from .importer import import_issue
+from .pagination import (
+    IssueCursorPagination, CreatedAtCursorPagination, OrderedCursorPagination, ArticleCursorPagination,
+    SearchPagination
+)
+from .renderers import FastJSONParser
+from .search import SearchResults
+from .versioning import ConditionalGetMixin
 from .serializers import (
-    ContactMessageSerializer, ContactMessageFileSerializer, JournalSerializer, NewsSerializer,
-    EditorialBoardMemberSerializer,
-    RecentIssueLinkSerializer, IssueSerializer, AuthorSerializer, KeywordSerializer, ArticleSerializer
+    ContactMessageSerializer, ContactMessageFileSerializer, ContactMessageBulkSerializer, JournalSerializer,
+    NewsSerializer, EditorialBoardMemberSerializer,
+    RecentIssueLinkSerializer, IssueSerializer, IssueSummarySerializer, AuthorSerializer, KeywordSerializer, ArticleSerializer,
+    UploadSessionSerializer, IssueImportSerializer
 )
+from . import export, home, inbox, toc, uploads
+
+
+def journal_code(value):
+    """Canonical form of a journal short name / issue journal_type as stored in the database"""
+    return value.strip().upper()
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -24,11 +44,24 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
-class ContactMessageViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
-                            mixins.DestroyModelMixin, viewsets.GenericViewSet):
+class ContactMessageViewSet(SparseQuerysetMixin, mixins.CreateModelMixin, mixins.ListModelMixin,
+                            mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Contact form: anyone can send a message, the editors read them as a paginated inbox"""
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            qs = qs.prefetch_related('files')
+        if self.action == 'list':
+            qs = inbox.filter_messages(qs, self.request.query_params)
+        return qs
+
+    def perform_destroy(self, instance):
+        inbox.delete_messages([instance.pk])
 
     def get_permissions(self):
         if self.action == 'create' or self.action == 'upload_file':
@@ -53,24 +86,53 @@ class ContactMessageViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixi
         cmf = ContactMessageFile.objects.create(message=message, file=file)
         return Response(ContactMessageFileSerializer(cmf).data, status=status.HTTP_201_CREATED)
 
-
-class JournalViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path=r'files/(?P<file_id>[0-9]+)',
+            renderer_classes=[FileDownloadRenderer])
+    def download_file(self, request, pk=None, file_id=None):
+        """Stream an attachment of the message, supports HTTP Range requests"""
+        attachment = ContactMessageFile.objects.filter(pk=file_id, message_id=pk).only('pk', 'file').first()
+        if attachment is None:
+            raise Http404
+        return serve_file(request, attachment.file, attachment=True)
+
+    @action(detail=False, methods=['post'], url_path='mark-read', parser_classes=[FastJSONParser, FormParser])
+    def mark_read(self, request):
+        """Mark the messages in `ids` read (or unread with is_read=false) with a single UPDATE"""
+        serializer = ContactMessageBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = inbox.mark_read(serializer.validated_data['ids'], serializer.validated_data['is_read'])
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete', parser_classes=[FastJSONParser, FormParser])
+    def bulk_delete(self, request):
+        """Delete the messages in `ids` with their attachments"""
+        serializer = ContactMessageBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'deleted': inbox.delete_messages(serializer.validated_data['ids'])})
+
+
+class JournalViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Journal.objects.all()
     serializer_class = JournalSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = ('journal',)
 
 
-class NewsViewSet(viewsets.ModelViewSet):
+class NewsViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = News.objects.all()
     serializer_class = NewsSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = ('news',)
+    pagination_class = CreatedAtCursorPagination
     parser_classes = [MultiPartParser, FormParser]
 
 
-class EditorialBoardViewSet(viewsets.ModelViewSet):
+class EditorialBoardViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = EditorialBoardMember.objects.all()
     serializer_class = EditorialBoardMemberSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = ('editorialboardmember', 'journal')
+    pagination_class = OrderedCursorPagination
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -79,50 +141,102 @@ class EditorialBoardViewSet(viewsets.ModelViewSet):
 
         journal_short_name = self.request.query_params.get('journal')
         if journal_short_name:
-            # Case-insensitive filtering to handle both 'QX'/'qx' and 'AI'/'ai'
-            qs = qs.filter(journal__short_name__iexact=journal_short_name)
+            # Short names are stored upper-case: 'qx' and 'QX' both hit the unique index
+            qs = qs.filter(journal__short_name=journal_code(journal_short_name))
         return qs
 
 
-class RecentIssueLinkViewSet(viewsets.ModelViewSet):
+class RecentIssueLinkViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = RecentIssueLink.objects.all()
     serializer_class = RecentIssueLinkSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = OrderedCursorPagination
 
 
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAdminOrReadOnly]
 
 
-class KeywordViewSet(viewsets.ModelViewSet):
+class KeywordViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Keyword.objects.all()
     serializer_class = KeywordSerializer
     permission_classes = [IsAdminOrReadOnly]
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(ConditionalGetMixin, CachedRetrieveMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Issue.objects.all()
     serializer_class = IssueSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = ('issue', 'journal', 'article', 'articletranslation', 'author', 'keyword')
+    counter_models = ('issue_counters', 'article_counters')
+    counter_actions = ('retrieve', 'current_by_type')
+    payload_model = 'issue'
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = IssueCursorPagination
+
+    # Read-only actions that return the summary form unless ?expand=articles is given
+    summary_actions = ('list', 'current_issues', 'by_journal_type')
+
+    def expand_articles(self):
+        """Whether the response should contain the full nested article tree"""
+        if self.action not in self.summary_actions:
+            return True
+        expand = self.request.query_params.get('expand', '')
+        return 'articles' in [part.strip() for part in expand.split(',')]
+
+    def get_serializer_class(self):
+        if self.expand_articles():
+            return IssueSerializer
+        return IssueSummarySerializer
+
+    def current_payload(self, data, queryset):
+        return issue_counts(data, queryset)
+
+    def build_queryset(self):
+        """Single queryset builder shared by every action of this viewset"""
+        if self.action == 'download':
+            # Streaming the PDF only needs the file column
+            return super().get_queryset().only('pk', 'pdf_file')
+        qs = super().get_queryset().select_related('journal')
+        if self.expand_articles():
+            # Optimize queries by prefetching related objects including article relationships
+            qs = qs.prefetch_related(
+                'articles__authors',
+                'articles__keywords',
+                'articles__translations'
+            )
+        else:
+            qs = qs.annotate(articles_count=Count('articles'))
+        return qs
+
+    def lean_summaries(self):
+        """Whether the summaries are built from .values() rows instead of serializer instances"""
+        return (getattr(settings, 'API_LEAN_LISTS', True) and not self.expand_articles()
+                and requested_fieldset(self.request) is None)
+
+    def summary_response(self, queryset, paginate=True):
+        rows = queryset.values(*IssueSummarySerializer.values_fields)
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is not None:
+            return self.get_paginated_response(IssueSummarySerializer.lean_representation(page, self.request))
+        return Response(IssueSummarySerializer.lean_representation(rows, self.request))
+
+    def list(self, request, *args, **kwargs):
+        if self.lean_summaries():
+            return self.summary_response(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        # Optimize queries by prefetching related objects including article relationships
-        qs = qs.prefetch_related(
-            'articles__authors',
-            'articles__keywords',
-            'articles__translations'
-        ).select_related('journal')
+        qs = self.build_queryset()
 
         journal_type = self.request.query_params.get('journal')
         is_current = self.request.query_params.get('current')
 
         if journal_type:
             # Filter by journal_type field directly (QX or AI)
-            qs = qs.filter(journal_type__iexact=journal_type)
+            qs = qs.filter(journal_type=journal_code(journal_type))
 
         if is_current is not None:
             is_current_bool = str(is_current).lower() in ['true', '1', 'yes', 'ha']
@@ -133,37 +247,41 @@ class IssueViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='current-issues')
     def current_issues(self, request):
         """Get current issues for all journals"""
-        current_issues = Issue.objects.filter(is_current=True).select_related('journal')
+        current_issues = self.build_queryset().filter(is_current=True)
+        if self.lean_summaries():
+            return self.summary_response(current_issues, paginate=False)
         serializer = self.get_serializer(current_issues, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='by-journal-type/(?P<journal_type>[^/.]+)')
     def by_journal_type(self, request, journal_type=None):
         """Get issues by journal type (QX or AI)"""
-        issues = self.get_queryset().filter(journal_type__iexact=journal_type)
+        issues = self.get_queryset().filter(journal_type=journal_code(journal_type))
+        if self.lean_summaries():
+            return self.summary_response(issues)
+        page = self.paginate_queryset(issues)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(issues, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='current-by-type/(?P<journal_type>[^/.]+)')
     def current_by_type(self, request, journal_type=None):
         """Get current issue by journal type (QX or AI)"""
-        try:
-            issue = Issue.objects.get(journal_type__iexact=journal_type, is_current=True)
-            serializer = self.get_serializer(issue)
-            return Response(serializer.data)
-        except Issue.DoesNotExist:
+        pk = Issue.objects.filter(journal_type=journal_code(journal_type), is_current=True).values_list(
+            'pk', flat=True).first()
+        if pk is None:
             return Response({'detail': f'Bu jurnal turi ({journal_type}) uchun joriy nashr topilmadi.'},
                             status=status.HTTP_404_NOT_FOUND)
+        return Response(self.cached_payload(pk, lambda: self.build_queryset().get(pk=pk), self.build_queryset()))
 
     @action(detail=True, methods=['post'], url_path='set-current')
     def set_current(self, request, pk=None):
         """Set this issue as current for its journal type"""
         issue = self.get_object()
 
-        # Remove current status from other issues of the same journal type
-        Issue.objects.filter(journal_type=issue.journal_type, is_current=True).update(is_current=False)
-
-        # Set this issue as current
+        # save() takes the current status from the other issues of the same journal type
         issue.is_current = True
         issue.save()
 
@@ -178,11 +296,47 @@ class IssueViewSet(viewsets.ModelViewSet):
             'issue': serializer.data
         })
 
+    @action(detail=True, methods=['get'], renderer_classes=[FileDownloadRenderer])
+    def download(self, request, pk=None):
+        """Stream the issue PDF, supports HTTP Range requests"""
+        issue = self.get_object()
+        return serve_file(
+            request, issue.pdf_file, attachment='attachment' in request.query_params, etag=self.current_etag(),
+            last_modified=self.current_last_modified(), on_download=lambda: issue_downloads.hit(issue.pk, client_key(request)),
+        )
+
+    @action(detail=True, methods=['get'])
+    def toc(self, request, pk=None):
+        """Table of contents in page order from the precomputed snapshot, ?lang= selects one language"""
+        entries = toc.get_entries(int(pk)) if pk.isdigit() else None
+        if entries is None:
+            raise Http404
+        language = request.query_params.get('lang')
+        if language:
+            if language not in entries:
+                return Response({'detail': "Noma'lum til"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(entries[language])
+        return Response(entries)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[FastJSONParser])
+    def bulk_import(self, request):
+        """Create a whole issue with its articles, authors, keywords and translations from one manifest"""
+        serializer = IssueImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = import_issue(serializer.validated_data)
+        return Response({
+            'id': result.issue.pk,
+            'articles': result.articles,
+            'authors_created': result.authors_created,
+            'keywords_created': result.keywords_created,
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'], url_path='latest-year')
     def latest_year(self, request):
         """Get the year of the most recent issue"""
         try:
-            latest_issue = Issue.objects.order_by('-published_date').first()
+            # Only scalar columns are read here, so the builder's prefetches are not needed
+            latest_issue = Issue.objects.only('title', 'journal_type', 'published_date').order_by('-published_date').first()
             if latest_issue:
                 return Response({
                     'success': True,
@@ -202,14 +356,20 @@ class IssueViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ConditionalGetMixin, CachedRetrieveMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = ('article', 'articletranslation', 'author', 'keyword')
+    counter_models = ('article_counters',)
+    payload_model = 'article'
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = ArticleCursorPagination
 
     def get_queryset(self):
         qs = super().get_queryset()
+        if self.action == 'download':
+            return qs.only('pk', 'article_file')
         # Optimize database queries by prefetching related objects
         qs = qs.prefetch_related('authors', 'keywords', 'translations')
 
@@ -220,28 +380,147 @@ class ArticleViewSet(viewsets.ModelViewSet):
             qs = qs.filter(issue_id=issue_id)
 
         if journal_type:
-            qs = qs.filter(issue__journal__short_name__iexact=journal_type)
+            qs = qs.filter(issue__journal__short_name=journal_code(journal_type))
 
         return qs
 
     def retrieve(self, request, *args, **kwargs):
-        """Override retrieve to ensure proper data loading"""
-        instance = self.get_object()
-
-        # Debug: Print the actual data being returned
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-
-        # Log for debugging
-        print(f"Article ID: {instance.id}")
-        print(f"Authors count: {instance.authors.count()}")
-        print(f"Authors data in response: {data.get('authors', [])}")
-        print(f"Keywords count: {instance.keywords.count()}")
-        print(f"Keywords data in response: {data.get('keywords', [])}")
-        print(f"Translations count: {instance.translations.count()}")
-        print(f"Translations data in response: {data.get('translations', [])}")
-
-        return Response(data)
+        """Override retrieve to count the article view"""
+        response = super().retrieve(request, *args, **kwargs)
+        self.record_view(request, response.data['id'])
+        return response
+
+    def not_modified(self, request):
+        pk = self.kwargs.get('pk', '')
+        if self.action == 'retrieve' and pk.isdigit():
+            self.record_view(request, int(pk))
+
+    def current_payload(self, data, queryset):
+        return article_counts(data, queryset)
+
+    def record_view(self, request, pk):
+        """Count a view of the retrieved article, also called by the async read path"""
+        # Buffered and deduplicated, written later by the counter's flusher thread
+        article_views.hit(pk, client_key(request))
+
+    @action(detail=True, methods=['get'], renderer_classes=[FileDownloadRenderer])
+    def download(self, request, pk=None):
+        """Stream the article file, supports HTTP Range requests"""
+        article = self.get_object()
+        return serve_file(
+            request, article.article_file, attachment='attachment' in request.query_params,
+            etag=self.current_etag(), last_modified=self.current_last_modified(),
+            on_download=lambda: article_downloads.hit(article.pk, client_key(request)),
+        )
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """Ranked full-text search over titles, abstracts, keywords and author names"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': "Qidiruv so'rovi (q) kiritilmagan"}, status=status.HTTP_400_BAD_REQUEST)
+        language = request.query_params.get('lang')
+
+        paginator = SearchPagination()
+        hits = paginator.paginate_queryset(SearchResults(query, language), request, view=self)
+        articles = Article.objects.prefetch_related('authors', 'keywords', 'translations').in_bulk(
+            [hit['article_id'] for hit in hits])
+        # The index may briefly reference an article deleted in a transaction still committing
+        hits = [hit for hit in hits if hit['article_id'] in articles]
+        serializer = self.get_serializer([articles[hit['article_id']] for hit in hits], many=True)
+        results = []
+        for data, hit in zip(serializer.data, hits):
+            data['search'] = {
+                'language': hit['language'],
+                'rank': hit['rank'],
+                'title': hit['title'],
+                'snippet': hit['snippet'],
+            }
+            results.append(data)
+        return paginator.get_paginated_response(results)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """Chunked upload of large PDFs: create -> PUT chunk (repeat) -> finalize"""
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [FastJSONParser, FormParser]
+
+    def perform_create(self, serializer):
+        session = serializer.save(created_by=self.request.user)
+        uploads.start(session)
+
+    def perform_destroy(self, instance):
+        uploads.abort(instance)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Write the raw request body at ?offset= (or the Upload-Offset header)"""
+        session = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', request.headers.get('Upload-Offset', '')))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response({'detail': "offset va Content-Length ko'rsatilishi shart"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            uploads.write_chunk(session, request.stream, offset, length, request.headers.get('X-Chunk-SHA256'))
+        except uploads.UploadError as e:
+            return Response({'detail': e.message, 'received': session.received}, status=e.status)
+        return Response(self.get_serializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Check the assembled file and attach it to the issue or article"""
+        session = self.get_object()
+        try:
+            target = uploads.finalize(session)
+        except uploads.UploadError as e:
+            return Response({'detail': e.message, 'received': session.received}, status=e.status)
+        field_name = uploads.TARGETS[session.target][1]
+        return Response({
+            **self.get_serializer(session).data,
+            'file': request.build_absolute_uri(getattr(target, field_name).url),
+        })
+
+
+class CatalogueExportView(APIView):
+    """Whole catalogue streamed as NDJSON or Crossref XML, memory stays flat however large it is"""
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [FileDownloadRenderer]
+
+    def get(self, request, export_format):
+        if export_format not in export.FORMATS:
+            raise Http404
+        writer, content_type, extension = export.FORMATS[export_format]
+        base_url = request.build_absolute_uri('/')
+        response = StreamingHttpResponse(writer(export.catalogue(), base_url), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="catalogue-{timezone.now():%Y%m%d}.{extension}"'
+        return response
+
+
+class HomeView(ConditionalGetMixin, APIView):
+    """Current issues, recent-issue links with their issues, latest year, news and board in one response"""
+    permission_classes = [permissions.AllowAny]
+    conditional_models = home.CONDITIONAL_MODELS
+
+    def get(self, request):
+        journal = request.query_params.get('journal')
+        journal = journal_code(journal) if journal else None
+        if journal and len(journal) > Journal._meta.get_field('short_name').max_length:
+            raise Http404
+
+        def build():
+            # Raised before anything is cached, so unknown codes can't fill the cache with copies
+            if journal and not Journal.objects.filter(short_name=journal).exists():
+                raise Http404
+            return home.build(request, journal)
+
+        # Keyed by the content versions, not the ETag: that one changes with any query parameter
+        variant = f'{self.current_fingerprint()}|{request.scheme}://{request.get_host()}'
+        return Response(get_or_build('home', journal or '-', variant, build))
 
 
 class HealthCheckView(APIView):
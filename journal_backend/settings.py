@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # API_REQUEST_TIMING o'chiq bo'lsa o'zini zanjirdan olib tashlaydi
+    'api.instrumentation.RequestTimingMiddleware',
+    # Replikalar sozlanmagan bo'lsa o'zini zanjirdan olib tashlaydi
+    'api.db.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -82,12 +87,39 @@ WSGI_APPLICATION = 'journal_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql bo'lsa PostgreSQL (psycopg kerak), aks holda SQLite fayli ishlatiladi
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    _postgres = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'journal'),
+        'USER': os.environ.get('DB_USER', 'journal'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        # Doimiy ulanishlar: har so'rovda qayta ulanmaslik uchun, eskirganlari so'rov boshida tekshiriladi
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))},
+    }
+    DATABASES = {'default': {**_postgres, 'HOST': os.environ.get('DB_HOST', 'localhost')}}
+    # Faqat o'qish uchun replikalar (vergul bilan): GET so'rovlari shularga yuboriladi, yozish asosiy bazaga
+    for _number, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+        DATABASES[f'replica{_number}'] = {**_postgres, 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            # Baza band bo'lsa "database is locked" o'rniga shuncha soniya kutadi
+            'OPTIONS': {'timeout': int(os.environ.get('DB_SQLITE_TIMEOUT', 20))},
+        }
     }
-}
+
+# SQLite ulanishida WAL rejimi: o'quvchilar yozuvchini kutmaydi (api/db.py)
+API_SQLITE_WAL = os.environ.get('API_SQLITE_WAL', '1').lower() in ('1', 'true', 'yes')
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
 
 
 # Password validation
@@ -138,20 +170,129 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         # Barcha so'rovlar uchun ochiq, faqat o'zgartirishlar uchun avtorizatsiya talab qilinadi
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    ]
+    ],
+    # orjson o'rnatilmagan bo'lsa standart json moduli ishlatiladi (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Barcha ro'yxatlar kursor bo'yicha sahifalanadi (api/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.JournalCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 20)),
+}
+
+# ?page_size= orqali so'ralishi mumkin bo'lgan eng katta sahifa hajmi
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+
+# JSON kutubxonasi: 'orjson' (tezroq) yoki 'json' (standart)
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'orjson')
+
+# Nashrlar ro'yxatini serializator o'rniga .values() qatorlaridan qurish (natija bir xil, tezroq)
+API_LEAN_LISTS = True
+
+# So'rovlar vaqtini o'lchash: SQL soni, DB vaqti, serializatsiya va render vaqti
+# `api.timing` loggeriga va `Server-Timing` sarlavhasiga yoziladi
+API_REQUEST_TIMING = os.environ.get('API_REQUEST_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Nashr, maqola, yangilik va tahrir hay'ati a'zosi sahifalari uchun async view'lar (api/async_views.py).
+# Faqat ASGI'da ma'noli va standart holda o'chiq: o'lchovlarda sinxron view'lardan sekinroq chiqdi,
+# yoqishdan oldin `load_test` bilan o'z serveringizda solishtiring
+API_ASYNC_READS = os.environ.get('API_ASYNC_READS', '').lower() in ('1', 'true', 'yes')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': os.environ.get('API_LOG_LEVEL', 'INFO')},
+    },
 }
 
+# Maqolalar qidiruvi (api/search.py). Bo'sh bo'lsa DB turiga qarab tanlanadi:
+# SQLite uchun FTS5 indeksi, PostgreSQL uchun tsvector
+API_SEARCH_BACKEND = os.environ.get('API_SEARCH_BACKEND') or None
+
+# Kesh: standart holda jarayon xotirasida, ishlab chiqarishda Redis/Memcached yoki fayl keshini
+# API_CACHE_BACKEND va API_CACHE_LOCATION orqali ko'rsating
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('API_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('API_CACHE_LOCATION', 'journal-api'),
+    }
+}
+
+# Serializatsiya qilingan Issue/Article javoblari keshi (api/cache.py), signallar orqali tozalanadi
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TIMEOUT = 24 * 60 * 60
+API_RESPONSE_CACHE_LOCK_TIMEOUT = 10  # sovuq kalitni faqat bitta worker quradi, qolganlari kutadi
+
+# /issues/{id}/download/ va /articles/{id}/download/ fayllarni qanday uzatadi:
+# None - Python o'zi oqim bilan uzatadi (Range qo'llab-quvvatlanadi)
+# 'x-accel-redirect' - nginx uzatadi, API_FILE_OFFLOAD_LOCATION internal location bo'lishi kerak
+# 'x-sendfile' - Apache/lighttpd uzatadi
+API_FILE_OFFLOAD = os.environ.get('API_FILE_OFFLOAD') or None
+API_FILE_OFFLOAD_LOCATION = os.environ.get('API_FILE_OFFLOAD_LOCATION', '/protected-media/')
+
+# Fon vazifalari (api/tasks.py): bazadagi navbat, `python manage.py run_worker` bajaradi.
+# Rasm nusxalari, PDF'ni qayta ishlash va xabarnomalar shu yerda ishlaydi.
+# API_TASKS_EAGER=1 bo'lsa worker'siz, tranzaksiyadan keyin shu jarayonda bajariladi (lokal ishlash uchun)
+API_TASKS_EAGER = os.environ.get('API_TASKS_EAGER', '').lower() in ('1', 'true', 'yes')
+API_TASKS_RETRY_DELAY = 30  # soniya, har urinishda ikki baravar oshadi
+API_TASKS_STALE_TIMEOUT = 30 * 60  # shuncha vaqt "running" bo'lib qolgan vazifa qayta navbatga qo'yiladi
+
+# PDF fayllardan ajratib olinadigan matnning eng katta uzunligi (belgi), qidiruv indeksiga tushadi
+API_FULLTEXT_MAX_CHARS = 1_000_000
+
+# Katalog eksporti (export_catalogue buyrug'i va /api/export/<format>/)
+API_EXPORT_CHUNK_SIZE = 20  # bir so'rovda olinadigan nashrlar soni, maqolalari bilan birga
+# Maqolaning ochiq sahifasi, masalan https://jurnal.uz/articles/{id}; bo'sh bo'lsa API manzili ishlatiladi
+API_ARTICLE_URL = os.environ.get('API_ARTICLE_URL', '')
+API_CROSSREF_DEPOSITOR_NAME = os.environ.get('API_CROSSREF_DEPOSITOR_NAME', '')
+API_CROSSREF_DEPOSITOR_EMAIL = os.environ.get('API_CROSSREF_DEPOSITOR_EMAIL', '')
+API_CROSSREF_REGISTRANT = os.environ.get('API_CROSSREF_REGISTRANT', '')
+
+# /api/home/ dagi so'nggi yangiliklar soni
+API_HOME_NEWS_COUNT = 5
+
+# Yangi bog'lanish xabari haqida ADMINS ga xat (fayllar yuklanib bo'lishini kutib)
+API_CONTACT_NOTIFY_DELAY = 120  # soniya
+ADMINS = [('', email.strip()) for email in os.environ.get('ADMINS', '').split(',') if email.strip()]
+
+# Bog'lanish xabarlari ilovalari shuncha kundan keyin diskdan va bazadan o'chiriladi.
+# Cron orqali `python manage.py purge_contact_attachments` ishga tushiring
+API_CONTACT_ATTACHMENT_RETENTION_DAYS = 365
+API_CONTACT_PURGE_BATCH_SIZE = 500  # bir partiyada o'chiriladigan fayllar soni
+
+# Ko'rishlar va yuklab olishlar hisoblagichi (api/counters.py): xotirada yig'iladi va partiyalab yoziladi
+API_COUNTER_FLUSH_INTERVAL = 10  # soniya
+API_COUNTER_FLUSH_THRESHOLD = 100  # shuncha ko'rish yig'ilsa darhol yoziladi
+API_COUNTER_DEDUP_WINDOW = 30 * 60  # bitta mijoz 30 daqiqada bir marta hisoblanadi
+# X-Forwarded-For faqat shu manzillardagi proksi (masalan, nginx) orqali kelgan so'rovlarda hisobga olinadi,
+# aks holda mijoz sarlavhani o'zi yozib takroriy ko'rishlar filtrini chetlab o'tishi mumkin
+API_TRUSTED_PROXIES = [ip.strip() for ip in os.environ.get('API_TRUSTED_PROXIES', '').split(',') if ip.strip()]
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
-import os
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
+# Bundan katta multipart fayllar xotirada emas, vaqtinchalik faylda saqlanadi
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+
+# Katta PDF'larni bo'laklab yuklash (/api/uploads/): worker xotirasida bir vaqtda faqat bitta bo'lak
+API_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+API_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'tmp_uploads')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field